@@ -0,0 +1,220 @@
+"""
+End-to-end throughput of the warmup and collector modules against a local fork of Scroll.
+
+Starts anvil (Foundry) forked from Scroll mainnet and puts a counting JSON-RPC proxy in front of it.
+It then seeds fresh wallets with ETH and runs the real modules on them with all delays turned off.
+It reports transactions per second, RPC calls per action and p50/p99 action latency.
+
+The fork already has the real WETH, USDC/USDT, Multicall3 and DEX routers, so nothing is deployed.
+Token prices still come from the public price API. Volume mode is not covered, since it needs OKX and bridges.
+
+Usage: python -m benchmarks.devnet [--wallets 10] [--modules warmup,collect] [--fork-url URL] [--port 8545]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from eth_utils import keccak
+
+import modules.collector
+import modules.warmup
+from config import SCROLL_RPC_ENDPOINTS
+from core.chain import MAINNET, SCROLL
+from modules.database import Database
+from utils import disable_sleeps
+
+ANVIL_STARTUP_TIMEOUT = 60
+WALLET_BALANCE = 10**17
+MODULES = {"warmup": modules.warmup.warmup, "collect": modules.collector.collect}
+# module -> (module attribute, name) of the function running a single action
+ACTION_FUNCTIONS = {
+    "warmup": (modules.warmup, "perform_warmup_action"),
+    "collect": (modules.collector, "perform_collector_action"),
+}
+
+
+class RPCCounter:
+    """
+    JSON-RPC proxy in front of anvil that counts the forwarded calls per method.
+    """
+
+    def __init__(self, upstream_uri: str) -> None:
+        self.upstream_uri = upstream_uri
+        self.calls: Counter = Counter()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        payload = json.loads(body)
+        for call in payload if isinstance(payload, list) else [payload]:
+            self.calls[call["method"]] += 1
+        async with self._session.post(
+            self.upstream_uri, data=body, headers={"Content-Type": "application/json"}
+        ) as response:
+            return web.Response(body=await response.read(), content_type="application/json")
+
+    async def start(self, port: int) -> None:
+        self._session = aiohttp.ClientSession()
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        await self._runner.cleanup()
+        await self._session.close()
+
+
+async def rpc_call(uri: str, method: str, params: List) -> Dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.post(uri, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params}) as response:
+            return await response.json()
+
+
+def start_anvil(fork_url: str, port: int) -> subprocess.Popen:
+    try:
+        return subprocess.Popen(
+            [
+                "anvil",
+                "--fork-url",
+                fork_url,
+                "--chain-id",
+                str(SCROLL.chain_id),
+                "--port",
+                str(port),
+                "--silent",
+            ]
+        )
+    except FileNotFoundError:
+        sys.exit("anvil is not installed, see https://getfoundry.sh")
+
+
+async def wait_for_anvil(uri: str, process: subprocess.Popen) -> None:
+    started_at = time.monotonic()
+    while time.monotonic() - started_at < ANVIL_STARTUP_TIMEOUT:
+        if process.poll() is not None:
+            sys.exit(f"anvil exited with code {process.returncode}")
+        try:
+            await rpc_call(uri=uri, method="eth_chainId", params=[])
+            return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.5)
+    sys.exit(f"anvil didn't start in {ANVIL_STARTUP_TIMEOUT} seconds")
+
+
+async def seed_wallets(uri: str, wallets: int, file_path: str) -> Database:
+    data = []
+    for index in range(wallets):
+        private_key = "0x" + keccak(text=f"devnet-wallet-{index}").hex()
+        wallet = Database.create_wallet(private_key=private_key, proxy=None, deposit_address=None)
+        await rpc_call(uri=uri, method="anvil_setBalance", params=[wallet.address, hex(WALLET_BALANCE)])
+        data.append(wallet)
+    database = Database(data=data, file_path=file_path)
+    database.save_database()
+    return database
+
+
+def track_actions(func: Callable, rpc_counter: RPCCounter, latencies: List[float], rpc_calls: List[int]) -> Callable:
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        calls_before = rpc_counter.total
+        started_at = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started_at)
+            rpc_calls.append(rpc_counter.total - calls_before)
+
+    return wrapper
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run_module(name: str, database: Database, rpc_counter: RPCCounter) -> None:
+    latencies: List[float] = []
+    rpc_calls: List[int] = []
+    module, function_name = ACTION_FUNCTIONS[name]
+    original_function = getattr(module, function_name)
+    setattr(module, function_name, track_actions(original_function, rpc_counter, latencies, rpc_calls))
+
+    transactions_before = rpc_counter.calls["eth_sendRawTransaction"]
+    started_at = time.perf_counter()
+    try:
+        await MODULES[name](database=database)
+    finally:
+        setattr(module, function_name, original_function)
+    elapsed = time.perf_counter() - started_at
+    transactions = rpc_counter.calls["eth_sendRawTransaction"] - transactions_before
+
+    print(f"\n{name}: {len(latencies)} actions, {transactions} transactions in {elapsed:.1f} s")
+    print(f"  transactions/s      {transactions / elapsed:.2f}")
+    if latencies:
+        print(f"  RPC calls / action  {sum(rpc_calls) / len(rpc_calls):.1f}")
+        print(f"  action latency p50  {percentile(latencies, 50) * 1000:.0f} ms")
+        print(f"  action latency p99  {percentile(latencies, 99) * 1000:.0f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Module throughput on a local Scroll fork")
+    parser.add_argument("--wallets", type=int, default=10)
+    parser.add_argument("--modules", default="warmup,collect", help="comma separated, run in order on the same wallets")
+    parser.add_argument("--fork-url", default=SCROLL_RPC_ENDPOINTS[0])
+    parser.add_argument("--port", type=int, default=8545, help="anvil port, the counting proxy listens on port + 1")
+    args = parser.parse_args()
+
+    module_names = args.modules.split(",")
+    for name in module_names:
+        if name not in MODULES:
+            sys.exit(f"Unknown module `{name}`, expected one of {', '.join(MODULES)}")
+
+    anvil_uri = f"http://127.0.0.1:{args.port}"
+    anvil = start_anvil(fork_url=args.fork_url, port=args.port)
+    rpc_counter = RPCCounter(upstream_uri=anvil_uri)
+    database_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    database_file.close()
+    try:
+        await wait_for_anvil(uri=anvil_uri, process=anvil)
+        await rpc_counter.start(port=args.port + 1)
+
+        # every client and the gas price checks go through the counting proxy
+        SCROLL.rpcs = [f"http://127.0.0.1:{args.port + 1}"]
+        MAINNET.rpcs = SCROLL.rpcs
+        disable_sleeps()
+
+        database = await seed_wallets(uri=anvil_uri, wallets=args.wallets, file_path=database_file.name)
+        for name in module_names:
+            await run_module(name=name, database=database, rpc_counter=rpc_counter)
+
+        print("\nRPC calls by method:")
+        for method, count in rpc_counter.calls.most_common():
+            print(f"  {method:<32}{count}")
+    finally:
+        await rpc_counter.stop()
+        anvil.terminate()
+        anvil.wait()
+        os.unlink(database_file.name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
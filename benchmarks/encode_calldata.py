@@ -0,0 +1,79 @@
+"""
+Per-call calldata encoding cost of web3 `contract.encodeABI` against the precompiled encoders.
+
+Usage: python -m benchmarks.encode_calldata
+"""
+import timeit
+
+from eth_abi import encode
+from web3 import AsyncWeb3
+from web3.constants import ADDRESS_ZERO
+
+from core.constants import (
+    ERC20_CONTRACT_ABI,
+    IZUMI_ROUTER_CONTRACT_ABI,
+    LAYERBANK_CONTRACT_ABI,
+    SCROLL_BRIDGE_CONTRACT_ABI,
+    SCROLL_MESSAGE,
+    SYNCSWAP_ROUTER_CONTRACT_ABI,
+    WETH_CONTRACT_ABI,
+)
+from core.contracts import encode_function_call
+from core.token import USDC, WETH
+
+ITERATIONS = 2000
+ADDRESS = "0x5300000000000000000000000000000000000004"
+
+CASES = [
+    ("approve", ERC20_CONTRACT_ABI, (ADDRESS, 10**18)),
+    ("deposit", WETH_CONTRACT_ABI, ()),
+    ("withdraw", WETH_CONTRACT_ABI, [10**18]),
+    ("redeemToken", LAYERBANK_CONTRACT_ABI, [ADDRESS, 10**18]),
+    ("sendMessage", SCROLL_BRIDGE_CONTRACT_ABI, (ADDRESS, 10**18, SCROLL_MESSAGE, 170000)),
+    ("swapAmount", IZUMI_ROUTER_CONTRACT_ABI, [(b"\x01" * 43, ADDRESS_ZERO, 10**18, 10**6, 1700000000)]),
+    ("multicall", IZUMI_ROUTER_CONTRACT_ABI, [["0x" + "ab" * 196, "0x" + "cd" * 68]]),
+    (
+        "swap",
+        SYNCSWAP_ROUTER_CONTRACT_ABI,
+        (
+            [
+                {
+                    "steps": [
+                        {
+                            "pool": ADDRESS,
+                            "data": encode(["address", "address", "uint8"], [WETH.contract_address, ADDRESS, 1]),
+                            "callback": ADDRESS_ZERO,
+                            "callbackData": "0x",
+                        }
+                    ],
+                    "tokenIn": USDC.contract_address,
+                    "amountIn": 10**6,
+                }
+            ],
+            10**15,
+            1700000000,
+        ),
+    ),
+]
+
+
+def main() -> None:
+    w3 = AsyncWeb3()
+    print(f"{'function':<14}{'encodeABI, us':>16}{'precompiled, us':>18}{'speedup':>10}")
+    for fn_name, abi, args in CASES:
+        contract = w3.eth.contract(address=ADDRESS, abi=abi)
+        expected = contract.encodeABI(fn_name=fn_name, args=args)
+        assert encode_function_call(abi=abi, fn_name=fn_name, args=args) == expected, fn_name
+
+        web3_time = timeit.timeit(lambda: contract.encodeABI(fn_name=fn_name, args=args), number=ITERATIONS)
+        precompiled_time = timeit.timeit(
+            lambda: encode_function_call(abi=abi, fn_name=fn_name, args=args), number=ITERATIONS
+        )
+        print(
+            f"{fn_name:<14}{web3_time / ITERATIONS * 1e6:>16.1f}{precompiled_time / ITERATIONS * 1e6:>18.1f}"
+            f"{web3_time / precompiled_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Import time of main.py and the cost of the ABI/fee tables it no longer parses at import.
+
+Usage: python -m benchmarks.import_time
+"""
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+RUNS = 5
+TOP_PACKAGES = 15
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure_import() -> Tuple[int, Dict[str, int]]:
+    """
+    Runs `import main` in a fresh interpreter and returns its total import time
+    and the self import time of every root package, in us.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], capture_output=True, text=True, check=True
+    ).stderr
+    total = 0
+    package_times = defaultdict(int)
+    for match in IMPORT_TIME_PATTERN.finditer(output):
+        self_time, cumulative, _, module = match.groups()
+        package_times[module.split(".")[0]] += int(self_time)
+        if module == "main":
+            total = int(cumulative)
+    return total, package_times
+
+
+def measure_json_tables() -> float:
+    from core import constants
+    from utils import LazyJSONFile
+
+    started_at = time.perf_counter()
+    for value in vars(constants).values():
+        if isinstance(value, LazyJSONFile):
+            value.data
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    runs = [measure_import() for _ in range(RUNS)]
+    print(f"import main, median of {RUNS} runs: {statistics.median(total for total, _ in runs) / 1000:.1f} ms")
+
+    print("\nslowest packages:")
+    packages = {package for _, package_times in runs for package in package_times}
+    medians = {
+        package: statistics.median(package_times.get(package, 0) for _, package_times in runs) for package in packages
+    }
+    for package, self_time in sorted(medians.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]:
+        print(f"  {package:<30}{self_time / 1000:>8.1f} ms")
+
+    print(f"\nparsing all ABI and fee tables on first access: {measure_json_tables() * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
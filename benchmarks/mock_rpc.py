@@ -0,0 +1,386 @@
+"""
+Local JSON-RPC server with configurable latency and fault injection, for load and resilience testing
+of the client code without a public endpoint.
+
+Answers the methods the project uses: eth_chainId, eth_blockNumber, eth_getBalance, eth_getTransactionCount,
+eth_getCode (every account is an EOA), eth_gasPrice, eth_feeHistory, eth_estimateGas, eth_call,
+eth_sendRawTransaction and eth_getTransactionReceipt.
+eth_call answers every function of the ABIs in core/abi with default values of its output types,
+including Multicall3 `aggregate`/`aggregate3` batches.
+
+Faults are injected per request: HTTP 429, JSON-RPC errors, hanging requests and dropped connections.
+
+Usage:
+    python -m benchmarks.mock_rpc serve [--port 8547] [fault options]
+        runs the server alone, point *_RPC_ENDPOINTS in config.py at it to run the modules
+    python -m benchmarks.mock_rpc scenario [--wallets 10000] [--concurrency 200] [--no-delays] [fault options]
+        runs balance checks and an ETH transfer for every synthetic wallet through `Client`
+
+Latency distributions: `fixed:MS`, `uniform:MIN_MS,MAX_MS` or `lognormal:MEDIAN_MS,SIGMA`.
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from eth_abi import decode, encode
+from eth_abi.grammar import TupleType, parse
+from eth_account import Account
+from eth_utils import collapse_if_tuple, function_abi_to_4byte_selector, keccak
+from loguru import logger as loguru_logger
+
+from core.chain import MAINNET, SCROLL
+from core.provider import EndpointLimiter, _ENDPOINT_LIMITERS
+
+ABI_FILES_PATTERN = "core/abi/*ABI.json"
+MOCK_UINT = 10**24
+MOCK_ADDRESS = "0x" + "11" * 20
+MOCK_BALANCE = 10**20
+MOCK_GAS_PRICE = 10**8
+MOCK_GAS_ESTIMATE = 100000
+AGGREGATE_SELECTOR = "0x252dba42"
+AGGREGATE3_SELECTOR = "0x82ad56cb"
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Returns a sampler of request latencies in seconds from a distribution spec.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",")] if args else []
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution `{spec}`")
+
+
+class MethodNotFoundError(Exception):
+    pass
+
+
+@dataclass
+class FaultProfile:
+    latency: Callable[[], float]
+    rate_limit_rate: float = 0.0
+    rpc_error_rate: float = 0.0
+    hang_rate: float = 0.0
+    drop_rate: float = 0.0
+    hang_seconds: float = 120.0
+    # seconds until a sent transaction has a receipt
+    inclusion_delay: float = 0.0
+
+
+def default_value(abi_type) -> Any:
+    if abi_type.is_array:
+        item = default_value(abi_type.item_type)
+        dimension = abi_type.arrlist[-1]
+        return [item] * (dimension[0] if dimension else 1)
+    if isinstance(abi_type, TupleType):
+        return tuple(default_value(component) for component in abi_type.components)
+    if abi_type.base == "uint":
+        return MOCK_UINT
+    if abi_type.base == "int":
+        return 0
+    if abi_type.base == "address":
+        return MOCK_ADDRESS
+    if abi_type.base == "bool":
+        return True
+    if abi_type.base == "string":
+        return "Mock"
+    if abi_type.base == "bytes":
+        return b"\0" * int(abi_type.sub) if abi_type.sub else b""
+    raise ValueError(f"Unsupported ABI type {abi_type}")
+
+
+def load_output_types() -> Dict[str, List[str]]:
+    """
+    Maps the selector of every function in the project ABIs to its output types.
+    """
+    output_types = {}
+    for file_path in sorted(glob.glob(ABI_FILES_PATTERN)):
+        with open(file=file_path, mode="r") as abi_file:
+            abi = json.load(abi_file)
+        for entry in abi:
+            if entry.get("type") != "function":
+                continue
+            selector = "0x" + function_abi_to_4byte_selector(entry).hex()
+            output_types.setdefault(selector, [collapse_if_tuple(output) for output in entry.get("outputs", [])])
+    return output_types
+
+
+class MockRPCServer:
+    def __init__(self, faults: FaultProfile, chain_id: int = SCROLL.chain_id) -> None:
+        self.faults = faults
+        self.chain_id = chain_id
+        self.output_types = load_output_types()
+        self.started_at = time.monotonic()
+        self.calls: Counter = Counter()
+        self.injected_faults: Counter = Counter()
+        self._nonces: Counter = Counter()
+        # tx hash -> (sender, nonce, time the transaction was received)
+        self._transactions: Dict[str, Tuple[str, int, float]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def block_number(self) -> int:
+        return 1000 + int(time.monotonic() - self.started_at)
+
+    def _call(self, data: str) -> bytes:
+        selector = data[:10]
+        if selector == AGGREGATE3_SELECTOR:
+            (calls,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[10:]))
+            return encode(
+                ["(bool,bytes)[]"], [[(True, self._call("0x" + call_data.hex())) for _, _, call_data in calls]]
+            )
+        if selector == AGGREGATE_SELECTOR:
+            (calls,) = decode(["(address,bytes)[]"], bytes.fromhex(data[10:]))
+            return encode(
+                ["uint256", "bytes[]"], [self.block_number, [self._call("0x" + call_data.hex()) for _, call_data in calls]]
+            )
+        output_types = self.output_types.get(selector, ["uint256"])
+        return encode(output_types, [default_value(parse(output_type)) for output_type in output_types])
+
+    def _send_raw_transaction(self, raw_transaction: str) -> str:
+        sender = Account.recover_transaction(raw_transaction)
+        tx_hash = "0x" + keccak(hexstr=raw_transaction).hex()
+        self._transactions[tx_hash] = (sender, self._nonces[sender], time.monotonic())
+        self._nonces[sender] += 1
+        return tx_hash
+
+    def _get_receipt(self, tx_hash: str) -> Optional[Dict]:
+        transaction = self._transactions.get(tx_hash)
+        if transaction is None:
+            return None
+        sender, nonce, received_at = transaction
+        if time.monotonic() - received_at < self.faults.inclusion_delay:
+            return None
+        return {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": "0x" + keccak(text=str(self.block_number)).hex(),
+            "blockNumber": hex(self.block_number),
+            "from": sender,
+            "to": MOCK_ADDRESS,
+            "cumulativeGasUsed": hex(MOCK_GAS_ESTIMATE // 2),
+            "gasUsed": hex(MOCK_GAS_ESTIMATE // 2),
+            "effectiveGasPrice": hex(MOCK_GAS_PRICE),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "status": "0x1",
+            "type": "0x0",
+        }
+
+    def _dispatch(self, method: str, params: List) -> Any:
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_blockNumber":
+            return hex(self.block_number)
+        if method == "eth_getBalance":
+            return hex(MOCK_BALANCE)
+        if method == "eth_getTransactionCount":
+            return hex(self._nonces[params[0]])
+        if method == "eth_getCode":
+            return "0x"
+        if method == "eth_gasPrice":
+            return hex(MOCK_GAS_PRICE)
+        if method == "eth_feeHistory":
+            block_count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+            return {
+                "oldestBlock": hex(self.block_number - block_count + 1),
+                "baseFeePerGas": [hex(MOCK_GAS_PRICE // 2)] * (block_count + 1),
+                "gasUsedRatio": [0.5] * block_count,
+                "reward": [[hex(MOCK_GAS_PRICE // 20)] * len(params[2])] * block_count,
+            }
+        if method == "eth_estimateGas":
+            return hex(MOCK_GAS_ESTIMATE)
+        if method == "eth_call":
+            return "0x" + self._call(params[0].get("data") or params[0].get("input") or "0x").hex()
+        if method == "eth_sendRawTransaction":
+            return self._send_raw_transaction(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self._get_receipt(params[0])
+        raise MethodNotFoundError(method)
+
+    def _answer(self, request: Dict) -> Dict:
+        self.calls[request["method"]] += 1
+        if random.random() < self.faults.rpc_error_rate:
+            self.injected_faults["rpc_error"] += 1
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": "mock internal error"}}
+        try:
+            return {"jsonrpc": "2.0", "id": request["id"], "result": self._dispatch(request["method"], request["params"])}
+        except MethodNotFoundError:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32601, "message": "method not found"}}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": 3, "message": f"execution reverted: {e}"}}
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        await asyncio.sleep(self.faults.latency())
+
+        fault = random.random()
+        if fault < self.faults.drop_rate:
+            self.injected_faults["dropped"] += 1
+            request.transport.close()
+            return web.Response()
+        fault -= self.faults.drop_rate
+        if fault < self.faults.hang_rate:
+            self.injected_faults["hang"] += 1
+            await asyncio.sleep(self.faults.hang_seconds)
+        fault -= self.faults.hang_rate
+        if fault < self.faults.rate_limit_rate:
+            self.injected_faults["429"] += 1
+            return web.Response(status=429, text="Too Many Requests")
+
+        if isinstance(payload, list):
+            return web.json_response([self._answer(item) for item in payload])
+        return web.json_response(self._answer(payload))
+
+    async def start(self, port: int) -> None:
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def print_counters(self) -> None:
+        print("\nRequests served by method:")
+        for method, count in self.calls.most_common():
+            print(f"  {method:<32}{count}")
+        print("Injected faults:")
+        for fault, count in self.injected_faults.most_common():
+            print(f"  {fault:<32}{count}")
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run_wallet_flow(client, results: List[Tuple[bool, float]]) -> None:
+    from core.token import ETH, USDC
+
+    started_at = time.perf_counter()
+    try:
+        balances = await client.get_token_balance_batch(token_list=[ETH, USDC])
+        succeeded = balances is not None and await client.transfer(amount=10**12, to_address=MOCK_ADDRESS)
+    except Exception as e:
+        loguru_logger.debug(f"Wallet flow failed: {e}")
+        succeeded = False
+    results.append((bool(succeeded), time.perf_counter() - started_at))
+
+
+async def run_scenario(server: MockRPCServer, wallets: int, concurrency: int) -> None:
+    from core import Client
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Tuple[bool, float]] = []
+
+    async def run_limited(client) -> None:
+        async with semaphore:
+            await run_wallet_flow(client=client, results=results)
+
+    clients = [
+        Client(private_key="0x" + keccak(text=f"mock-wallet-{index}").hex(), chain=SCROLL) for index in range(wallets)
+    ]
+    started_at = time.perf_counter()
+    await asyncio.gather(*[run_limited(client) for client in clients])
+    elapsed = time.perf_counter() - started_at
+
+    latencies = [latency for _, latency in results]
+    succeeded = sum(1 for success, _ in results if success)
+    print(f"\n{wallets} wallets, concurrency {concurrency}: {succeeded} flows succeeded in {elapsed:.1f} s")
+    print(f"  flows/s              {wallets / elapsed:.1f}")
+    print(f"  flow latency p50     {percentile(latencies, 50) * 1000:.0f} ms")
+    print(f"  flow latency p99     {percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"  flow latency mean    {statistics.mean(latencies) * 1000:.0f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Fault-injecting mock JSON-RPC server")
+    parser.add_argument("mode", choices=["serve", "scenario"])
+    parser.add_argument("--port", type=int, default=8547)
+    parser.add_argument("--latency", default="lognormal:50,0.5", help="request latency distribution")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rpc-error-rate", type=float, default=0.0, help="share of calls answered with an error")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests held for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=120.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of connections closed without an answer")
+    parser.add_argument("--inclusion-delay", type=float, default=0.0, help="seconds until a receipt is available")
+    parser.add_argument("--wallets", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--no-delays", action="store_true", help="skip the retry delays of the client")
+    parser.add_argument(
+        "--requests-per-second", type=float, help="client side limit, RPC_REQUESTS_PER_SECOND of config.py by default"
+    )
+    parser.add_argument("--max-concurrent-requests", type=int, help="RPC_MAX_CONCURRENT_REQUESTS by default")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    faults = FaultProfile(
+        latency=parse_latency(args.latency),
+        rate_limit_rate=args.rate_limit_rate,
+        rpc_error_rate=args.rpc_error_rate,
+        hang_rate=args.hang_rate,
+        drop_rate=args.drop_rate,
+        hang_seconds=args.hang_seconds,
+        inclusion_delay=args.inclusion_delay,
+    )
+    server = MockRPCServer(faults=faults)
+    await server.start(port=args.port)
+    print(f"Mock RPC listening on http://127.0.0.1:{args.port}")
+
+    try:
+        if args.mode == "serve":
+            await asyncio.Event().wait()
+            return
+
+        # the console handler of loguru is replaced, so a 10k wallet run doesn't print every transfer;
+        # the file handlers of the repo logger are kept
+        with contextlib.suppress(ValueError):
+            loguru_logger.remove(0)
+        loguru_logger.add(sys.stderr, level=args.log_level)
+        endpoint_uri = f"http://127.0.0.1:{args.port}"
+        SCROLL.rpcs = [endpoint_uri]
+        MAINNET.rpcs = SCROLL.rpcs
+        if args.requests_per_second or args.max_concurrent_requests:
+            # the limiter of the endpoint is created before the first client can create it with the config values
+            limiter_options = {
+                "requests_per_second": args.requests_per_second,
+                "max_concurrent_requests": args.max_concurrent_requests,
+            }
+            _ENDPOINT_LIMITERS[endpoint_uri] = EndpointLimiter(
+                endpoint_uri=endpoint_uri, **{key: value for key, value in limiter_options.items() if value}
+            )
+        if args.no_delays:
+            from utils import disable_sleeps
+
+            disable_sleeps()
+        await run_scenario(server=server, wallets=args.wallets, concurrency=args.concurrency)
+    finally:
+        server.print_counters()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
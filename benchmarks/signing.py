@@ -0,0 +1,88 @@
+"""
+Signatures per second of the signing on the event loop against the cached key and the signing threads,
+and the longest stall of the event loop while a batch is signed.
+
+Usage: python -m benchmarks.signing
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Tuple
+
+from eth_account import Account
+
+from core.constants import SIGNING_THREADS, SYNCSWAP_ROUTER_CONTRACT_ADDRESS
+from core.signing import get_signing_backend_name, sign_transaction, sign_transaction_sync
+
+SIGNATURES = 300
+PRIVATE_KEY = "0x" + "22" * 32
+TX_PARAMS = {
+    "chainId": 534352,
+    "from": Account.from_key(PRIVATE_KEY).address,
+    "to": SYNCSWAP_ROUTER_CONTRACT_ADDRESS,
+    "value": 10**15,
+    "data": "0x" + "ab" * 580,
+    "nonce": 42,
+    "gas": 400000,
+    "gasPrice": 105000000,
+}
+
+
+async def measure(sign_batch: Callable[[], Awaitable[None]]) -> Tuple[float, float]:
+    """
+    Returns the signatures per second of `sign_batch` and the longest gap between the ticks
+    of a coroutine that yields to the loop in the meantime, in ms.
+    """
+    longest_gap = 0.0
+    done = False
+
+    async def tick() -> None:
+        nonlocal longest_gap
+        last_tick = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            longest_gap = max(longest_gap, now - last_tick)
+            last_tick = now
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    started_at = time.perf_counter()
+    await sign_batch()
+    elapsed = time.perf_counter() - started_at
+    done = True
+    await ticker
+    return SIGNATURES / elapsed, longest_gap * 1000
+
+
+async def sign_on_loop_with_hex_key() -> None:
+    # what send_transaction used to do, concurrent sends run one after the other on the loop
+    for _ in range(SIGNATURES):
+        Account.sign_transaction(TX_PARAMS, PRIVATE_KEY)
+
+
+async def sign_on_loop_with_cached_key() -> None:
+    for _ in range(SIGNATURES):
+        sign_transaction_sync(tx_params=TX_PARAMS, private_key=PRIVATE_KEY)
+
+
+async def sign_in_threads() -> None:
+    await asyncio.gather(*[sign_transaction(tx_params=TX_PARAMS, private_key=PRIVATE_KEY) for _ in range(SIGNATURES)])
+
+
+async def main() -> None:
+    print(f"secp256k1 backend: {get_signing_backend_name()}, {SIGNING_THREADS} signing threads")
+    # warms up the key cache and the thread pool
+    await sign_transaction(tx_params=TX_PARAMS, private_key=PRIVATE_KEY)
+
+    print(f"{'':<24}{'signatures/s':>14}{'longest loop stall':>22}")
+    for name, sign_batch in [
+        ("on loop, hex key", sign_on_loop_with_hex_key),
+        ("on loop, cached key", sign_on_loop_with_cached_key),
+        ("signing threads", sign_in_threads),
+    ]:
+        rate, stall = await measure(sign_batch=sign_batch)
+        print(f"{name:<24}{rate:>14.0f}{stall:>19.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
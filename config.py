@@ -2,15 +2,45 @@
 НАСТРОЙКА СЕТЕЙ
 """
 
-SCROLL_RPC_ENDPOINT = "https://rpc.ankr.com/scroll"
+# Списки RPC для каждой сети. Чтения идут на самый быстрый живой RPC,
+# при ошибках запрос автоматически переотправляется на следующий
+SCROLL_RPC_ENDPOINTS = ["https://rpc.ankr.com/scroll", "https://rpc.scroll.io"]
 
-MAINNET_RPC_ENDPOINT = "https://rpc.ankr.com/eth"
+MAINNET_RPC_ENDPOINTS = ["https://rpc.ankr.com/eth", "https://eth.llamarpc.com"]
 
-ARBITRUM_RPC_ENDPOINT = "https://rpc.ankr.com/arbitrum"
+ARBITRUM_RPC_ENDPOINTS = ["https://rpc.ankr.com/arbitrum", "https://arb1.arbitrum.io/rpc"]
 
-ZKSYNC_RPC_ENDPOINT = "https://mainnet.era.zksync.io"
+ZKSYNC_RPC_ENDPOINTS = ["https://mainnet.era.zksync.io"]
 
-LINEA_RPC_ENDPOINT = "https://linea.blockpi.network/v1/rpc/public"
+LINEA_RPC_ENDPOINTS = ["https://linea.blockpi.network/v1/rpc/public", "https://rpc.linea.build"]
+
+# Промежуток времени (в секундах) между проверками доступности и задержки RPC
+RPC_HEALTH_CHECK_INTERVAL = 30
+
+# Отправлять ли подписанную транзакцию сразу во все живые RPC сети (True/False)
+BROADCAST_TX_TO_ALL_RPCS = False
+
+# Стартовое (и максимальное) количество запросов в секунду к одному RPC.
+# При ответах 429/5xx лимит автоматически снижается и затем плавно восстанавливается
+RPC_REQUESTS_PER_SECOND = 10
+
+# Максимальное количество одновременных запросов к одному RPC
+RPC_MAX_CONCURRENT_REQUESTS = 20
+
+# Запись/воспроизведение всех RPC и HTTP запросов (цены, Nitro, namefake).
+# None — выключено, "record" — записывать ответы в файл, "replay" — отвечать из файла без обращения к сети
+CASSETTE_MODE = None
+
+# Файл, в который записываются и из которого воспроизводятся ответы
+CASSETTE_FILE_PATH = "data/cassette.jsonl.gz"
+
+# Профилировать ли запущенный модуль (True/False), то же самое делает `python main.py --profile`.
+# Стеки вызовов (для flamegraph/speedscope) и топ аллокаций памяти сохраняются в data/profiles
+PROFILE_MODULES = False
+
+# Пробный запуск (True/False), то же самое делает `python main.py --dry-run`. Модули проходят все шаги
+# (котировки, расчёт сумм, оценка газа), но транзакции и выводы с OKX не отправляются, база данных не меняется
+DRY_RUN = False
 
 """
 НАСТРОЙКИ ПРОГРЕВА
@@ -22,6 +52,15 @@ LOG_TO_TELEGRAM = True
 TELEGRAM_IDS = []
 TELEGRAM_BOT_TOKEN = ""
 
+# Писать ли файл логов в формате JSON lines с полями module, dapp, wallet, chain, tx_hash (True/False)
+LOG_FILE_JSON = False
+
+# Размер файла логов, после которого он архивируется и начинается новый
+LOG_FILE_ROTATION = "50 MB"
+
+# Сколько архивов логов хранить
+LOG_FILE_RETENTION = 10
+
 # Перемешивать ли кошельки при создании базы данных (True/False)
 SHUFFLE_DATABASE = True
 
@@ -56,6 +95,10 @@ SPACEFI_SWAPS_COUNT = [0, 0]
 SYNCSWAP_SWAPS_COUNT = [0, 0]
 ZEBRA_SWAPS_COUNT = [0, 0]
 
+# Выбирать ли DEX с лучшей котировкой при свапах в модулях 5 и 6 (True/False).
+# Котировки всех DEX запрашиваются одним multicall-запросом
+USE_BEST_SWAP_ROUTE = True
+
 # Настройка диапазона процента баланса от токена для свапа
 SWAP_PERCENTAGE_RANGE = [55, 65]
 
@@ -0,0 +1,129 @@
+import atexit
+import gzip
+import json
+import random
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from config import CASSETTE_FILE_PATH, CASSETTE_MODE
+from logger import logger
+
+from .exceptions import CassetteMissError
+
+RECORD_MODE = "record"
+REPLAY_MODE = "replay"
+# JSON-RPC methods whose requests depend on the signed transaction, e.g. its deadline or hash, so a replay
+# can't repeat them as is. Any other request has to match a recorded one exactly.
+TX_DEPENDENT_RPC_METHODS = ("eth_sendRawTransaction", "eth_getTransactionReceipt", "eth_estimateGas")
+
+
+class Cassette:
+    """
+    Record/replay of the JSON-RPC and HTTP exchanges of a run.
+
+    In record mode every response is appended to a gzipped JSON lines file together with its request.
+    In replay mode the responses are served from that file without touching the network. A request gets
+    the recorded responses of the same request in their original order, the last one is repeated once
+    they run out. JSON-RPC requests are recorded per RPC endpoint, so the chains don't mix. Only the requests
+    of `TX_DEPENDENT_RPC_METHODS` that were never recorded as is, e.g. for a transaction signed with a new
+    deadline, get the next unused response of the same method and endpoint. Any other miss raises
+    `CassetteMissError`, a replay with other wallets, amounts or prices would get wrong answers otherwise.
+
+    The seed of `random` is recorded too, so a replay draws the same wallets, dapps and amounts.
+    """
+
+    def __init__(self, mode: Optional[str] = CASSETTE_MODE, file_path: str = CASSETTE_FILE_PATH) -> None:
+        self.mode = mode
+        self.file_path = file_path
+        self._file: Optional[TextIO] = None
+        # entries are [response, used] pairs, shared by both indexes
+        self._by_request: Optional[Dict[Tuple[str, str], List[List]]] = None
+        self._by_name: Dict[str, List[List]] = defaultdict(list)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD_MODE
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY_MODE
+
+    def _record(self, name: str, request: str, response: Any) -> None:
+        if self._file is None:
+            self._file = gzip.open(self.file_path, mode="wt", encoding="utf-8")
+            atexit.register(self._file.close)
+            logger.info(f"[Cassette] Recording RPC and HTTP responses to {self.file_path}")
+        self._file.write(json.dumps({"name": name, "request": request, "response": response}) + "\n")
+
+    def _load(self) -> None:
+        self._by_request = defaultdict(list)
+        try:
+            with gzip.open(self.file_path, mode="rt", encoding="utf-8") as cassette_file:
+                for line in cassette_file:
+                    exchange = json.loads(line)
+                    entry = [exchange["response"], False]
+                    self._by_request[(exchange["name"], exchange["request"])].append(entry)
+                    self._by_name[exchange["name"]].append(entry)
+        except EOFError:
+            # the recording run was killed before the file was closed, everything written so far is usable
+            pass
+        logger.info(f"[Cassette] Replaying {sum(map(len, self._by_name.values()))} responses from {self.file_path}")
+
+    def _replay(self, name: str, request: str, match_by_name: bool) -> Any:
+        if self._by_request is None:
+            self._load()
+        entries = self._by_request.get((name, request))
+        if not entries and match_by_name:
+            entries = self._by_name.get(name)
+        if not entries:
+            raise CassetteMissError(request=f"{name} {request}")
+        for entry in entries:
+            if not entry[1]:
+                entry[1] = True
+                return entry[0]
+        return entries[-1][0]
+
+    def seed_random(self) -> None:
+        """
+        Seeds `random` with a recorded seed, or records a new one. Called once before the run starts.
+        """
+        if self.recording:
+            seed = random.SystemRandom().getrandbits(64)
+            self._record(name="random", request="seed", response=seed)
+        elif self.replaying:
+            seed = self._replay(name="random", request="seed", match_by_name=False)
+        else:
+            return
+        random.seed(seed)
+
+    @staticmethod
+    def _get_rpc_request(endpoint: str, method: str, request_data: bytes) -> Tuple[Any, str, str]:
+        request = json.loads(request_data)
+        params = json.dumps(request["params"], sort_keys=True, separators=(",", ":"))
+        return request["id"], f"{method} {endpoint}", params
+
+    def record_rpc(self, endpoint: str, method: str, request_data: bytes, response: Dict) -> None:
+        _, name, params = self._get_rpc_request(endpoint=endpoint, method=method, request_data=request_data)
+        self._record(
+            name=name, request=params, response={key: response[key] for key in ("result", "error") if key in response}
+        )
+
+    def replay_rpc(self, endpoint: str, method: str, request_data: bytes) -> Dict:
+        request_id, name, params = self._get_rpc_request(endpoint=endpoint, method=method, request_data=request_data)
+        response = self._replay(name=name, request=params, match_by_name=method in TX_DEPENDENT_RPC_METHODS)
+        return {"jsonrpc": "2.0", "id": request_id, **response}
+
+    @staticmethod
+    def _get_http_request(http_method: str, url: str, data: Optional[Dict]) -> Tuple[str, str]:
+        return f"{http_method} {url.split('?')[0]}", json.dumps({"url": url, "data": data}, sort_keys=True)
+
+    def record_http(self, http_method: str, url: str, data: Optional[Dict], response: Any) -> None:
+        name, request = self._get_http_request(http_method=http_method, url=url, data=data)
+        self._record(name=name, request=request, response=response)
+
+    def replay_http(self, http_method: str, url: str, data: Optional[Dict]) -> Any:
+        name, request = self._get_http_request(http_method=http_method, url=url, data=data)
+        return self._replay(name=name, request=request, match_by_name=False)
+
+
+cassette = Cassette()
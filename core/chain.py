@@ -1,11 +1,11 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
 from config import (
-    ARBITRUM_RPC_ENDPOINT,
-    MAINNET_RPC_ENDPOINT,
-    SCROLL_RPC_ENDPOINT,
-    ZKSYNC_RPC_ENDPOINT, LINEA_RPC_ENDPOINT,
+    ARBITRUM_RPC_ENDPOINTS,
+    MAINNET_RPC_ENDPOINTS,
+    SCROLL_RPC_ENDPOINTS,
+    ZKSYNC_RPC_ENDPOINTS, LINEA_RPC_ENDPOINTS,
 )
 
 
@@ -15,10 +15,12 @@ class Chain:
     chain_id: int
     coin_symbol: str
     explorer: str
-    rpc: str
+    rpcs: List[str]
     orbiter_chain_id: int
     okx_chain_name: Optional[str] = None
     okx_withdrawal_fee: Optional[str] = None
+    # whether transactions are priced with maxFeePerGas/maxPriorityFeePerGas instead of a legacy gasPrice
+    eip1559: bool = True
 
 
 SCROLL = Chain(
@@ -26,8 +28,9 @@ SCROLL = Chain(
     chain_id=534352,
     coin_symbol="ETH",
     explorer="https://scrollscan.com/",
-    rpc=SCROLL_RPC_ENDPOINT,
+    rpcs=SCROLL_RPC_ENDPOINTS,
     orbiter_chain_id=19,
+    eip1559=False,
 )
 
 ZKSYNC = Chain(
@@ -35,7 +38,7 @@ ZKSYNC = Chain(
     chain_id=324,
     coin_symbol="ETH",
     explorer="https://explorer.zksync.io/",
-    rpc=ZKSYNC_RPC_ENDPOINT,
+    rpcs=ZKSYNC_RPC_ENDPOINTS,
     orbiter_chain_id=14,
     okx_chain_name="zkSync Era",
     okx_withdrawal_fee="0.000041",
@@ -46,7 +49,7 @@ ARBITRUM = Chain(
     chain_id=42161,
     coin_symbol="ETH",
     explorer="https://arbiscan.io/",
-    rpc=ARBITRUM_RPC_ENDPOINT,
+    rpcs=ARBITRUM_RPC_ENDPOINTS,
     orbiter_chain_id=2,
     okx_chain_name="Arbitrum One",
     okx_withdrawal_fee="0.0001",
@@ -57,7 +60,7 @@ LINEA = Chain(
     chain_id=59144,
     coin_symbol="ETH",
     explorer="https://lineascan.build/",
-    rpc=LINEA_RPC_ENDPOINT,
+    rpcs=LINEA_RPC_ENDPOINTS,
     orbiter_chain_id=23,
     okx_chain_name="Linea",
     okx_withdrawal_fee="0.0002"
@@ -68,7 +71,7 @@ MAINNET = Chain(
     chain_id=1,
     coin_symbol="ETH",
     explorer="https://etherscan.io/",
-    rpc=MAINNET_RPC_ENDPOINT,
+    rpcs=MAINNET_RPC_ENDPOINTS,
     orbiter_chain_id=1,
     okx_chain_name="ERC20",
     okx_withdrawal_fee="0.0036",
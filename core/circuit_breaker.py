@@ -0,0 +1,69 @@
+import time
+from typing import Dict, Optional
+
+from aiohttp import ClientHttpProxyError, ClientProxyConnectionError
+from aiohttp_proxy.errors import ProxyError
+
+from logger import logger
+
+# consecutive failures that open a breaker
+FAILURE_THRESHOLD = 5
+# seconds an open breaker rejects requests before a single trial request is let through
+RESET_TIMEOUT = 30
+
+
+class CircuitBreaker:
+    """
+    Closed while the dependency works. Opens after `failure_threshold` consecutive failures and then
+    rejects requests without trying them for `reset_timeout` seconds. After that a single trial request
+    is let through every `reset_timeout` seconds (half-open), the first success closes the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow_request(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        # the next trial is only allowed after another timeout, unless this one succeeds
+        self._opened_at = time.monotonic()
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info(f"[CircuitBreaker] {self.name} is working again")
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._opened_at is None and self.failures >= self.failure_threshold:
+            logger.warning(
+                f"[CircuitBreaker] {self.name} failed {self.failures} times in a row, "
+                f"requests to it are paused for {self.reset_timeout} seconds"
+            )
+            self._opened_at = time.monotonic()
+
+
+_CIRCUIT_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    if name not in _CIRCUIT_BREAKERS:
+        _CIRCUIT_BREAKERS[name] = CircuitBreaker(name=name)
+    return _CIRCUIT_BREAKERS[name]
+
+
+def get_proxy_circuit_breaker(proxy: str) -> CircuitBreaker:
+    # the credentials are left out of the name, it's used in the logs
+    return get_circuit_breaker(name=f"Proxy {proxy.split('@')[-1]}")
+
+
+def is_proxy_error(error: Exception) -> bool:
+    return isinstance(error, (ClientProxyConnectionError, ClientHttpProxyError, ProxyError))
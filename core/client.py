@@ -3,8 +3,11 @@ import binascii
 import random
 import re
 import sys
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import aiohttp
 from aiohttp_proxy import ProxyConnector
@@ -17,19 +20,34 @@ from web3.contract.async_contract import AsyncContract
 from config import APPROVE_VALUE_RANGE, POST_APPROVE_DELAY_RANGE, TX_DELAY_RANGE
 from core.token import ETH, USDC, USDT, WETH, Token
 from logger import logger
-from utils import sleep
+from utils import sleep, sleep_between_actions
 
 from . import Chain
 from .constants import (
     GAS_LIMIT_MULTIPLIER,
-    GAS_PRICE_MULTIPLIER,
     MAX_ALLOWED_TOKEN_PRICE_DIFFERENCE,
     PROXY_PATTERN,
     TOKEN_PRICE_FETCH_URL,
+    TOKEN_PRICE_PREFETCH_TTL,
     VERIFY_TX_TIMEOUT, TRANSFER_TX_SIMULATION_VALUE,
 )
+from .cassette import cassette
+from .circuit_breaker import get_circuit_breaker, get_proxy_circuit_breaker, is_proxy_error
+from .contracts import encode_function_call, get_contract
 from .decorators import retry_on_fail
-from .exceptions import NoRPCEndpointSpecifiedError
+from .dry_run import is_dry_run, is_planned_transaction, record_planned_transaction
+from .exceptions import CircuitOpenError, NoRPCEndpointSpecifiedError
+from .fee_estimator import get_fee_estimator, get_max_fee_per_gas
+from .gas_model import INTRINSIC_TRANSFER_GAS, GasModel, gas_model
+from .provider import PooledHTTPProvider
+from .signing import get_signing_key, sign_transaction
+from .swap_latency import pause_swap_latency, record_swap_sent
+from .tracing import span, traced
+
+# (chain id, address) -> whether the account has code, looked up once for plain transfers
+_ACCOUNT_HAS_CODE: Dict[Tuple[int, str], bool] = {}
+# clients on the same chain and proxy share a web3 instance, and with it the cached contracts
+_W3_INSTANCES: Dict[Tuple[str, Optional[str]], AsyncWeb3] = {}
 
 
 class Client:
@@ -38,10 +56,10 @@ class Client:
         self.chain: Optional[Chain] = chain
         self.proxy: str = self._set_proxy(proxy=proxy)
         self.w3: Optional[AsyncWeb3] = self._init_w3(chain=chain)
-        self.address: ChecksumAddress = AsyncWeb3.to_checksum_address(
-            value=Account.from_key(private_key=private_key).address
-        )
+        self.address: ChecksumAddress = get_signing_key(private_key=private_key).public_key.to_checksum_address()
         self.tokens = [ETH, USDC, USDT]
+        # token api ids -> (time the fetch started, fetch task) of prices requested ahead of use
+        self._token_price_prefetches: Dict[Tuple[str, ...], Tuple[float, asyncio.Task]] = {}
 
     def __str__(self):
         return f"{self.address[:6]}...{self.address[-4:]}"
@@ -81,14 +99,41 @@ class Client:
         if chain is None:
             return None
 
+        key = (chain.name, self.proxy)
+        if key in _W3_INSTANCES:
+            return _W3_INSTANCES[key]
+
         try:
-            if not chain.rpc:
+            if not chain.rpcs:
                 raise NoRPCEndpointSpecifiedError(chain=chain)
-            return AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(endpoint_uri=chain.rpc, request_kwargs=request_kwargs))
+            _W3_INSTANCES[key] = AsyncWeb3(PooledHTTPProvider(endpoint_uris=chain.rpcs, request_kwargs=request_kwargs))
+            return _W3_INSTANCES[key]
         except Exception as e:
             logger.error(e)
             sys.exit(1)
 
+    @contextmanager
+    def _use_circuit_breakers(self, url: str, use_proxy: bool):
+        """
+        Rejects the request right away while the API host or the proxy is failing, records the outcome otherwise.
+        """
+        api_circuit_breaker = get_circuit_breaker(name=f"API {urlparse(url).netloc}")
+        proxy_circuit_breaker = get_proxy_circuit_breaker(proxy=self.proxy) if use_proxy and self.proxy else None
+        for circuit_breaker in (api_circuit_breaker, proxy_circuit_breaker):
+            if circuit_breaker is not None and not circuit_breaker.allow_request():
+                raise CircuitOpenError(name=circuit_breaker.name)
+        try:
+            yield
+        except Exception as e:
+            if proxy_circuit_breaker is not None and is_proxy_error(e):
+                proxy_circuit_breaker.record_failure()
+            elif not isinstance(e, aiohttp.ClientResponseError) or e.status >= 500 or e.status == 429:
+                api_circuit_breaker.record_failure()
+            raise
+        api_circuit_breaker.record_success()
+        if proxy_circuit_breaker is not None:
+            proxy_circuit_breaker.record_success()
+
     @retry_on_fail()
     async def send_get_request(self, url: str, use_proxy: bool = True) -> Optional[Any]:
         if use_proxy:
@@ -96,21 +141,30 @@ class Client:
         else:
             connector = None
 
+        # errors are raised to `retry_on_fail`, which decides whether the request is worth repeating
         try:
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.get(url=url, timeout=100) as response:
-                    response.raise_for_status()
-                    json_data = await response.json(content_type=None)
-                    return json_data
+            if cassette.replaying:
+                return cassette.replay_http(http_method="GET", url=url, data=None)
+            with self._use_circuit_breakers(url=url, use_proxy=use_proxy):
+                async with aiohttp.ClientSession(connector=connector) as session:
+                    async with session.get(url=url, timeout=100) as response:
+                        response.raise_for_status()
+                        json_data = await response.json(content_type=None)
+            if cassette.recording:
+                cassette.record_http(http_method="GET", url=url, data=None, response=json_data)
+            return json_data
         except aiohttp.ClientResponseError as e:
             logger.error(f"Recieved non-200 response: {e}")
+            raise
         except aiohttp.ClientConnectionError as e:
             logger.error(f"Connection Error: {e}")
+            raise
         except aiohttp.InvalidURL as e:
             logger.error(f"Wrong URL format: {e}")
+            raise
         except Exception as e:
             logger.error(f"An unexpected error occurred: {e}")
-        return None
+            raise
 
     async def send_post_request(self, url: str, data: Dict, use_proxy: bool = True) -> Optional[Any]:
         if use_proxy:
@@ -119,10 +173,16 @@ class Client:
             connector = None
 
         try:
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(url=url, json=data, timeout=100) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            if cassette.replaying:
+                return cassette.replay_http(http_method="POST", url=url, data=data)
+            with self._use_circuit_breakers(url=url, use_proxy=use_proxy):
+                async with aiohttp.ClientSession(connector=connector) as session:
+                    async with session.post(url=url, json=data, timeout=100) as response:
+                        response.raise_for_status()
+                        json_data = await response.json()
+            if cassette.recording:
+                cassette.record_http(http_method="POST", url=url, data=data, response=json_data)
+            return json_data
         except aiohttp.ClientResponseError as e:
             logger.error(f"Recieved non-200 response: {e}")
         except aiohttp.ClientConnectionError as e:
@@ -133,7 +193,34 @@ class Client:
             logger.error(f"An unexpected error occurred: {e}")
         return None
 
+    def prefetch_token_price(self, token_list: Iterable[Token]) -> None:
+        """
+        Starts fetching token prices in the background, the next `fetch_token_price`
+        call for the same tokens picks up the result instead of making a new request.
+        """
+        token_list = tuple(token_list)
+        key = tuple(token.api_id for token in token_list)
+        prefetch = self._token_price_prefetches.get(key)
+        if prefetch is not None and time.monotonic() - prefetch[0] <= TOKEN_PRICE_PREFETCH_TTL:
+            return
+        if prefetch is not None:
+            prefetch[1].cancel()
+        self._token_price_prefetches[key] = (
+            time.monotonic(),
+            asyncio.create_task(self._fetch_token_price(token_list=token_list)),
+        )
+
     async def fetch_token_price(self, token_list: Iterable[Token]) -> Optional[List[int]]:
+        token_list = tuple(token_list)
+        prefetch = self._token_price_prefetches.pop(tuple(token.api_id for token in token_list), None)
+        if prefetch is not None:
+            started_at, task = prefetch
+            if time.monotonic() - started_at <= TOKEN_PRICE_PREFETCH_TTL:
+                return await task
+            task.cancel()
+        return await self._fetch_token_price(token_list=token_list)
+
+    async def _fetch_token_price(self, token_list: Iterable[Token]) -> Optional[List[int]]:
         token_ids = [token.api_id for token in token_list]
         token_ids_string = ",".join(token_ids)
         url = TOKEN_PRICE_FETCH_URL.format(token_ids_string)
@@ -149,14 +236,47 @@ class Client:
     def get_deadline(self, seconds: int = 1800) -> int:
         return int(datetime.now(timezone.utc).timestamp()) + seconds
 
-    async def get_gas_estimate(self, tx_params: Dict[str, Union[str, int, None]]) -> Optional[int]:
+    async def get_gas_estimate(
+        self, tx_params: Dict[str, Union[str, int, None]], use_gas_model: bool = False
+    ) -> Optional[int]:
+        """
+        With `use_gas_model`, returns the gas limit learned from receipts of the same call shape
+        when there is one, instead of estimating it.
+        """
+        if use_gas_model:
+            gas_limit = await self._get_learned_gas_limit(tx_params=tx_params)
+            if gas_limit is not None:
+                return gas_limit
         try:
-            return await self.w3.eth.estimate_gas(tx_params)
+            with span("tx.estimate", chain=self.chain.name):
+                return await self.w3.eth.estimate_gas(tx_params)
         except Exception as e:
             logger.error(f"Transaction estimate failed: {e}")
             return None
 
-    async def get_tx_params(
+    async def _has_code(self, address: str) -> Optional[bool]:
+        key = (self.chain.chain_id, address.lower())
+        if key not in _ACCOUNT_HAS_CODE:
+            try:
+                _ACCOUNT_HAS_CODE[key] = len(await self.w3.eth.get_code(self.w3.to_checksum_address(address))) > 0
+            except Exception as e:
+                logger.warning(f"Couldn't check whether {address} is a contract: {e}")
+                return None
+        return _ACCOUNT_HAS_CODE[key]
+
+    async def _get_learned_gas_limit(self, tx_params: Dict[str, Union[str, int, None]]) -> Optional[int]:
+        """
+        Gas limit learned from receipts of the same call shape. A plain transfer to an account without code
+        always uses INTRINSIC_TRANSFER_GAS, a transfer to a contract is learned per recipient like a call.
+        """
+        key = GasModel.get_key(tx_params=tx_params)
+        if key is None:
+            return None
+        if not tx_params.get("data") and await self._has_code(address=tx_params["to"]) is False:
+            return INTRINSIC_TRANSFER_GAS
+        return gas_model.get_gas_limit(key=key)
+
+    def _build_tx_params(
         self,
         to: str,
         data: Optional[str] = None,
@@ -167,8 +287,7 @@ class Client:
             from_ = self.address
 
         tx_params: Dict[str, Union[str, int]] = {
-            "chainId": await self.w3.eth.chain_id,
-            "nonce": await self.w3.eth.get_transaction_count(self.address),
+            "chainId": self.chain.chain_id,
             "from": self.w3.to_checksum_address(from_),
             "to": self.w3.to_checksum_address(to),
         }
@@ -178,9 +297,25 @@ class Client:
         if value is not None:
             tx_params["value"] = value
 
-        gas_price_multiplier = GAS_PRICE_MULTIPLIER if self.chain.chain_id == 534352 else 1
-        tx_params["gasPrice"] = int(await self.w3.eth.gas_price * gas_price_multiplier)
+        return tx_params
+
+    async def _get_nonce_and_fee_params(self) -> Tuple[int, Dict[str, int]]:
+        nonce, fee_params = await asyncio.gather(
+            self.w3.eth.get_transaction_count(self.address),
+            get_fee_estimator(chain=self.chain).get_fee_params(client=self),
+        )
+        return nonce, fee_params
 
+    async def get_tx_params(
+        self,
+        to: str,
+        data: Optional[str] = None,
+        from_: Optional[str] = None,
+        value: Optional[int] = None,
+    ) -> Dict[str, Union[str, int]]:
+        tx_params = self._build_tx_params(to=to, data=data, from_=from_, value=value)
+        tx_params["nonce"], fee_params = await self._get_nonce_and_fee_params()
+        tx_params.update(fee_params)
         return tx_params
 
     async def send_transaction(
@@ -190,6 +325,7 @@ class Client:
         from_: str = None,
         value: int = None,
         gas_limit_multiplier: float = GAS_LIMIT_MULTIPLIER,
+        use_gas_model: bool = False,
     ) -> Optional[HexBytes]:
         """
         Sends a transaction on the current client's blockchain.
@@ -200,6 +336,9 @@ class Client:
         - from_ (str, optional): The sender's Ethereum address. If not provided,
           the address associated with the initialized wallet will be used.
         - value (int, optional): The amount of Ether (in wei) to be sent with the transaction.
+        - use_gas_model (bool, optional): Take the gas limit from the receipts of earlier identically
+          shaped calls when there are enough of them, and learn from this transaction's receipt.
+          Only for calls whose gas doesn't depend on the amounts, e.g. approvals and transfers.
 
         Returns:
         - Optional[HexBytes]: The transaction hash if successful, otherwise None.
@@ -207,19 +346,43 @@ class Client:
         Note:
         This method signs and sends an Ethereum transaction using the specified parameters.
         """
-        tx_params = await self.get_tx_params(to=to, data=data, from_=from_, value=value)
-
-        gas = await self.get_gas_estimate(tx_params=tx_params)
-        if gas is None:
-            return None
-        tx_params["gas"] = int(gas * gas_limit_multiplier)
+        tx_params = self._build_tx_params(to=to, data=data, from_=from_, value=value)
+        gas_model_key = GasModel.get_key(tx_params=tx_params) if use_gas_model else None
+        gas_limit = await self._get_learned_gas_limit(tx_params=tx_params) if use_gas_model else None
 
-        signed_tx = self.w3.eth.account.sign_transaction(tx_params, self.private_key)
+        with span("tx.params", chain=self.chain.name):
+            if gas_limit is not None:
+                nonce, fee_params = await self._get_nonce_and_fee_params()
+            else:
+                # the gas estimate doesn't depend on the nonce and the fees, so all of them are fetched at once
+                (nonce, fee_params), gas = await asyncio.gather(
+                    self._get_nonce_and_fee_params(), self.get_gas_estimate(tx_params=dict(tx_params))
+                )
+                if gas is None and not is_dry_run():
+                    return None
+        tx_params["nonce"] = nonce
+        tx_params.update(fee_params)
+        if gas_limit is None and gas is None:
+            record_swap_sent()
+            return record_planned_transaction(chain=self.chain, tx_params=tx_params)
+        tx_params["gas"] = gas_limit if gas_limit is not None else int(gas * gas_limit_multiplier)
+
+        with span("tx.sign", chain=self.chain.name):
+            signed_tx = await sign_transaction(tx_params=tx_params, private_key=self.private_key)
+
+        if is_dry_run():
+            record_swap_sent()
+            return record_planned_transaction(chain=self.chain, tx_params=tx_params, tx_hash=signed_tx.hash)
 
         try:
-            return await self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            with span("tx.broadcast", chain=self.chain.name):
+                tx_hash = await self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            record_swap_sent()
+            gas_model.track(tx_hash=tx_hash, key=gas_model_key, gas_limit_from_model=gas_limit is not None)
+            return tx_hash
         except Exception as e:
-            logger.error(f"Error while sending transaction: {e}")
+            with logger.contextualize(chain=self.chain.name):
+                logger.error(f"Error while sending transaction: {e}")
             return None
 
     async def verify_tx(self, tx_hash: Optional[HexBytes], timeout: int = VERIFY_TX_TIMEOUT) -> bool:
@@ -240,19 +403,24 @@ class Client:
         """
         if tx_hash is None:
             return False
+        if is_planned_transaction(tx_hash=tx_hash):
+            return True
 
-        try:
-            response = await self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
-
-            if "status" in response and response["status"] == 1:
-                logger.success(f"Transaction was successful: {self.chain.explorer}tx/{self.w3.to_hex(tx_hash)}")
-                return True
-            else:
-                logger.error(f"Transaction failed: {self.chain.explorer}tx/{self.w3.to_hex(tx_hash)}")
+        with logger.contextualize(chain=self.chain.name, tx_hash=self.w3.to_hex(tx_hash)):
+            try:
+                with span("tx.inclusion", chain=self.chain.name):
+                    response = await self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+                gas_model.record_receipt(tx_hash=tx_hash, receipt=response)
+
+                if "status" in response and response["status"] == 1:
+                    logger.success(f"Transaction was successful: {self.chain.explorer}tx/{self.w3.to_hex(tx_hash)}")
+                    return True
+                else:
+                    logger.error(f"Transaction failed: {self.chain.explorer}tx/{self.w3.to_hex(tx_hash)}")
+                    return False
+            except Exception as e:
+                logger.error(f"Unexpected error in verify_tx function: {e}")
                 return False
-        except Exception as e:
-            logger.error(f"Unexpected error in verify_tx function: {e}")
-            return False
 
     async def get_allowance(
         self,
@@ -283,7 +451,7 @@ class Client:
         if token.is_native:
             return True
 
-        token_contract: AsyncContract = self.w3.eth.contract(address=token.contract_address, abi=token.abi)
+        token_contract: AsyncContract = get_contract(w3=self.w3, address=token.contract_address, abi=token.abi)
         allowance = await self.get_allowance(token_contract=token_contract, spender=spender)
         if ignore_allowance is False:
             if allowance >= value:
@@ -293,12 +461,13 @@ class Client:
                 return True
 
         logger.info(f"Approving {value / pow(10, token.decimals)} {token.symbol} for spender: {spender}")
-        data = token_contract.encodeABI("approve", args=(spender, value))
-        tx_hash = await self.send_transaction(to=token_contract.address, data=data)
+        data = encode_function_call(abi=token_contract.abi, fn_name="approve", args=(spender, value))
+        with pause_swap_latency():
+            tx_hash = await self.send_transaction(to=token_contract.address, data=data, use_gas_model=True)
 
-        if await self.verify_tx(tx_hash=tx_hash):
-            await sleep(delay_range=POST_APPROVE_DELAY_RANGE, send_message=False)
-            return True
+            if await self.verify_tx(tx_hash=tx_hash):
+                await sleep_between_actions(delay_range=POST_APPROVE_DELAY_RANGE, send_message=False)
+                return True
         return False
 
     async def wrap_eth(self, amount: int) -> bool:
@@ -310,33 +479,35 @@ class Client:
             )
             return False
 
-        weth_contract: AsyncContract = self.w3.eth.contract(address=WETH.contract_address, abi=WETH.abi)
+        weth_contract: AsyncContract = get_contract(w3=self.w3, address=WETH.contract_address, abi=WETH.abi)
 
-        data = weth_contract.encodeABI("deposit", args=())
+        data = encode_function_call(abi=weth_contract.abi, fn_name="deposit", args=())
 
         logger.info(f"Wrapping {ETH.from_wei(amount)} ETH")
 
         try:
-            tx_hash = await self.send_transaction(to=weth_contract.address, data=data, value=amount)
+            tx_hash = await self.send_transaction(
+                to=weth_contract.address, data=data, value=amount, use_gas_model=True
+            )
             if await self.verify_tx(tx_hash=tx_hash):
-                await sleep(delay_range=TX_DELAY_RANGE, send_message=False)
+                await sleep_between_actions(delay_range=TX_DELAY_RANGE, send_message=False)
                 return True
         except Exception as e:
             logger.error(f"Failed to wrap: {e}")
             return False
 
     async def unwrap_eth(self, amount: int, ignore_sleep: bool=False) -> bool:
-        weth_contract: AsyncContract = self.w3.eth.contract(address=WETH.contract_address, abi=WETH.abi)
+        weth_contract: AsyncContract = get_contract(w3=self.w3, address=WETH.contract_address, abi=WETH.abi)
 
-        data = weth_contract.encodeABI("withdraw", args=([amount]))
+        data = encode_function_call(abi=weth_contract.abi, fn_name="withdraw", args=([amount]))
 
         logger.info(f"Unwrapping {ETH.from_wei(amount)} WETH")
 
         try:
-            tx_hash = await self.send_transaction(to=weth_contract.address, data=data)
+            tx_hash = await self.send_transaction(to=weth_contract.address, data=data, use_gas_model=True)
             if await self.verify_tx(tx_hash=tx_hash):
                 if not ignore_sleep:
-                    await sleep(delay_range=TX_DELAY_RANGE, send_message=False)
+                    await sleep_between_actions(delay_range=TX_DELAY_RANGE, send_message=False)
                 return True
         except Exception as e:
             logger.error(f"Failed to unwrap: {e}")
@@ -355,7 +526,7 @@ class Client:
                 return False
 
             logger.info(f"Transferring {ETH.from_wei(amount)} ETH to {to_address}")
-            tx_hash = await self.send_transaction(to=to_address, value=amount)
+            tx_hash = await self.send_transaction(to=to_address, value=amount, use_gas_model=True)
             return await self.verify_tx(tx_hash=tx_hash)
         except Exception as ex:
             logger.error(f"Error while transferring: {ex}")
@@ -363,8 +534,11 @@ class Client:
     async def _calculate_amount_for_all_balance_transfer(self, balance: int, to_address: str) -> int:
         try:
             tx_params = await self.get_tx_params(to=to_address, value=TRANSFER_TX_SIMULATION_VALUE)
-            gas = await self.get_gas_estimate(tx_params=tx_params)
-            return balance - int((gas * tx_params['gasPrice']) * 1.55)
+            gas = await self.get_gas_estimate(tx_params=tx_params, use_gas_model=True)
+            if "maxFeePerGas" in tx_params:
+                # the max fee already covers the base fee doubling, the node checks the balance against it
+                return balance - gas * get_max_fee_per_gas(tx_params=tx_params)
+            return balance - int((gas * get_max_fee_per_gas(tx_params=tx_params)) * 1.55)
         except Exception as e:
             raise Exception(f"Failed to estimate amount for all balance transfer: {e}")
 
@@ -415,12 +589,12 @@ class Client:
             if token == ETH:
                 balance = await self.w3.eth.get_balance(account=self.address)
             else:
-                contract = self.w3.eth.contract(address=token.contract_address, abi=token.abi)
+                contract = get_contract(w3=self.w3, address=token.contract_address, abi=token.abi)
                 balance = await contract.functions.balanceOf(self.address).call()
             return balance if wei else token.from_wei(value=balance)
         except Exception as e:
             logger.error(f"Couldn't get balance of {token}: {e}")
-            return None
+            raise
 
     async def get_token_balance_batch(self, token_list: List[Token], wei: bool = True) -> Optional[List[int]]:
         try:
@@ -454,6 +628,7 @@ class Client:
             token_balance_mapping[token_with_largest_usd_balance],
         )
 
+    @traced("bridge.wait_for_deposit", chain=lambda client: client.chain.name)
     async def wait_for_deposit(
         self,
         initial_balance: int,
@@ -462,6 +637,8 @@ class Client:
     ) -> bool:
         if not attempts:
             attempts = True
+        if is_dry_run():
+            return True
 
         logger.info(f"Waiting for funds on {self.chain.name}")
 
@@ -1,15 +1,38 @@
-from utils import read_from_json
+from utils import LazyABI, LazyJSONMapping
 
 # CLIENT CONFIGURATION
 VERIFY_TX_TIMEOUT = 300
 
 GAS_LIMIT_MULTIPLIER = 1.5
 GAS_PRICE_MULTIPLIER = 1.05
+# blocks and reward percentile of the eth_feeHistory window the EIP-1559 fees are derived from
+FEE_HISTORY_BLOCKS = 10
+FEE_HISTORY_REWARD_PERCENTILE = 50
+# max fee per gas = next base fee * multiplier + priority fee, the base fee can double in 6 full blocks
+MAX_FEE_BASE_FEE_MULTIPLIER = 2
+# seconds between blocks by chain id, fees are refreshed at most once per block
+# (arbitrum produces a block every 0.25 s, but its base fee barely moves between them)
+CHAIN_BLOCK_TIMES = {1: 12, 534352: 3, 324: 1, 42161: 1, 59144: 2}
+
+# chains whose receipts report execution gas only (no L1 data component), so gasUsed can be learned
+GAS_MODEL_CHAIN_IDS = [1, 534352, 59144]
+# receipts needed for a call shape before its gas estimate is skipped
+GAS_MODEL_MIN_SAMPLES = 3
+GAS_MODEL_WINDOW = 20
+# receipts report gas after refunds, which are capped at 1/5 of the gas used
+GAS_MODEL_LIMIT_MULTIPLIER = 1.25
+# a fresh storage slot write (20000) to a cold slot (2100) the observed transactions may not have paid for,
+# e.g. a WETH deposit or an approval of a wallet without a balance or an allowance yet
+GAS_MODEL_STORAGE_HEADROOM = 22100
 
 MAX_ALLOWED_TOKEN_PRICE_DIFFERENCE = 5
 
 RETRIES = 10
-RETRY_DELAY_RANGE = [5, 10]
+# seconds before the first retry, doubled after every failed attempt and jittered
+RETRY_BACKOFF_BASE = 1
+RETRY_BACKOFF_MAX = 30
+# rate limited requests back off this many times longer
+RATE_LIMIT_BACKOFF_MULTIPLIER = 4
 
 TOKEN_FULL_BALANCE_USAGE_MULTIPLIER = 0.99999999999999
 
@@ -58,42 +81,55 @@ RUBYSCORE_CONTRACT_ADDRESS = "0xe10Add2ad591A7AC3CA46788a06290De017b9fB4"
 
 # ZEBRA
 ZEBRA_ROUTER_CONTRACT_ADDRESS = "0x0122960d6e391478bfE8fB2408Ba412D5600f621"
-ZEBRA_ROUTER_CONTRACT_ABI = read_from_json(file_path="core/abi/ZebraRouterABI.json")
+ZEBRA_ROUTER_CONTRACT_ABI = LazyABI(file_path="core/abi/ZebraRouterABI.json")
+# assumed Uniswap V2 pair fee of the off-chain quotes, checked once against the router
+ZEBRA_SWAP_FEE_BPS = 30
 
 # SYNCSWAP
 SYNCSWAP_ROUTER_CONTRACT_ADDRESS = "0x80e38291e06339d10AAB483C65695D004dBD5C69"
-SYNCSWAP_ROUTER_CONTRACT_ABI = read_from_json(file_path="core/abi/SyncSwapRouterABI.json")
+SYNCSWAP_ROUTER_CONTRACT_ABI = LazyABI(file_path="core/abi/SyncSwapRouterABI.json")
 SYNCSWAP_CLASSIC_POOL_FACTORY_ADDRESS = "0x37BAc764494c8db4e54BDE72f6965beA9fa0AC2d"
-SYNCSWAP_CLASSIC_POOL_FACTORY_ABI = read_from_json(file_path="core/abi/SyncSwapClassicPoolFactoryABI.json")
+SYNCSWAP_CLASSIC_POOL_FACTORY_ABI = LazyABI(file_path="core/abi/SyncSwapClassicPoolFactoryABI.json")
 SYNCSWAP_STABLE_POOL_FACTORY_ADDRESS = "0xE4CF807E351b56720B17A59094179e7Ed9dD3727"
-SYNCSWAP_STABLE_POOL_FACTORY_ABI = read_from_json(file_path="core/abi/SyncSwapStablePoolFactoryABI.json")
-SYNCSWAP_POOL_ABI = read_from_json(file_path="core/abi/SyncSwapPoolABI.json")
+SYNCSWAP_STABLE_POOL_FACTORY_ABI = LazyABI(file_path="core/abi/SyncSwapStablePoolFactoryABI.json")
+SYNCSWAP_POOL_ABI = LazyABI(file_path="core/abi/SyncSwapPoolABI.json")
 
 # IZUMI
 IZUMI_ROUTER_CONTRACT_ADDRESS = "0x2db0AFD0045F3518c77eC6591a542e326Befd3D7"
 IZUMI_QUOTER_CONTRACT_ADDRESS = "0x3EF68D3f7664b2805D4E88381b64868a56f88bC4"
-IZUMI_QUOTER_CONTRACT_ABI = read_from_json(file_path="core/abi/IzumiQuoterABI.json")
-IZUMI_ROUTER_CONTRACT_ABI = read_from_json(file_path="core/abi/IzumiRouterABI.json")
+IZUMI_QUOTER_CONTRACT_ABI = LazyABI(file_path="core/abi/IzumiQuoterABI.json")
+IZUMI_ROUTER_CONTRACT_ABI = LazyABI(file_path="core/abi/IzumiRouterABI.json")
+IZUMI_POOL_FEES = [400, 500]
 
 # SKYDROME
 SKYDROME_ROUTER_CONTRACT_ADDRESS = "0xAA111C62cDEEf205f70E6722D1E22274274ec12F"
-SKYDROME_ROUTER_CONTRACT_ABI = read_from_json(file_path="core/abi/SkydromeRouterABI.json")
+SKYDROME_ROUTER_CONTRACT_ABI = LazyABI(file_path="core/abi/SkydromeRouterABI.json")
+# assumed volatile pool fee of the off-chain quotes, checked once against the router
+SKYDROME_VOLATILE_SWAP_FEE_BPS = 30
 
 # SPACEFI
 SPACEFI_ROUTER_CONTRACT_ADDRESS = "0x18b71386418A9FCa5Ae7165E31c385a5130011b6"
-SPACEFI_ROUTER_CONTRACT_ABI = read_from_json(file_path="core/abi/SpacefiRouterABI.json")
+SPACEFI_ROUTER_CONTRACT_ABI = LazyABI(file_path="core/abi/SpacefiRouterABI.json")
+# assumed Uniswap V2 pair fee of the off-chain quotes, checked once against the router
+SPACEFI_SWAP_FEE_BPS = 30
+
+# UNISWAP V2 FORKS
+UNISWAP_V2_FACTORY_ABI = LazyABI(file_path="core/abi/UniswapV2FactoryABI.json")
+UNISWAP_V2_PAIR_ABI = LazyABI(file_path="core/abi/UniswapV2PairABI.json")
+# pair reserves are refreshed at most once per Scroll block
+RESERVES_REFRESH_INTERVAL = 3
 
 # LAYERBANK
 LAYERBANK_CONTRACT_ADDRESS = "0xEC53c830f4444a8A56455c6836b5D2aA794289Aa"
-LAYERBANK_CONTRACT_ABI = read_from_json(file_path="core/abi/LayerbankABI.json")
+LAYERBANK_CONTRACT_ABI = LazyABI(file_path="core/abi/LayerbankABI.json")
 
 # DMAIL
 DMAIL_CONTRACT_ADDRESS = "0x47fbe95e981C0Df9737B6971B451fB15fdC989d9"
-DMAIL_CONTRACT_ABI = read_from_json(file_path="core/abi/DmailABI.json")
+DMAIL_CONTRACT_ABI = LazyABI(file_path="core/abi/DmailABI.json")
 
 # SCROLL BRIDGE
 SCROLL_BRIDGE_CONTRACT_ADDRESS = "0x6774Bcbd5ceCeF1336b5300fb5186a12DDD8b367"
-SCROLL_BRIDGE_CONTRACT_ABI = read_from_json(file_path="core/abi/ScrollMessengerABI.json")
+SCROLL_BRIDGE_CONTRACT_ABI = LazyABI(file_path="core/abi/ScrollMessengerABI.json")
 SCROLL_BRIDGE_RECEIVE_GAS_LIMIT = 168000
 SCROLL_GAS_PRICE_MULTIPLIER = 1.2
 SCROLL_MESSAGE = "0x"
@@ -101,7 +137,7 @@ SCROLL_BRIDGE_FULL_BRIDGE_GAS_MULTIPLIER = 1.1
 
 # COG FINANCE
 COG_FINANCE_USDC_WETH_POOL_CONTRACT_ADDRESS = "0xb31d07F716b5cd5C47e5d46E6955D7185F04Fd24"
-COG_FINANCE_USDC_WETH_POOL_CONTRACT_ABI = read_from_json(file_path="core/abi/CogFinanceUsdcWethPoolABI.json")
+COG_FINANCE_USDC_WETH_POOL_CONTRACT_ABI = LazyABI(file_path="core/abi/CogFinanceUsdcWethPoolABI.json")
 
 # ROUTER NITRO
 CHAIN_TO_NITRO_ASSET_FORWARDER_CONTRACT_ADDRESS = {
@@ -110,13 +146,13 @@ CHAIN_TO_NITRO_ASSET_FORWARDER_CONTRACT_ADDRESS = {
     "SCROLL": "0x01B4CE0d48Ce91eB6bcaf5dB33870C65d641b894",
     "LINEA": "0x8C4aCd74Ff4385f3B7911432FA6787Aa14406f8B",
 }
-NITRO_ASSET_FORWARDER_CONTRACT_ABI = read_from_json(file_path="core/abi/NitroAssetForwarderABI.json")
+NITRO_ASSET_FORWARDER_CONTRACT_ABI = LazyABI(file_path="core/abi/NitroAssetForwarderABI.json")
 
 NITRO_PARTNER_ID = 1
 
 # TOKENS
 WETH_CONTRACT_ADDRESS = "0x5300000000000000000000000000000000000004"
-WETH_CONTRACT_ABI = read_from_json(file_path="core/abi/wethABI.json")
+WETH_CONTRACT_ABI = LazyABI(file_path="core/abi/wethABI.json")
 
 USDC_CONTRACT_ADDRESS = "0x06eFdBFf2a14a7c8E15944D1F4A48F9F95F663A4"
 USDT_CONTRACT_ADDRESS = "0xf55BEC9cafDbE8730f096Aa55dad6D22d44099Df"
@@ -125,7 +161,7 @@ USDT_CONTRACT_ADDRESS = "0xf55BEC9cafDbE8730f096Aa55dad6D22d44099Df"
 LETH_CONTRACT_ADDRESS = "0x274C3795dadfEbf562932992bF241ae087e0a98C"
 
 # ORBITER
-ORBITER_TRADING_FEES_DATA = read_from_json(file_path="core/abi/OrbiterFeesData.json")
+ORBITER_TRADING_FEES_DATA = LazyJSONMapping(file_path="core/abi/OrbiterFeesData.json")
 ORBITER_CHAIN_CODE_BASE = 9000
 GAS_ESTIMATE_MULTIPLIER = 1.4
 SCROLL_GAS_ESTIMATE_MULTIPLIER = 6
@@ -140,15 +176,20 @@ ORBITER_CONTRACT_ADDRESSES = {
 
 # SNS
 SCROLL_DOMAINS_CONTRACT_ADDRESS = "0xe2e1D82b050Bb5BFeC776b2653A72f093A8373AB"
-SCROLL_DOMAINS_CONTRACT_ABI = read_from_json(file_path="core/abi/ScrollDomainsABI.json")
+SCROLL_DOMAINS_CONTRACT_ABI = LazyABI(file_path="core/abi/ScrollDomainsABI.json")
 SCROLL_DOMAIN_PRICE = 2500000000000000
 
 # multicall
 MULTICALL_V3_CONTRACT_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
-MULTICALL_V3_CONTRACT_ABI = read_from_json(file_path="core/abi/MulticallV3ABI.json")
+MULTICALL_V3_CONTRACT_ABI = LazyABI(file_path="core/abi/MulticallV3ABI.json")
+# calls per aggregate3 request when scanning the whole wallet list
+MULTICALL_CHUNK_SIZE = 500
+
+# threads signing transactions off the event loop
+SIGNING_THREADS = 4
 
 # ERC20 TOKENS ABI
-ERC20_CONTRACT_ABI = read_from_json(file_path="core/abi/erc20ABI.json")
+ERC20_CONTRACT_ABI = LazyABI(file_path="core/abi/erc20ABI.json")
 
 
 # regex for matching the valid proxy format
@@ -156,6 +197,8 @@ PROXY_PATTERN = r"^([^:@\s]+):([^:@\s]+)@([a-zA-Z0-9.-]+|\d+\.\d+\.\d+\.\d+):(\d
 
 # api endpoint for fetching current token USD price
 TOKEN_PRICE_FETCH_URL = "https://api.coinlore.net/api/ticker/?id={}"
+# seconds a price fetched ahead of a swap stays usable
+TOKEN_PRICE_PREFETCH_TTL = 30
 
 # api endpoint for getting random user data
 RANDOM_USER_FETCH_URL = "https://api.namefake.com/"
@@ -165,11 +208,27 @@ PRIVATE_KEYS_FILE_PATH = "data/private_keys.txt"
 PROXIES_FILE_PATH = "data/proxies.txt"
 DEPOSIT_ADDRESSES_PATH = "data/deposit_addresses.txt"
 DATABASE_FILE_PATH = "data/database.json"
+POOL_CACHE_FILE_PATH = "data/pool_cache.json"
+METRICS_FILE_PATH = "data/metrics.prom"
+
+# upper bounds (in seconds) of the span duration histogram buckets
+SPAN_HISTOGRAM_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600]
+# seconds between rewrites of the metrics file while a module is running
+METRICS_EXPORT_INTERVAL = 15
+
+# directory of the collapsed stacks and allocation reports of profiled runs
+PROFILE_OUTPUT_DIR = "data/profiles"
+# seconds between stack samples of the profiled run
+PROFILE_SAMPLE_INTERVAL = 0.005
+# seconds between tracemalloc snapshots
+PROFILE_SNAPSHOT_INTERVAL = 60
+# allocation sites listed in the report and the logs
+PROFILE_TOP_ALLOCATIONS = 25
 
 """
 NFT
 """
-SCROLL_NFT_ABI = read_from_json(file_path="core/abi/N2merc721ABI.json")
+SCROLL_NFT_ABI = LazyABI(file_path="core/abi/N2merc721ABI.json")
 
 
 """
@@ -0,0 +1,124 @@
+import re
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from eth_abi import encode
+from eth_typing import HexStr
+from eth_utils.abi import collapse_if_tuple, function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+from web3.contract.async_contract import AsyncContract
+
+# (id of the source ABI, function names) -> (source ABI, trimmed ABI)
+_TRIMMED_ABIS: Dict[Tuple[int, Tuple[str, ...]], Tuple[List[Dict], List[Dict]]] = {}
+_CONTRACTS: "weakref.WeakKeyDictionary[AsyncWeb3, Dict[Tuple, AsyncContract]]" = weakref.WeakKeyDictionary()
+# (id of the ABI, function name, arguments count) -> (ABI, encoder)
+_FUNCTION_ENCODERS: Dict[Tuple[int, str, int], Tuple[List[Dict], "FunctionEncoder"]] = {}
+
+ARRAY_SUFFIX_PATTERN = re.compile(r"\[\d*\]$")
+
+
+def trim_abi(abi: List[Dict], functions: Iterable[str]) -> List[Dict]:
+    """
+    Returns the ABI entries of the given functions only, so web3 doesn't have to
+    build function and event classes the code never uses.
+    """
+    function_names = tuple(sorted(set(functions)))
+    key = (id(abi), function_names)
+    if key not in _TRIMMED_ABIS:
+        trimmed_abi = [entry for entry in abi if entry.get("type") == "function" and entry["name"] in function_names]
+        missing_functions = set(function_names) - {entry["name"] for entry in trimmed_abi}
+        if missing_functions:
+            raise ValueError(f"Functions {', '.join(sorted(missing_functions))} are not in the ABI")
+        # the source ABI is kept alive so its id can't be reused by another list
+        _TRIMMED_ABIS[key] = (abi, trimmed_abi)
+    return _TRIMMED_ABIS[key][1]
+
+
+def get_contract(
+    w3: AsyncWeb3, address: str, abi: Optional[List[Dict]] = None, functions: Optional[Iterable[str]] = None
+) -> AsyncContract:
+    """
+    Returns a contract bound to the given web3 instance, built once per (w3, address, ABI).
+    """
+    address = AsyncWeb3.to_checksum_address(address)
+    if abi is not None and functions is not None:
+        abi = trim_abi(abi=abi, functions=functions)
+
+    contracts = _CONTRACTS.setdefault(w3, {})
+    key = (address, id(abi))
+    if key not in contracts:
+        if abi is None:
+            contracts[key] = w3.eth.contract(address=address)
+        else:
+            contracts[key] = w3.eth.contract(address=address, abi=abi)
+    return contracts[key]
+
+
+def _build_normalizer(abi_input: Dict) -> Optional[Callable[[Any], Any]]:
+    """
+    Builds a converter from the argument forms web3 accepts to the ones eth_abi encodes:
+    dicts for tuples and hex strings for bytes. Returns None if the argument is passed as is.
+    """
+    abi_type = abi_input["type"]
+    if ARRAY_SUFFIX_PATTERN.search(abi_type):
+        item_normalizer = _build_normalizer({**abi_input, "type": ARRAY_SUFFIX_PATTERN.sub("", abi_type)})
+        if item_normalizer is None:
+            return None
+        return lambda value: [item_normalizer(item) for item in value]
+
+    if abi_type == "tuple":
+        names = [component["name"] for component in abi_input["components"]]
+        normalizers = [_build_normalizer(component) for component in abi_input["components"]]
+
+        def normalize_tuple(value: Any) -> Tuple:
+            if isinstance(value, dict):
+                value = [value[name] for name in names]
+            return tuple(
+                item if normalizer is None else normalizer(item) for normalizer, item in zip(normalizers, value)
+            )
+
+        return normalize_tuple
+
+    if abi_type.startswith("bytes"):
+        return lambda value: HexBytes(value) if isinstance(value, str) else value
+    return None
+
+
+class FunctionEncoder:
+    """
+    Calldata encoder of a single function with the selector and argument types resolved once.
+    """
+
+    def __init__(self, function_abi: Dict) -> None:
+        self.name: str = function_abi["name"]
+        self.selector: bytes = function_abi_to_4byte_selector(function_abi)
+        self.types: List[str] = [collapse_if_tuple(abi_input) for abi_input in function_abi["inputs"]]
+        self._normalizers = [_build_normalizer(abi_input) for abi_input in function_abi["inputs"]]
+
+    def encode(self, args: Sequence = ()) -> HexStr:
+        if len(args) != len(self.types):
+            raise ValueError(f"{self.name} expects {len(self.types)} arguments, got {len(args)}")
+        args = [arg if normalizer is None else normalizer(arg) for normalizer, arg in zip(self._normalizers, args)]
+        return HexStr("0x" + (self.selector + encode(self.types, args)).hex())
+
+
+def get_function_encoder(abi: List[Dict], fn_name: str, args_count: int) -> FunctionEncoder:
+    key = (id(abi), fn_name, args_count)
+    if key not in _FUNCTION_ENCODERS:
+        candidates = [
+            entry
+            for entry in abi
+            if entry.get("type") == "function" and entry["name"] == fn_name and len(entry["inputs"]) == args_count
+        ]
+        if len(candidates) != 1:
+            raise ValueError(f"Can't resolve function {fn_name} with {args_count} arguments in the ABI")
+        _FUNCTION_ENCODERS[key] = (abi, FunctionEncoder(function_abi=candidates[0]))
+    return _FUNCTION_ENCODERS[key][1]
+
+
+def encode_function_call(abi: List[Dict], fn_name: str, args: Sequence = ()) -> HexStr:
+    """
+    Drop-in replacement of `contract.encodeABI(fn_name, args)` for the transaction building paths.
+    """
+    return get_function_encoder(abi=abi, fn_name=fn_name, args_count=len(args)).encode(args=args)
@@ -5,6 +5,7 @@ from logger import logger
 
 from core import Client
 from core.constants import COG_FINANCE_USDC_WETH_POOL_CONTRACT_ADDRESS, COG_FINANCE_USDC_WETH_POOL_CONTRACT_ABI
+from core.contracts import encode_function_call, get_contract
 from core.dapps.interfaces import Lending
 from core.token import Token, WETH
 
@@ -12,12 +13,16 @@ from core.token import Token, WETH
 class CogFinance(Lending):
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.contract: AsyncContract = self.client.w3.eth.contract(
-            address=COG_FINANCE_USDC_WETH_POOL_CONTRACT_ADDRESS, abi=COG_FINANCE_USDC_WETH_POOL_CONTRACT_ABI
+        self.contract: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=COG_FINANCE_USDC_WETH_POOL_CONTRACT_ADDRESS,
+            abi=COG_FINANCE_USDC_WETH_POOL_CONTRACT_ABI,
+            functions=["add_collateral", "remove_collateral", "user_collateral_share"],
         )
 
     async def supply(self, value: int, token: Token = WETH) -> bool:
-        data = self.contract.encodeABI(
+        data = encode_function_call(
+            abi=self.contract.abi,
             fn_name="add_collateral",
             args=[self.client.address, value],
         )
@@ -46,7 +51,8 @@ class CogFinance(Lending):
         if supplied_amount is None:
             return False
 
-        data = self.contract.encodeABI(
+        data = encode_function_call(
+            abi=self.contract.abi,
             fn_name="remove_collateral", args=[self.client.address, supplied_amount]
         )
 
@@ -3,19 +3,22 @@ from hashlib import sha256
 
 from core.client import Client
 from core.constants import DMAIL_CONTRACT_ABI, DMAIL_CONTRACT_ADDRESS
+from core.contracts import encode_function_call, get_contract
 from logger import logger
 
 
 class Dmail:
     def __init__(self, client: Client) -> None:
         self.client = client
-        self.contract = client.w3.eth.contract(address=DMAIL_CONTRACT_ADDRESS, abi=DMAIL_CONTRACT_ABI)
+        self.contract = get_contract(
+            w3=client.w3, address=DMAIL_CONTRACT_ADDRESS, abi=DMAIL_CONTRACT_ABI, functions=["send_mail"]
+        )
 
     async def send_mail(self) -> bool:
         logger.info("[Dmail] Sending mail")
         to = sha256(str(1e11 * random.random()).encode()).hexdigest()
         subject = sha256(str(1e11 * random.random()).encode()).hexdigest()
-        data = self.contract.encodeABI("send_mail", args=(to, subject))
+        data = encode_function_call(abi=self.contract.abi, fn_name="send_mail", args=(to, subject))
 
-        tx_hash = await self.client.send_transaction(to=self.contract.address, data=data)
+        tx_hash = await self.client.send_transaction(to=self.contract.address, data=data, use_gas_model=True)
         return await self.client.verify_tx(tx_hash=tx_hash)
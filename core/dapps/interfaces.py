@@ -1,14 +1,60 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from eth_typing import HexStr
 
 from core.token import Token
 
 
+@dataclass
+class Quote:
+    dex: str
+    amount_out: int
+    route_data: Any = None
+
+
+@dataclass
+class QuoteCall:
+    target: str
+    call_data: HexStr
+    output_types: List[str]
+    route_data: Any = None
+
+
 class Dex(ABC):
+    name: str
+
     @abstractmethod
-    async def swap(self, token_in: Token, token_out: Token, amount: float) -> bool:
+    async def swap(self, token_in: Token, token_out: Token, amount: float, quote: Optional[Quote] = None) -> bool:
         pass
 
+    @abstractmethod
+    async def get_quote_calls(self, token_in: Token, token_out: Token, amount_in: int) -> List[QuoteCall]:
+        pass
+
+    @abstractmethod
+    def parse_quote_output(self, quote_call: QuoteCall, output: Tuple) -> Optional[Quote]:
+        pass
+
+    async def get_local_quote(self, token_in: Token, token_out: Token, amount_in: int) -> Optional[Quote]:
+        """
+        Quote computed from cached pool state, None if the DEX can't quote the pair off-chain.
+        """
+        return None
+
+    async def get_reserves_call(self, token0: Token, token1: Token) -> Optional[QuoteCall]:
+        """
+        Call returning (reserve0, reserve1, ...) of the pair for DEXes that support off-chain quotes.
+        """
+        return None
+
+    def get_reserves_quote(self, amount_in: int, reserve_in: int, reserve_out: int) -> Optional[Quote]:
+        """
+        Quote computed from the reserves of the pair for DEXes that support off-chain quotes.
+        """
+        return None
+
 
 class Lending(ABC):
     @abstractmethod
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from hexbytes import HexBytes
 from web3.constants import ADDRESS_ZERO
@@ -7,26 +7,40 @@ from web3.contract.async_contract import AsyncContract
 from config import SLIPPAGE
 from core.client import Client
 from core.constants import (
+    IZUMI_POOL_FEES,
     IZUMI_QUOTER_CONTRACT_ABI,
     IZUMI_QUOTER_CONTRACT_ADDRESS,
     IZUMI_ROUTER_CONTRACT_ABI,
     IZUMI_ROUTER_CONTRACT_ADDRESS,
 )
+from core.contracts import encode_function_call, get_contract
 from core.decorators import gas_delay
+from core.exceptions import PoolNotFoundError
+from core.swap_latency import track_swap_latency
+from core.tracing import traced
 from core.token import ETH, WETH, Token
 from logger import logger
 
-from .interfaces import Dex
+from .interfaces import Dex, Quote, QuoteCall
+from .pool_cache import is_missing_pool_error, pool_cache
 
 
 class Izumi(Dex):
+    name = "izumi"
+
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.router: AsyncContract = self.client.w3.eth.contract(
-            address=IZUMI_ROUTER_CONTRACT_ADDRESS, abi=IZUMI_ROUTER_CONTRACT_ABI
+        self.router: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=IZUMI_ROUTER_CONTRACT_ADDRESS,
+            abi=IZUMI_ROUTER_CONTRACT_ABI,
+            functions=["multicall", "refundETH", "swapAmount", "unwrapWETH9"],
         )
-        self.quoter: AsyncContract = self.client.w3.eth.contract(
-            address=IZUMI_QUOTER_CONTRACT_ADDRESS, abi=IZUMI_QUOTER_CONTRACT_ABI
+        self.quoter: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=IZUMI_QUOTER_CONTRACT_ADDRESS,
+            abi=IZUMI_QUOTER_CONTRACT_ABI,
+            functions=["pool", "swapAmount"],
         )
 
     def _build_path(self, token_in: Token, token_out: Token, fee: int) -> bytes:
@@ -36,6 +50,31 @@ class Izumi(Dex):
             + HexBytes(token_out.contract_address).rjust(20, b"\0")
         )
 
+    async def get_quote_calls(self, token_in: Token, token_out: Token, amount_in: int) -> List[QuoteCall]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+
+        cached_fee = pool_cache.get(dex=self.name, token_a=token_in, token_b=token_out)
+        fees = [cached_fee] if cached_fee is not None else IZUMI_POOL_FEES
+
+        quote_calls = []
+        for fee in fees:
+            path = self._build_path(token_in=token_in, token_out=token_out, fee=fee)
+            quote_calls.append(
+                QuoteCall(
+                    target=self.quoter.address,
+                    call_data=encode_function_call(abi=self.quoter.abi, fn_name="swapAmount", args=[amount_in, path]),
+                    output_types=["uint256", "int24[]"],
+                    route_data=fee,
+                )
+            )
+        return quote_calls
+
+    def parse_quote_output(self, quote_call: QuoteCall, output: Tuple) -> Optional[Quote]:
+        amount_out, _ = output
+        return Quote(dex=self.name, amount_out=amount_out, route_data=quote_call.route_data)
+
+    @traced("quote.amount_out", dex=lambda dex: dex.name)
     async def _get_amount_out(
         self,
         path: bytes,
@@ -47,36 +86,61 @@ class Izumi(Dex):
             ).call()
             return int(amount_out * (1 - SLIPPAGE / 100))
         except Exception as e:
+            if is_missing_pool_error(error=e):
+                raise PoolNotFoundError(reason=str(e)) from e
             logger.error(f"[Izumi] Error while getting amount out: {e}")
             return None
 
-    async def _get_pool_fee(
-        self, token_in: Token, token_out: Token, fee: int = 400
-    ) -> Optional[int]:
+    async def _get_pool_fee(self, token_in: Token, token_out: Token) -> Optional[int]:
+        cached_fee = pool_cache.get(dex=self.name, token_a=token_in, token_b=token_out)
+        if cached_fee is not None:
+            return cached_fee
+
         try:
-            pool_address = await self.quoter.functions.pool(
-                token_in.contract_address, token_out.contract_address, fee
-            ).call()
-            if pool_address != ADDRESS_ZERO:
-                return fee
-            return await self._get_pool_fee(
-                token_in=token_in, token_out=token_out, fee=500
-            )
+            for fee in IZUMI_POOL_FEES:
+                pool_address = await self.quoter.functions.pool(
+                    token_in.contract_address, token_out.contract_address, fee
+                ).call()
+                if pool_address != ADDRESS_ZERO:
+                    pool_cache.set(dex=self.name, token_a=token_in, token_b=token_out, value=fee)
+                    return fee
+            logger.error(f"[Izumi] No pool found for {token_in.symbol}/{token_out.symbol}")
+            return None
         except Exception as e:
             logger.error(f"[Izumi] Error while getting pool fee: {e}")
             return None
 
-    async def _swap_to_eth(
-        self, token_in: Token, value: int, deadline: int, slippage: int
-    ) -> Optional[HexBytes]:
-        token_out = WETH
+    async def _get_path_and_min_amount_out(
+        self, token_in: Token, token_out: Token, value: int, quote: Optional[Quote]
+    ) -> Optional[Tuple[bytes, int]]:
+        if quote is not None:
+            path = self._build_path(token_in=token_in, token_out=token_out, fee=quote.route_data)
+            return path, int(quote.amount_out * (1 - SLIPPAGE / 100))
+
         pool_fee = await self._get_pool_fee(token_in=token_in, token_out=token_out)
         if pool_fee is None:
             return None
         path = self._build_path(token_in=token_in, token_out=token_out, fee=pool_fee)
-        min_amount_out = await self._get_amount_out(path=path, amount_in=value)
+        try:
+            min_amount_out = await self._get_amount_out(path=path, amount_in=value)
+        except PoolNotFoundError as e:
+            logger.error(f"[Izumi] {e}")
+            pool_cache.invalidate(dex=self.name, token_a=token_in, token_b=token_out)
+            return None
         if min_amount_out is None:
             return None
+        return path, min_amount_out
+
+    async def _swap_to_eth(
+        self, token_in: Token, value: int, deadline: int, slippage: int, quote: Optional[Quote] = None
+    ) -> Optional[HexBytes]:
+        token_out = WETH
+        route = await self._get_path_and_min_amount_out(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
+        if route is None:
+            return None
+        path, min_amount_out = route
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
             token_out=token_out,
@@ -85,14 +149,17 @@ class Izumi(Dex):
             slippage=slippage,
         ):
             return None
-        swap_data = self.router.encodeABI(
+        swap_data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapAmount",
             args=[(path, ADDRESS_ZERO, value, min_amount_out, deadline)],
         )
-        unwrap_data = self.router.encodeABI(
+        unwrap_data = encode_function_call(
+            abi=self.router.abi,
             fn_name="unwrapWETH9", args=[min_amount_out, self.client.address]
         )
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="multicall", args=[[swap_data, unwrap_data]]
         )
         try:
@@ -104,16 +171,15 @@ class Izumi(Dex):
             return None
 
     async def _swap_from_eth(
-        self, token_out: Token, value: int, deadline: int, slippage: int
+        self, token_out: Token, value: int, deadline: int, slippage: int, quote: Optional[Quote] = None
     ) -> Optional[HexBytes]:
         token_in = WETH
-        pool_fee = await self._get_pool_fee(token_in=token_in, token_out=token_out)
-        if pool_fee is None:
-            return None
-        path = self._build_path(token_in=token_in, token_out=token_out, fee=pool_fee)
-        min_amount_out = await self._get_amount_out(path=path, amount_in=value)
-        if min_amount_out is None:
+        route = await self._get_path_and_min_amount_out(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
+        if route is None:
             return None
+        path, min_amount_out = route
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
             token_out=token_out,
@@ -122,12 +188,14 @@ class Izumi(Dex):
             slippage=slippage,
         ):
             return None
-        swap_data = self.router.encodeABI(
+        swap_data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapAmount",
             args=[(path, self.client.address, value, min_amount_out, deadline)],
         )
-        refund_data = self.router.encodeABI(fn_name="refundETH")
-        data = self.router.encodeABI(
+        refund_data = encode_function_call(abi=self.router.abi, fn_name="refundETH")
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="multicall", args=[[swap_data, refund_data]]
         )
         try:
@@ -147,14 +215,14 @@ class Izumi(Dex):
         value: int,
         deadline: int,
         slippage: int,
+        quote: Optional[Quote] = None,
     ) -> Optional[HexBytes]:
-        pool_fee = await self._get_pool_fee(token_in=token_in, token_out=token_out)
-        if pool_fee is None:
-            return None
-        path = self._build_path(token_in=token_in, token_out=token_out, fee=pool_fee)
-        min_amount_out = await self._get_amount_out(path=path, amount_in=value)
-        if min_amount_out is None:
+        route = await self._get_path_and_min_amount_out(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
+        if route is None:
             return None
+        path, min_amount_out = route
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
             token_out=token_out,
@@ -163,7 +231,8 @@ class Izumi(Dex):
             slippage=slippage,
         ):
             return None
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapAmount",
             args=[[path, self.client.address, value, min_amount_out, deadline]],
         )
@@ -176,12 +245,19 @@ class Izumi(Dex):
             return None
 
     @gas_delay()
+    @track_swap_latency()
     async def swap(
-        self, token_in: Token, token_out: Token, amount: int, slippage: int = SLIPPAGE
+        self,
+        token_in: Token,
+        token_out: Token,
+        amount: int,
+        quote: Optional[Quote] = None,
+        slippage: int = SLIPPAGE,
     ) -> bool:
         logger.info(
             f"[Izumi] Swapping {amount} {token_in.symbol} to {token_out.symbol}"
         )
+        self.client.prefetch_token_price(token_list=(token_in, token_out))
         amount = token_in.to_wei(value=amount)
         if not await self.client.approve(
             spender=self.router.address, token=token_in, value=amount
@@ -190,11 +266,11 @@ class Izumi(Dex):
         deadline = self.client.get_deadline()
         if token_in == ETH:
             tx_hash = await self._swap_from_eth(
-                token_out=token_out, value=amount, deadline=deadline, slippage=slippage
+                token_out=token_out, value=amount, deadline=deadline, slippage=slippage, quote=quote
             )
         elif token_out == ETH:
             tx_hash = await self._swap_to_eth(
-                token_in=token_in, value=amount, deadline=deadline, slippage=slippage
+                token_in=token_in, value=amount, deadline=deadline, slippage=slippage, quote=quote
             )
         else:
             tx_hash = await self._swap_from_token_to_token(
@@ -203,5 +279,6 @@ class Izumi(Dex):
                 value=amount,
                 deadline=deadline,
                 slippage=slippage,
+                quote=quote,
             )
         return await self.client.verify_tx(tx_hash=tx_hash)
@@ -4,6 +4,7 @@ from web3.contract.async_contract import AsyncContract
 
 from core.client import Client
 from core.constants import LAYERBANK_CONTRACT_ABI, LAYERBANK_CONTRACT_ADDRESS
+from core.contracts import encode_function_call, get_contract
 from core.decorators import gas_delay
 from core.token import ETH, LETH, Token
 from logger import logger
@@ -14,12 +15,15 @@ from .interfaces import Lending
 class LayerBank(Lending):
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.contract: AsyncContract = self.client.w3.eth.contract(
-            address=LAYERBANK_CONTRACT_ADDRESS, abi=LAYERBANK_CONTRACT_ABI
+        self.contract: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=LAYERBANK_CONTRACT_ADDRESS,
+            abi=LAYERBANK_CONTRACT_ABI,
+            functions=["redeemToken", "supply"],
         )
 
     async def get_supplied_amount(self, token: Token = LETH) -> Optional[int]:
-        token_contract = self.client.w3.eth.contract(address=token.contract_address, abi=token.abi)
+        token_contract = get_contract(w3=self.client.w3, address=token.contract_address, abi=token.abi)
         try:
             return await token_contract.functions.balanceOf(self.client.address).call()
         except Exception:
@@ -29,7 +33,8 @@ class LayerBank(Lending):
     @gas_delay()
     async def supply(self, value: int, token: Token = ETH) -> bool:
         value = token.to_wei(value=value)
-        data = self.contract.encodeABI(
+        data = encode_function_call(
+            abi=self.contract.abi,
             fn_name="supply",
             args=[LETH.contract_address, value],
         )
@@ -46,7 +51,7 @@ class LayerBank(Lending):
         supplied_amout = await self.get_supplied_amount()
         if supplied_amout is None:
             return None
-        data = self.contract.encodeABI(fn_name="redeemToken", args=[token.contract_address, supplied_amout])
+        data = encode_function_call(abi=self.contract.abi, fn_name="redeemToken", args=[token.contract_address, supplied_amout])
         logger.info(f"[Layerbank] Withdrawing {token.from_wei(value=supplied_amout)} {token.symbol}")
         try:
             tx_hash = await self.client.send_transaction(to=self.contract.address, data=data)
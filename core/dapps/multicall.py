@@ -5,6 +5,7 @@ from eth_typing import HexStr
 
 from core import Client
 from core.constants import MULTICALL_V3_CONTRACT_ABI, MULTICALL_V3_CONTRACT_ADDRESS
+from core.contracts import encode_function_call, get_contract
 from core.token import Token
 from logger import logger
 
@@ -13,8 +14,11 @@ class MulticallV3:
     def __init__(self, client: Client):
         self.client = client
 
-        self.contract = self.client.w3.eth.contract(
-            address=MULTICALL_V3_CONTRACT_ADDRESS, abi=MULTICALL_V3_CONTRACT_ABI
+        self.contract = get_contract(
+            w3=self.client.w3,
+            address=MULTICALL_V3_CONTRACT_ADDRESS,
+            abi=MULTICALL_V3_CONTRACT_ABI,
+            functions=["aggregate", "aggregate3"],
         )
 
     async def get_token_balances(self, token_list: list[Token]) -> Optional[Dict[Token, float]]:
@@ -51,13 +55,20 @@ class MulticallV3:
         except Exception as e:
             logger.error(f"Error while multicall execution: {e}")
 
+    async def aggregate3(self, calls: List[Tuple[str, bool, HexStr]]) -> Optional[List[Tuple[bool, bytes]]]:
+        try:
+            return await self.contract.functions.aggregate3(calls).call()
+        except Exception as e:
+            logger.error(f"Error while multicall execution: {e}")
+            return None
+
     async def _encode_get_balance_call(self, token: Token) -> HexStr:
-        token_contract = self.client.w3.eth.contract(address=token.contract_address, abi=token.abi)
+        token_contract = get_contract(w3=self.client.w3, address=token.contract_address, abi=token.abi)
 
         if token.symbol == "COG":
             fn_name = "user_collateral_share"
         else:
             fn_name = "balanceOf"
-        data = token_contract.encodeABI(fn_name, args=[self.client.address])
+        data = encode_function_call(abi=token_contract.abi, fn_name=fn_name, args=[self.client.address])
 
         return data
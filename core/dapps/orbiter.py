@@ -2,6 +2,7 @@ from decimal import Decimal
 from typing import Optional, Tuple
 
 from core.decorators import gas_delay
+from core.fee_estimator import get_max_fee_per_gas
 from core.token import ETH, Token
 from logger import logger
 from core import Client, Chain
@@ -33,8 +34,8 @@ class Orbiter:
                 if self.src_chain_client.chain.chain_id == 534352
                 else GAS_ESTIMATE_MULTIPLIER
             )
-            gas = await self.src_chain_client.get_gas_estimate(tx_params=tx_params)
-            gas_fee = int((gas * tx_params["gasPrice"] * multiplier))
+            gas = await self.src_chain_client.get_gas_estimate(tx_params=tx_params, use_gas_model=True)
+            gas_fee = int((gas * get_max_fee_per_gas(tx_params=tx_params) * multiplier))
             balance = await self.src_chain_client.get_token_balance(ETH)
             return round(ETH.from_wei(balance - gas_fee), ESTIMATE_FULL_BRIDGE_ROUND) - trading_fee
         except Exception as e:
@@ -82,7 +83,9 @@ class Orbiter:
 
         try:
             tx_hash = await self.src_chain_client.send_transaction(
-                value=ETH.to_wei(value), to=ORBITER_CONTRACT_ADDRESSES[self.src_chain_client.chain.name]
+                value=ETH.to_wei(value),
+                to=ORBITER_CONTRACT_ADDRESSES[self.src_chain_client.chain.name],
+                use_gas_model=True,
             )
             return await self.src_chain_client.verify_tx(tx_hash=tx_hash)
         except Exception as e:
@@ -0,0 +1,163 @@
+import itertools
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_abi import decode
+from web3.constants import ADDRESS_ZERO
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+
+from core import Client
+from core.constants import (
+    IZUMI_POOL_FEES,
+    IZUMI_QUOTER_CONTRACT_ABI,
+    IZUMI_QUOTER_CONTRACT_ADDRESS,
+    POOL_CACHE_FILE_PATH,
+    SYNCSWAP_CLASSIC_POOL_FACTORY_ABI,
+    SYNCSWAP_CLASSIC_POOL_FACTORY_ADDRESS,
+    SYNCSWAP_STABLE_POOL_FACTORY_ABI,
+    SYNCSWAP_STABLE_POOL_FACTORY_ADDRESS,
+)
+from core.contracts import encode_function_call, get_contract
+from core.token import USDC, USDT, WETH, Token
+from logger import logger
+
+from .multicall import MulticallV3
+
+# tokens the swap paths trade between, ETH is always routed through WETH
+POOL_CACHE_TOKENS = [WETH, USDC, USDT]
+
+
+class PoolCache:
+    """
+    On-disk cache of immutable pool metadata keyed by (dex, token pair):
+    Izumi fee tiers, Syncswap pool addresses and V2 fork pair addresses.
+    """
+
+    def __init__(self, file_path: str = POOL_CACHE_FILE_PATH) -> None:
+        self.file_path = file_path
+        self._data: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _get_key(dex: str, token_a: Token, token_b: Token) -> str:
+        address_a, address_b = sorted([token_a.contract_address.lower(), token_b.contract_address.lower()])
+        return f"{dex}:{address_a}:{address_b}"
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                with open(file=self.file_path, mode="r") as json_file:
+                    self._data = json.load(json_file)
+            except FileNotFoundError:
+                self._data = {}
+            except Exception as e:
+                logger.warning(f"Failed to read pool cache, starting with an empty one: {e}")
+                self._data = {}
+        return self._data
+
+    def save(self) -> None:
+        try:
+            with open(file=self.file_path, mode="w") as json_file:
+                json.dump(self.data, json_file, indent=4)
+        except Exception as e:
+            logger.warning(f"Failed to save pool cache: {e}")
+
+    def get(self, dex: str, token_a: Token, token_b: Token) -> Optional[Any]:
+        return self.data.get(self._get_key(dex=dex, token_a=token_a, token_b=token_b))
+
+    def set(self, dex: str, token_a: Token, token_b: Token, value: Any) -> None:
+        self.data[self._get_key(dex=dex, token_a=token_a, token_b=token_b)] = value
+        self.save()
+
+    def invalidate(self, dex: str, token_a: Token, token_b: Token) -> None:
+        if self.data.pop(self._get_key(dex=dex, token_a=token_a, token_b=token_b), None) is not None:
+            logger.debug(f"[PoolCache] Invalidated {dex} {token_a.symbol}/{token_b.symbol} pool")
+            self.save()
+
+
+pool_cache = PoolCache()
+
+
+def is_missing_pool_error(error: Exception) -> bool:
+    """
+    Whether a quote failed because of the pool itself: it reverted, or the cached address has no code
+    and the call returned nothing. Failed requests, rate limits and open breakers say nothing about the pool.
+    """
+    return isinstance(error, (ContractLogicError, BadFunctionCallOutput))
+
+
+async def warm_up_pool_cache(client: Client) -> None:
+    """
+    Resolves every missing Izumi fee tier and Syncswap pool address of the traded pairs
+    in a single multicall and stores the results in the pool cache.
+    """
+    izumi_quoter = get_contract(
+        w3=client.w3,
+        address=IZUMI_QUOTER_CONTRACT_ADDRESS,
+        abi=IZUMI_QUOTER_CONTRACT_ABI,
+        functions=["pool", "swapAmount"],
+    )
+    classic_pool_factory = get_contract(
+        w3=client.w3,
+        address=SYNCSWAP_CLASSIC_POOL_FACTORY_ADDRESS,
+        abi=SYNCSWAP_CLASSIC_POOL_FACTORY_ABI,
+        functions=["getPool"],
+    )
+    stable_pool_factory = get_contract(
+        w3=client.w3,
+        address=SYNCSWAP_STABLE_POOL_FACTORY_ADDRESS,
+        abi=SYNCSWAP_STABLE_POOL_FACTORY_ABI,
+        functions=["getPool"],
+    )
+
+    # (dex, token_a, token_b, fee) per call, fee is None for Syncswap
+    lookups: List[Tuple[str, Token, Token, Optional[int]]] = []
+    calls = []
+    for token_a, token_b in itertools.combinations(POOL_CACHE_TOKENS, 2):
+        if pool_cache.get(dex="izumi", token_a=token_a, token_b=token_b) is None:
+            for fee in IZUMI_POOL_FEES:
+                lookups.append(("izumi", token_a, token_b, fee))
+                calls.append(
+                    (
+                        izumi_quoter.address,
+                        True,
+                        encode_function_call(
+                            abi=izumi_quoter.abi,
+                            fn_name="pool",
+                            args=[token_a.contract_address, token_b.contract_address, fee],
+                        ),
+                    )
+                )
+        if pool_cache.get(dex="syncswap", token_a=token_a, token_b=token_b) is None:
+            pool_factory = stable_pool_factory if token_a.is_stable and token_b.is_stable else classic_pool_factory
+            lookups.append(("syncswap", token_a, token_b, None))
+            calls.append(
+                (
+                    pool_factory.address,
+                    True,
+                    encode_function_call(
+                        abi=pool_factory.abi,
+                        fn_name="getPool",
+                        args=[token_a.contract_address, token_b.contract_address],
+                    ),
+                )
+            )
+
+    if not calls:
+        return
+
+    results = await MulticallV3(client=client).aggregate3(calls=calls)
+    if results is None:
+        logger.warning("[PoolCache] Failed to warm up pool cache")
+        return
+
+    for (dex, token_a, token_b, fee), (success, return_data) in zip(lookups, results):
+        if not success or not return_data:
+            continue
+        (pool_address,) = decode(["address"], return_data)
+        if pool_address == ADDRESS_ZERO or pool_cache.get(dex=dex, token_a=token_a, token_b=token_b) is not None:
+            continue
+        value = fee if dex == "izumi" else client.w3.to_checksum_address(pool_address)
+        pool_cache.data[PoolCache._get_key(dex=dex, token_a=token_a, token_b=token_b)] = value
+    pool_cache.save()
+    logger.debug(f"[PoolCache] Pool cache warmed up with {len(pool_cache.data)} pools")
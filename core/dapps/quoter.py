@@ -0,0 +1,85 @@
+import asyncio
+from typing import List, Optional
+
+from eth_abi import decode
+
+from core import Client
+from core.tracing import span
+from core.token import Token
+from logger import logger
+
+from .interfaces import Dex, Quote
+from .multicall import MulticallV3
+
+
+class QuoteAggregator:
+    """
+    Fetches quotes of several DEXes for the same pair in a single Multicall3 `aggregate3` call.
+    Calls are sent with `allowFailure`, so a missing pool or a reverting quoter only drops its own quote.
+    DEXes that can quote the pair from cached reserves are quoted locally and left out of the multicall.
+    """
+
+    def __init__(self, client: Client) -> None:
+        self.client = client
+        self.multicall = MulticallV3(client=client)
+
+    async def get_quotes(self, dexes: List[Dex], token_in: Token, token_out: Token, amount_in: int) -> List[Quote]:
+        with span("quote.local"):
+            local_quotes = await asyncio.gather(
+                *[dex.get_local_quote(token_in=token_in, token_out=token_out, amount_in=amount_in) for dex in dexes],
+                return_exceptions=True,
+            )
+
+        quotes = []
+        calls = []
+        for dex, local_quote in zip(dexes, local_quotes):
+            if isinstance(local_quote, Exception):
+                logger.debug(f"[Quoter] Couldn't quote {dex.name} locally: {local_quote}")
+            elif local_quote is not None and local_quote.amount_out > 0:
+                quotes.append(local_quote)
+                continue
+            try:
+                quote_calls = await dex.get_quote_calls(token_in=token_in, token_out=token_out, amount_in=amount_in)
+            except Exception as e:
+                logger.error(f"[Quoter] Couldn't build {dex.name} quote call: {e}")
+                continue
+            calls.extend((dex, quote_call) for quote_call in quote_calls)
+
+        if not calls:
+            return quotes
+
+        with span("quote.multicall"):
+            results = await self.multicall.aggregate3(
+                calls=[(quote_call.target, True, quote_call.call_data) for _, quote_call in calls]
+            )
+        if results is None:
+            return quotes
+
+        for (dex, quote_call), (success, return_data) in zip(calls, results):
+            if not success or not return_data:
+                continue
+            try:
+                quote = dex.parse_quote_output(
+                    quote_call=quote_call, output=decode(quote_call.output_types, return_data)
+                )
+            except Exception as e:
+                logger.debug(f"[Quoter] Couldn't decode {dex.name} quote: {e}")
+                continue
+            if quote is not None and quote.amount_out > 0:
+                quotes.append(quote)
+        return quotes
+
+    async def get_best_quote(
+        self, dexes: List[Dex], token_in: Token, token_out: Token, amount_in: int
+    ) -> Optional[Quote]:
+        quotes = await self.get_quotes(dexes=dexes, token_in=token_in, token_out=token_out, amount_in=amount_in)
+        if not quotes:
+            logger.warning(f"[Quoter] No quotes found for {token_in.symbol} -> {token_out.symbol}")
+            return None
+
+        best_quote = max(quotes, key=lambda quote: quote.amount_out)
+        logger.debug(
+            f"[Quoter] Best route for {token_in.from_wei(amount_in)} {token_in.symbol} -> {token_out.symbol}: "
+            f"{best_quote.dex} ({token_out.from_wei(best_quote.amount_out)} {token_out.symbol})"
+        )
+        return best_quote
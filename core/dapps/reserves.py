@@ -0,0 +1,196 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from eth_abi import decode
+from web3.constants import ADDRESS_ZERO
+
+from core import Client
+from core.constants import RESERVES_REFRESH_INTERVAL, UNISWAP_V2_FACTORY_ABI, UNISWAP_V2_PAIR_ABI
+from core.contracts import encode_function_call, get_contract
+from core.token import Token
+from logger import logger
+
+from .interfaces import Dex, QuoteCall
+from .multicall import MulticallV3
+from .pool_cache import pool_cache
+
+BPS_DENOMINATOR = 10000
+
+# router address -> factory address of the Uniswap V2 forks
+_V2_FACTORIES: Dict[str, str] = {}
+
+
+def get_v2_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int) -> int:
+    """
+    `UniswapV2Library.getAmountOut` with the fee in basis points.
+    """
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    amount_in_with_fee = amount_in * (BPS_DENOMINATOR - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * BPS_DENOMINATOR + amount_in_with_fee)
+
+
+def get_solidly_volatile_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int) -> int:
+    """
+    Volatile branch of the Solidly pair `getAmountOut`, where the fee is taken off the input first.
+    """
+    amount_in -= amount_in * fee_bps // BPS_DENOMINATOR
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    return amount_in * reserve_out // (reserve_in + amount_in)
+
+
+def sort_tokens(token_a: Token, token_b: Token) -> Tuple[Token, Token]:
+    token0, token1 = sorted((token_a, token_b), key=lambda token: token.contract_address.lower())
+    return token0, token1
+
+
+async def get_v2_reserves_call(
+    client: Client, dex: str, router_address: str, router_abi: List[Dict], token0: Token, token1: Token
+) -> Optional[QuoteCall]:
+    """
+    Builds the `getReserves` call of a Uniswap V2 fork pair.
+    The pair address is looked up once and kept in the pool cache.
+    """
+    pair_address = pool_cache.get(dex=dex, token_a=token0, token_b=token1)
+    if pair_address is None:
+        if router_address not in _V2_FACTORIES:
+            router = get_contract(w3=client.w3, address=router_address, abi=router_abi, functions=["factory"])
+            _V2_FACTORIES[router_address] = await router.functions.factory().call()
+        factory = get_contract(w3=client.w3, address=_V2_FACTORIES[router_address], abi=UNISWAP_V2_FACTORY_ABI)
+        pair_address = await factory.functions.getPair(token0.contract_address, token1.contract_address).call()
+        if pair_address == ADDRESS_ZERO:
+            return None
+        pool_cache.set(dex=dex, token_a=token0, token_b=token1, value=pair_address)
+
+    return QuoteCall(
+        target=pair_address,
+        call_data=encode_function_call(abi=UNISWAP_V2_PAIR_ABI, fn_name="getReserves"),
+        output_types=["uint112", "uint112", "uint32"],
+    )
+
+
+class ReservesCache:
+    """
+    Reserves of the V2-style pairs quoted so far, shared by all wallets. Every pair is refreshed
+    in one multicall at most once per block, quotes are then computed locally from the cached reserves.
+    """
+
+    def __init__(self, refresh_interval: float = RESERVES_REFRESH_INTERVAL) -> None:
+        self.refresh_interval = refresh_interval
+        # (dex, token0 address, token1 address) -> call returning (reserve0, reserve1, ...), None if there is no pair
+        self._reserves_calls: Dict[Tuple[str, str, str], Optional[QuoteCall]] = {}
+        self._reserves: Dict[Tuple[str, str, str], Tuple[int, int]] = {}
+        self._refreshed_at = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        # dex name -> whether its local quotes matched its router
+        self._local_quotes_enabled: Dict[str, bool] = {}
+        self._check_lock: Optional[asyncio.Lock] = None
+
+    async def _refresh(self, client: Client) -> None:
+        calls = {key: call for key, call in self._reserves_calls.items() if call is not None}
+        results = await MulticallV3(client=client).aggregate3(
+            calls=[(call.target, True, call.call_data) for call in calls.values()]
+        )
+        if results is None:
+            logger.warning("[Reserves] Failed to refresh pair reserves")
+            self._reserves = {}
+            return
+
+        reserves = {}
+        for (key, call), (success, return_data) in zip(calls.items(), results):
+            if not success or not return_data:
+                continue
+            reserve0, reserve1, *_ = decode(call.output_types, return_data)
+            reserves[key] = (reserve0, reserve1)
+        self._reserves = reserves
+        self._refreshed_at = time.monotonic()
+
+    async def _check_local_quotes(
+        self, client: Client, dex: Dex, key: Tuple[str, str, str], token_in: Token, token_out: Token, amount_in: int
+    ) -> bool:
+        """
+        The swap fee of the local math is assumed per fork, so the first local quote of every DEX is compared
+        with its router, both computed on the reserves of the same block. A DEX whose quotes differ is only
+        quoted by its router from then on. Returns False while the check is inconclusive.
+        """
+        if self._check_lock is None:
+            self._check_lock = asyncio.Lock()
+        async with self._check_lock:
+            if dex.name in self._local_quotes_enabled:
+                return self._local_quotes_enabled[dex.name]
+
+            reserves_call = self._reserves_calls[key]
+            quote_call = (await dex.get_quote_calls(token_in=token_in, token_out=token_out, amount_in=amount_in))[0]
+            results = await MulticallV3(client=client).aggregate3(
+                calls=[(call.target, True, call.call_data) for call in (reserves_call, quote_call)]
+            )
+            if results is None or not all(success and return_data for success, return_data in results):
+                return False
+            reserve0, reserve1, *_ = decode(reserves_call.output_types, results[0][1])
+            token0, _ = sort_tokens(token_in, token_out)
+            reserve_in, reserve_out = (reserve0, reserve1) if token_in == token0 else (reserve1, reserve0)
+            local_quote = dex.get_reserves_quote(amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out)
+            router_quote = dex.parse_quote_output(
+                quote_call=quote_call, output=decode(quote_call.output_types, results[1][1])
+            )
+            # e.g. the Skydrome router quoted its stable pool, which says nothing about the volatile fee
+            if local_quote is None or router_quote is None or local_quote.route_data != router_quote.route_data:
+                return False
+
+            local_quotes_enabled = local_quote.amount_out == router_quote.amount_out
+            if not local_quotes_enabled:
+                logger.warning(
+                    f"[Reserves] {dex.name} local quote {local_quote.amount_out} differs from its router "
+                    f"{router_quote.amount_out}, its swap fee isn't the assumed one, quoting it with the router"
+                )
+            self._local_quotes_enabled[dex.name] = local_quotes_enabled
+            return local_quotes_enabled
+
+    async def get_reserves(
+        self, client: Client, dex: Dex, token_in: Token, token_out: Token, amount_in: int
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Returns (reserve_in, reserve_out) of the pair, or None if the DEX has no such pair, the reserves
+        couldn't be fetched or its local quotes don't match its router.
+        """
+        token0, token1 = sort_tokens(token_in, token_out)
+        key = (dex.name, token0.contract_address.lower(), token1.contract_address.lower())
+        if key not in self._reserves_calls:
+            try:
+                self._reserves_calls[key] = await dex.get_reserves_call(token0=token0, token1=token1)
+            except Exception as e:
+                logger.error(f"[Reserves] Couldn't get {dex.name} {token0.symbol}/{token1.symbol} pair: {e}")
+                return None
+            # the new pair has to be fetched before it can be quoted
+            self._refreshed_at = 0.0
+        if self._reserves_calls[key] is None:
+            return None
+        local_quotes_enabled = self._local_quotes_enabled.get(dex.name)
+        if local_quotes_enabled is None:
+            try:
+                local_quotes_enabled = await self._check_local_quotes(
+                    client=client, dex=dex, key=key, token_in=token_in, token_out=token_out, amount_in=amount_in
+                )
+            except Exception as e:
+                logger.error(f"[Reserves] Couldn't check {dex.name} local quotes: {e}")
+                local_quotes_enabled = False
+        if not local_quotes_enabled:
+            return None
+
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if time.monotonic() - self._refreshed_at > self.refresh_interval:
+            async with self._refresh_lock:
+                if time.monotonic() - self._refreshed_at > self.refresh_interval:
+                    await self._refresh(client=client)
+
+        reserves = self._reserves.get(key)
+        if reserves is None:
+            return None
+        reserve0, reserve1 = reserves
+        return (reserve0, reserve1) if token_in == token0 else (reserve1, reserve0)
+
+
+reserves_cache = ReservesCache()
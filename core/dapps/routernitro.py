@@ -1,10 +1,12 @@
-from typing import Dict, Optional
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
 
 from web3 import Web3
 from web3.contract import AsyncContract
 
 from config import NITRO_BRIDGE_FEE_DELAY_RANGE, NITRO_BRIDGE_FEE_THRESHOLD
-from core import Client
+from core import Chain, Client
 from core.constants import (
     CHAIN_TO_NITRO_ASSET_FORWARDER_CONTRACT_ADDRESS,
     NATIVE_TOKEN_ADDRESS,
@@ -13,20 +15,120 @@ from core.constants import (
     ROUTER_PATHFINDER_TX_FETCH_URL,
     ROUTER_TX_SIMULATION_VALUE,
 )
+from core.contracts import get_contract
 from core.decorators import gas_delay
+from core.fee_estimator import get_max_fee_per_gas
 from core.token import ETH
+from core.tracing import traced
 from logger import logger
 from utils import sleep
 
 
+class NitroFeeMonitor:
+    """
+    Polls the pathfinder bridge fee of a route at one interval for all wallets bridging over it.
+    Wallets wait until the fee is under `NITRO_BRIDGE_FEE_THRESHOLD` and only then request
+    their own transaction.
+    """
+
+    def __init__(self, src_chain: Chain, dst_chain: Chain) -> None:
+        self.src_chain = src_chain
+        self.dst_chain = dst_chain
+        self.bridge_fee: Optional[float] = None
+        self._checked_at = 0.0
+        self._fee_is_suitable: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._waiters = 0
+
+    async def _fetch_bridge_fee(self, client: Client) -> Optional[float]:
+        quote = await client.send_get_request(
+            url=ROUTER_PATHFINDER_QUOTE_FETCH_URL.format(
+                from_token=NATIVE_TOKEN_ADDRESS,
+                to_token=NATIVE_TOKEN_ADDRESS,
+                amount=ROUTER_TX_SIMULATION_VALUE,
+                from_chain_id=self.src_chain.chain_id,
+                to_chain_id=self.dst_chain.chain_id,
+            )
+        )
+        if not quote:
+            return None
+        return ETH.from_wei(int(quote["bridgeFee"]["amount"]))
+
+    async def _poll(self, client: Client) -> None:
+        while True:
+            try:
+                bridge_fee = await self._fetch_bridge_fee(client=client)
+            except Exception as e:
+                logger.error(f"[RouterNitro] Failed to parse current fee: {e}")
+                bridge_fee = None
+
+            if bridge_fee is None:
+                logger.error("[RouterNitro] Failed to fetch current fee")
+            else:
+                self.bridge_fee = bridge_fee
+                self._checked_at = time.monotonic()
+                if bridge_fee > NITRO_BRIDGE_FEE_THRESHOLD:
+                    logger.warning(
+                        f"[RouterNitro] Current bridge fee is {bridge_fee} ETH > {NITRO_BRIDGE_FEE_THRESHOLD} ETH"
+                    )
+                    self._fee_is_suitable.clear()
+                else:
+                    self._fee_is_suitable.set()
+            await sleep(delay_range=NITRO_BRIDGE_FEE_DELAY_RANGE, pr_bar=False)
+
+    def _is_fee_fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < min(NITRO_BRIDGE_FEE_DELAY_RANGE)
+
+    async def wait_for_suitable_fee(self, client: Client) -> None:
+        """
+        Returns once the latest fee of the route is under the threshold. The fee is polled with the
+        proxy of the wallet that started the monitor.
+        """
+        if self._fee_is_suitable is None:
+            self._fee_is_suitable = asyncio.Event()
+        if self._fee_is_suitable.is_set() and self._is_fee_fresh():
+            return
+
+        self._fee_is_suitable.clear()
+        self._waiters += 1
+        try:
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._poll(client=client))
+            await self._fee_is_suitable.wait()
+        finally:
+            self._waiters -= 1
+            if self._waiters == 0 and self._task is not None and not self._task.done():
+                self._task.cancel()
+
+    def mark_fee_unsuitable(self) -> None:
+        """
+        Called when a wallet's own quote came back over the threshold, so the next wait polls again.
+        """
+        if self._fee_is_suitable is not None:
+            self._fee_is_suitable.clear()
+
+
+# (source chain name, destination chain name) -> fee monitor of the route
+_FEE_MONITORS: Dict[Tuple[str, str], NitroFeeMonitor] = {}
+
+
+def get_fee_monitor(src_chain: Chain, dst_chain: Chain) -> NitroFeeMonitor:
+    key = (src_chain.name, dst_chain.name)
+    if key not in _FEE_MONITORS:
+        _FEE_MONITORS[key] = NitroFeeMonitor(src_chain=src_chain, dst_chain=dst_chain)
+    return _FEE_MONITORS[key]
+
+
 class RouterNitro:
     def __init__(self, src_chain_client: Client, dst_chain_client: Client):
         self.src_chain_client = src_chain_client
         self.dst_chain_client = dst_chain_client
 
-        self.router: AsyncContract = self.src_chain_client.w3.eth.contract(
+        self.router: AsyncContract = get_contract(
+            w3=self.src_chain_client.w3,
             address=CHAIN_TO_NITRO_ASSET_FORWARDER_CONTRACT_ADDRESS[src_chain_client.chain.name],
             abi=NITRO_ASSET_FORWARDER_CONTRACT_ABI,
+            functions=[],
         )
 
     async def _calculate_amount_for_all_balance_bridge(self) -> Optional[float]:
@@ -40,7 +142,7 @@ class RouterNitro:
         )
 
         gas = await self.src_chain_client.get_gas_estimate(tx_params=tx_params)
-        gas_fee = int((gas * tx_params["gasPrice"] * 1.1))
+        gas_fee = int((gas * get_max_fee_per_gas(tx_params=tx_params) * 1.1))
         balance = await self.src_chain_client.get_token_balance(ETH)
 
         return round(Web3.from_wei(balance - gas_fee, "ether"), 5)
@@ -65,20 +167,25 @@ class RouterNitro:
         transaction = await self.src_chain_client.send_post_request(url=ROUTER_PATHFINDER_TX_FETCH_URL, data=quote)
         return transaction
 
+    @traced("bridge.nitro_fee_wait")
     async def _wait_for_suitable_quote(self, amount: int) -> Dict:
+        fee_monitor = get_fee_monitor(src_chain=self.src_chain_client.chain, dst_chain=self.dst_chain_client.chain)
         while True:
+            await fee_monitor.wait_for_suitable_fee(client=self.src_chain_client)
             quote = await self._get_tx_data(amount=amount)
 
             if quote is None:
-                logger.error("[RouterNitro] Failed to fetch current fee")
+                logger.error("[RouterNitro] Failed to fetch transaction data")
                 await sleep(delay_range=NITRO_BRIDGE_FEE_DELAY_RANGE, pr_bar=False)
                 continue
 
             bridge_fee = ETH.from_wei(int(quote["bridgeFee"]["amount"]))
             if bridge_fee > NITRO_BRIDGE_FEE_THRESHOLD:
                 logger.warning(
-                    f"[RouterNitro] Current bridge fee is {bridge_fee} ETH > {NITRO_BRIDGE_FEE_THRESHOLD} ETH"
+                    f"[RouterNitro] Bridge fee for {ETH.from_wei(amount)} ETH is {bridge_fee} ETH "
+                    f"> {NITRO_BRIDGE_FEE_THRESHOLD} ETH"
                 )
+                fee_monitor.mark_fee_unsuitable()
                 await sleep(delay_range=NITRO_BRIDGE_FEE_DELAY_RANGE, pr_bar=False)
                 continue
             return quote
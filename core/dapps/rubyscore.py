@@ -1,14 +1,17 @@
 from core.client import Client
 from core.constants import RUBYSCORE_CONTRACT_ADDRESS
+from core.contracts import get_contract
 from logger import logger
 
 
 class RubyScore:
     def __init__(self, client: Client) -> None:
         self.client = client
-        self.contract = client.w3.eth.contract(address=RUBYSCORE_CONTRACT_ADDRESS)
+        self.contract = get_contract(w3=client.w3, address=RUBYSCORE_CONTRACT_ADDRESS)
 
     async def vote(self) -> bool:
         logger.info("[Rubyscore] Voting")
-        tx_hash = await self.client.send_transaction(to=self.contract.address, data="0x632a9a52")
+        tx_hash = await self.client.send_transaction(
+            to=self.contract.address, data="0x632a9a52", use_gas_model=True
+        )
         return await self.client.verify_tx(tx_hash=tx_hash)
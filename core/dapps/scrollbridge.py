@@ -5,6 +5,7 @@ from web3.contract import AsyncContract
 
 from core.chain import SCROLL
 from core.decorators import gas_delay
+from core.fee_estimator import get_max_fee_per_gas
 from core.token import ETH
 from logger import logger
 from core import Client
@@ -17,14 +18,18 @@ from core.constants import (
     SCROLL_MESSAGE,
     SCROLL_BRIDGE_FULL_BRIDGE_GAS_MULTIPLIER,
 )
+from core.contracts import encode_function_call, get_contract
 from utils import get_chain_gas_price
 
 
 class ScrollBridge:
     def __init__(self, client: Client):
         self.client: Client = client
-        self.messenger: AsyncContract = self.client.w3.eth.contract(
-            address=SCROLL_BRIDGE_CONTRACT_ADDRESS, abi=SCROLL_BRIDGE_CONTRACT_ABI
+        self.messenger: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=SCROLL_BRIDGE_CONTRACT_ADDRESS,
+            abi=SCROLL_BRIDGE_CONTRACT_ABI,
+            functions=["sendMessage"],
         )
 
     async def _get_scroll_gas_fee(self):
@@ -38,8 +43,9 @@ class ScrollBridge:
         try:
             tx_params = await self.client.get_tx_params(
                 to=self.messenger.address,
-                data=self.messenger.encodeABI(
-                    "sendMessage",
+                data=encode_function_call(
+                    abi=self.messenger.abi,
+                    fn_name="sendMessage",
                     args=(
                         self.client.address,
                         SCROLL_BRIDGE_TX_SIMULATION_VALUE - await self._get_scroll_gas_fee(),
@@ -50,8 +56,8 @@ class ScrollBridge:
                 value=SCROLL_BRIDGE_TX_SIMULATION_VALUE,
             )
 
-            gas = await self.client.get_gas_estimate(tx_params=tx_params)
-            gas_fee = int((gas * tx_params["gasPrice"] * SCROLL_BRIDGE_FULL_BRIDGE_GAS_MULTIPLIER))
+            gas = await self.client.get_gas_estimate(tx_params=tx_params, use_gas_model=True)
+            gas_fee = int((gas * get_max_fee_per_gas(tx_params=tx_params) * SCROLL_BRIDGE_FULL_BRIDGE_GAS_MULTIPLIER))
             balance = await self.client.get_token_balance(ETH)
             return int((balance - gas_fee) * 0.98)
         except Exception as e:
@@ -65,8 +71,9 @@ class ScrollBridge:
             else:
                 amount = ETH.to_wei(amount)
 
-            data = self.messenger.encodeABI(
-                "sendMessage",
+            data = encode_function_call(
+                abi=self.messenger.abi,
+                fn_name="sendMessage",
                 args=(
                     self.client.address,
                     amount - await self._get_scroll_gas_fee(),
@@ -76,7 +83,9 @@ class ScrollBridge:
             )
 
             logger.info(f"[ScrollBridge] Bridging {self.client.w3.from_wei(amount, 'ether')} ETH to Scroll")
-            tx_hash = await self.client.send_transaction(to=self.messenger.address, data=data, value=amount)
+            tx_hash = await self.client.send_transaction(
+                to=self.messenger.address, data=data, value=amount, use_gas_model=True
+            )
             return await self.client.verify_tx(tx_hash=tx_hash)
         except Exception as e:
             logger.error(f"[ScrollBridge] Error: {e}")
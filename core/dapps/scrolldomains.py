@@ -12,13 +12,17 @@ from core.constants import (
     ZERO_ADDRESS,
     SCROLL_DOMAIN_PRICE, RANDOM_USER_FETCH_URL
 )
+from core.contracts import encode_function_call, get_contract
 
 
 class ScrollDomains:
     def __init__(self, client: Client):
         self.client: Client = client
-        self.contract: AsyncContract = self.client.w3.eth.contract(
-            address=SCROLL_DOMAINS_CONTRACT_ADDRESS, abi=SCROLL_DOMAINS_CONTRACT_ABI
+        self.contract: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=SCROLL_DOMAINS_CONTRACT_ADDRESS,
+            abi=SCROLL_DOMAINS_CONTRACT_ABI,
+            functions=["Register"],
         )
 
     @gas_delay()
@@ -35,7 +39,7 @@ class ScrollDomains:
             else:
                 ref_address = ZERO_ADDRESS
 
-            data = self.contract.encodeABI('Register', args=(
+            data = encode_function_call(abi=self.contract.abi, fn_name='Register', args=(
                 name,
                 ref_address
             ))
@@ -9,22 +9,93 @@ from core.client import Client
 from core.constants import (
     SKYDROME_ROUTER_CONTRACT_ABI,
     SKYDROME_ROUTER_CONTRACT_ADDRESS,
+    SKYDROME_VOLATILE_SWAP_FEE_BPS,
 )
+from core.contracts import encode_function_call, get_contract
 from core.decorators import gas_delay
+from core.swap_latency import track_swap_latency
+from core.tracing import traced
 from core.token import ETH, WETH, Token
 from logger import logger
 
-from .interfaces import Dex
+from .interfaces import Dex, Quote, QuoteCall
+from .reserves import get_solidly_volatile_amount_out, reserves_cache
 
 
 class Skydrome(Dex):
+    name = "skydrome"
+
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.router: AsyncContract = self.client.w3.eth.contract(
-            address=SKYDROME_ROUTER_CONTRACT_ADDRESS, abi=SKYDROME_ROUTER_CONTRACT_ABI
+        self.router: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=SKYDROME_ROUTER_CONTRACT_ADDRESS,
+            abi=SKYDROME_ROUTER_CONTRACT_ABI,
+            functions=[
+                "getAmountOut",
+                "getReserves",
+                "swapExactETHForTokens",
+                "swapExactTokensForETH",
+                "swapExactTokensForTokens",
+            ],
+        )
+
+    async def get_quote_calls(self, token_in: Token, token_out: Token, amount_in: int) -> List[QuoteCall]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+        return [
+            QuoteCall(
+                target=self.router.address,
+                call_data=encode_function_call(
+                    abi=self.router.abi,
+                    fn_name="getAmountOut", args=[amount_in, token_in.contract_address, token_out.contract_address]
+                ),
+                output_types=["uint256", "bool"],
+            )
+        ]
+
+    def parse_quote_output(self, quote_call: QuoteCall, output: Tuple) -> Optional[Quote]:
+        amount_out, pool_is_stable = output
+        return Quote(dex=self.name, amount_out=amount_out, route_data=pool_is_stable)
+
+    async def get_reserves_call(self, token0: Token, token1: Token) -> Optional[QuoteCall]:
+        return QuoteCall(
+            target=self.router.address,
+            call_data=encode_function_call(
+                abi=self.router.abi,
+                fn_name="getReserves",
+                args=[token0.contract_address, token1.contract_address, False],
+            ),
+            output_types=["uint256", "uint256"],
         )
 
+    async def get_local_quote(self, token_in: Token, token_out: Token, amount_in: int) -> Optional[Quote]:
+        # stable pairs trade on the stable pool curve, which is left to the router
+        if token_in.is_stable and token_out.is_stable:
+            return None
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+        reserves = await reserves_cache.get_reserves(
+            client=self.client, dex=self, token_in=token_in, token_out=token_out, amount_in=amount_in
+        )
+        if reserves is None:
+            return None
+        reserve_in, reserve_out = reserves
+        return self.get_reserves_quote(amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out)
+
+    def get_reserves_quote(self, amount_in: int, reserve_in: int, reserve_out: int) -> Optional[Quote]:
+        amount_out = get_solidly_volatile_amount_out(
+            amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out, fee_bps=SKYDROME_VOLATILE_SWAP_FEE_BPS
+        )
+        if amount_out == 0:
+            return None
+        return Quote(dex=self.name, amount_out=amount_out, route_data=False)
+
+    @traced("quote.amount_out", dex=lambda dex: dex.name)
     async def _get_amount_out(self, value: int, token_in: Token, token_out: Token) -> Optional[Tuple[int, bool]]:
+        quote = await self.get_local_quote(token_in=token_in, token_out=token_out, amount_in=value)
+        if quote is not None:
+            return quote.amount_out, quote.route_data
         try:
             data = await self.router.functions.getAmountOut(
                 value, token_in.contract_address, token_out.contract_address
@@ -43,14 +114,18 @@ class Skydrome(Dex):
         token_out: Token,
         value: int,
         slippage: Union[int, float] = SLIPPAGE,
+        quote: Optional[Quote] = None,
     ) -> Optional[Tuple[int, List[List[Optional[Union[str, bool]]]], ChecksumAddress, int]]:
-        data = await self._get_amount_out(
-            value=value,
-            token_in=token_in,
-            token_out=token_out,
-        )
-        if data is None:
-            return None
+        if quote is not None:
+            data = quote.amount_out, quote.route_data
+        else:
+            data = await self._get_amount_out(
+                value=value,
+                token_in=token_in,
+                token_out=token_out,
+            )
+            if data is None:
+                return None
         amount_out, pool_is_stable = data
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
@@ -67,25 +142,30 @@ class Skydrome(Dex):
             self.client.get_deadline(),
         )
 
-    async def _swap_exact_eth_for_tokens(self, token_out: Token, value: int) -> Optional[HexBytes]:
+    async def _swap_exact_eth_for_tokens(self, token_out: Token, value: int, quote: Optional[Quote] = None) -> Optional[HexBytes]:
         token_in = WETH
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, value=value)
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
         if swap_data is None:
             return None
-        data = self.router.encodeABI(fn_name="swapExactETHForTokens", args=swap_data)
+        data = encode_function_call(abi=self.router.abi, fn_name="swapExactETHForTokens", args=swap_data)
         try:
             return await self.client.send_transaction(to=self.router.address, data=data, value=value)
         except Exception as e:
             logger.error(f"[Skydrome] Couldn't swap {token_in.symbol} to {token_out.symbol}: {e}")
             return None
 
-    async def _swap_exact_tokens_for_eth(self, token_in: Token, value: int) -> Optional[HexBytes]:
+    async def _swap_exact_tokens_for_eth(self, token_in: Token, value: int, quote: Optional[Quote] = None) -> Optional[HexBytes]:
         token_out = WETH
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, value=value)
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
         if swap_data is None:
             return None
         min_amount_out, path, to, deadline = swap_data
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactTokensForETH",
             args=[value, min_amount_out, path, to, deadline],
         )
@@ -95,12 +175,15 @@ class Skydrome(Dex):
             logger.error(f"[Skydrome] Couldn't swap {token_in.symbol} to {token_out.symbol}: {e}")
             return None
 
-    async def _swap_exact_tokens_for_tokens(self, token_in: Token, token_out: Token, value: int) -> Optional[HexBytes]:
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, value=value)
+    async def _swap_exact_tokens_for_tokens(self, token_in: Token, token_out: Token, value: int, quote: Optional[Quote] = None) -> Optional[HexBytes]:
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
         if swap_data is None:
             return None
         min_amount_out, path, to, deadline = swap_data
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactTokensForTokens",
             args=[value, min_amount_out, path, to, deadline],
         )
@@ -111,15 +194,19 @@ class Skydrome(Dex):
             return None
 
     @gas_delay()
-    async def swap(self, token_in: Token, token_out: Token, amount: int) -> bool:
+    @track_swap_latency()
+    async def swap(self, token_in: Token, token_out: Token, amount: int, quote: Optional[Quote] = None) -> bool:
         logger.info(f"[Skydrome] Swapping {amount} {token_in.symbol} to {token_out.symbol}")
+        self.client.prefetch_token_price(token_list=(token_in, token_out))
         amount = token_in.to_wei(value=amount)
         if not await self.client.approve(spender=self.router.address, token=token_in, value=amount):
             return False
         if token_in == ETH:
-            tx_hash = await self._swap_exact_eth_for_tokens(token_out=token_out, value=amount)
+            tx_hash = await self._swap_exact_eth_for_tokens(token_out=token_out, value=amount, quote=quote)
         elif token_out == ETH:
-            tx_hash = await self._swap_exact_tokens_for_eth(token_in=token_in, value=amount)
+            tx_hash = await self._swap_exact_tokens_for_eth(token_in=token_in, value=amount, quote=quote)
         else:
-            tx_hash = await self._swap_exact_tokens_for_tokens(token_in=token_in, token_out=token_out, value=amount)
+            tx_hash = await self._swap_exact_tokens_for_tokens(
+                token_in=token_in, token_out=token_out, value=amount, quote=quote
+            )
         return await self.client.verify_tx(tx_hash=tx_hash)
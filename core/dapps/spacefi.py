@@ -1,26 +1,91 @@
-from typing import Any, List, Optional, Union
+from typing import Any, List, Optional, Tuple, Union
 
 from hexbytes import HexBytes
 from web3.contract.async_contract import AsyncContract
 
 from config import SLIPPAGE
 from core.client import Client
-from core.constants import SPACEFI_ROUTER_CONTRACT_ABI, SPACEFI_ROUTER_CONTRACT_ADDRESS
+from core.constants import SPACEFI_ROUTER_CONTRACT_ABI, SPACEFI_ROUTER_CONTRACT_ADDRESS, SPACEFI_SWAP_FEE_BPS
+from core.contracts import encode_function_call, get_contract
 from core.decorators import gas_delay
+from core.swap_latency import track_swap_latency
+from core.tracing import traced
 from core.token import ETH, WETH, Token
 from logger import logger
 
-from .interfaces import Dex
+from .interfaces import Dex, Quote, QuoteCall
+from .reserves import get_v2_amount_out, get_v2_reserves_call, reserves_cache
 
 
 class Spacefi(Dex):
+    name = "spacefi"
+
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.router: AsyncContract = self.client.w3.eth.contract(
-            address=SPACEFI_ROUTER_CONTRACT_ADDRESS, abi=SPACEFI_ROUTER_CONTRACT_ABI
+        self.router: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=SPACEFI_ROUTER_CONTRACT_ADDRESS,
+            abi=SPACEFI_ROUTER_CONTRACT_ABI,
+            functions=[
+                "getAmountsOut",
+                "swapExactETHForTokens",
+                "swapExactTokensForETH",
+                "swapExactTokensForTokens",
+            ],
+        )
+
+    async def get_quote_calls(self, token_in: Token, token_out: Token, amount_in: int) -> List[QuoteCall]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+        return [
+            QuoteCall(
+                target=self.router.address,
+                call_data=encode_function_call(
+                    abi=self.router.abi,
+                    fn_name="getAmountsOut", args=[amount_in, [token_in.contract_address, token_out.contract_address]]
+                ),
+                output_types=["uint256[]"],
+            )
+        ]
+
+    def parse_quote_output(self, quote_call: QuoteCall, output: Tuple) -> Optional[Quote]:
+        (amounts,) = output
+        return Quote(dex=self.name, amount_out=amounts[-1])
+
+    async def get_reserves_call(self, token0: Token, token1: Token) -> Optional[QuoteCall]:
+        return await get_v2_reserves_call(
+            client=self.client,
+            dex=self.name,
+            router_address=self.router.address,
+            router_abi=SPACEFI_ROUTER_CONTRACT_ABI,
+            token0=token0,
+            token1=token1,
+        )
+
+    async def get_local_quote(self, token_in: Token, token_out: Token, amount_in: int) -> Optional[Quote]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+        reserves = await reserves_cache.get_reserves(
+            client=self.client, dex=self, token_in=token_in, token_out=token_out, amount_in=amount_in
+        )
+        if reserves is None:
+            return None
+        reserve_in, reserve_out = reserves
+        return self.get_reserves_quote(amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out)
+
+    def get_reserves_quote(self, amount_in: int, reserve_in: int, reserve_out: int) -> Optional[Quote]:
+        amount_out = get_v2_amount_out(
+            amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out, fee_bps=SPACEFI_SWAP_FEE_BPS
         )
+        if amount_out == 0:
+            return None
+        return Quote(dex=self.name, amount_out=amount_out)
 
+    @traced("quote.amount_out", dex=lambda dex: dex.name)
     async def _get_amount_out(self, token_in: Token, token_out: Token, value: int) -> Optional[int]:
+        quote = await self.get_local_quote(token_in=token_in, token_out=token_out, amount_in=value)
+        if quote is not None:
+            return int(quote.amount_out * (1 - SLIPPAGE / 100))
         try:
             _, amount_out = await self.router.functions.getAmountsOut(
                 value,
@@ -40,10 +105,14 @@ class Spacefi(Dex):
         token_out: Token,
         value: int,
         slippage: Union[int, float] = SLIPPAGE,
+        quote: Optional[Quote] = None,
     ) -> Optional[List[Any]]:
-        amount_out = await self._get_amount_out(token_in=token_in, token_out=token_out, value=value)
-        if amount_out is None:
-            return None
+        if quote is not None:
+            amount_out = int(quote.amount_out * (1 - SLIPPAGE / 100))
+        else:
+            amount_out = await self._get_amount_out(token_in=token_in, token_out=token_out, value=value)
+            if amount_out is None:
+                return None
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
             token_out=token_out,
@@ -59,25 +128,30 @@ class Spacefi(Dex):
             self.client.get_deadline(),
         )
 
-    async def _swap_exact_eth_for_tokens(self, token_out: Token, value: int) -> Optional[HexBytes]:
+    async def _swap_exact_eth_for_tokens(self, token_out: Token, value: int, quote: Optional[Quote] = None) -> Optional[HexBytes]:
         token_in = WETH
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, value=value)
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
         if swap_data is None:
             return None
-        data = self.router.encodeABI(fn_name="swapExactETHForTokens", args=swap_data)
+        data = encode_function_call(abi=self.router.abi, fn_name="swapExactETHForTokens", args=swap_data)
         try:
             return await self.client.send_transaction(to=self.router.address, data=data, value=value)
         except Exception as e:
             logger.error(f"[Spacefi] Couldn't swap {token_in.symbol} to {token_out.symbol}: {e}")
             return None
 
-    async def _swap_exact_tokens_for_eth(self, token_in: Token, value: int) -> Optional[HexBytes]:
+    async def _swap_exact_tokens_for_eth(self, token_in: Token, value: int, quote: Optional[Quote] = None) -> Optional[HexBytes]:
         token_out = WETH
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, value=value)
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
         if swap_data is None:
             return None
         min_amount_out, path, to, deadline = swap_data
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactTokensForETH",
             args=[value, min_amount_out, path, to, deadline],
         )
@@ -87,12 +161,15 @@ class Spacefi(Dex):
             logger.error(f"[Spacefi] Couldn't swap {token_in.symbol} to {token_out.symbol}: {e}")
             return None
 
-    async def _swap_exact_tokens_for_tokens(self, token_in: Token, token_out: Token, value: int) -> Optional[HexBytes]:
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, value=value)
+    async def _swap_exact_tokens_for_tokens(self, token_in: Token, token_out: Token, value: int, quote: Optional[Quote] = None) -> Optional[HexBytes]:
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, value=value, quote=quote
+        )
         if swap_data is None:
             return None
         min_amount_out, path, to, deadline = swap_data
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactTokensForTokens",
             args=[value, min_amount_out, path, to, deadline],
         )
@@ -103,15 +180,19 @@ class Spacefi(Dex):
             return None
 
     @gas_delay()
-    async def swap(self, token_in: Token, token_out: Token, amount: int) -> bool:
+    @track_swap_latency()
+    async def swap(self, token_in: Token, token_out: Token, amount: int, quote: Optional[Quote] = None) -> bool:
         logger.info(f"[Spacefi] Swapping {amount} {token_in.symbol} to {token_out.symbol}")
+        self.client.prefetch_token_price(token_list=(token_in, token_out))
         amount = token_in.to_wei(value=amount)
         if not await self.client.approve(spender=self.router.address, token=token_in, value=amount):
             return False
         if token_in == ETH:
-            tx_hash = await self._swap_exact_eth_for_tokens(token_out=token_out, value=amount)
+            tx_hash = await self._swap_exact_eth_for_tokens(token_out=token_out, value=amount, quote=quote)
         elif token_out == ETH:
-            tx_hash = await self._swap_exact_tokens_for_eth(token_in=token_in, value=amount)
+            tx_hash = await self._swap_exact_tokens_for_eth(token_in=token_in, value=amount, quote=quote)
         else:
-            tx_hash = await self._swap_exact_tokens_for_tokens(token_in=token_in, token_out=token_out, value=amount)
+            tx_hash = await self._swap_exact_tokens_for_tokens(
+                token_in=token_in, token_out=token_out, value=amount, quote=quote
+            )
         return await self.client.verify_tx(tx_hash=tx_hash)
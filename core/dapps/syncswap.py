@@ -1,4 +1,4 @@
-from typing import Optional, Union
+from typing import List, Optional, Tuple, Union
 
 from eth_abi.abi import encode
 from hexbytes import HexBytes
@@ -16,30 +16,47 @@ from core.constants import (
     SYNCSWAP_STABLE_POOL_FACTORY_ABI,
     SYNCSWAP_STABLE_POOL_FACTORY_ADDRESS,
 )
+from core.contracts import encode_function_call, get_contract
 from core.decorators import gas_delay
+from core.exceptions import PoolNotFoundError
+from core.swap_latency import track_swap_latency
+from core.tracing import traced
 from core.token import ETH, WETH, Token
 from logger import logger
 
-from . import Dex
+from .interfaces import Dex, Quote, QuoteCall
+from .pool_cache import is_missing_pool_error, pool_cache
 
 
 class Syncswap(Dex):
+    name = "syncswap"
+
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.router: AsyncContract = self.client.w3.eth.contract(
+        self.router: AsyncContract = get_contract(
+            w3=self.client.w3,
             address=SYNCSWAP_ROUTER_CONTRACT_ADDRESS,
             abi=SYNCSWAP_ROUTER_CONTRACT_ABI,
+            functions=["swap"],
         )
-        self.classic_pool_factory: AsyncContract = self.client.w3.eth.contract(
+        self.classic_pool_factory: AsyncContract = get_contract(
+            w3=self.client.w3,
             address=SYNCSWAP_CLASSIC_POOL_FACTORY_ADDRESS,
             abi=SYNCSWAP_CLASSIC_POOL_FACTORY_ABI,
+            functions=["getPool"],
         )
-        self.stable_pool_factory: AsyncContract = self.client.w3.eth.contract(
+        self.stable_pool_factory: AsyncContract = get_contract(
+            w3=self.client.w3,
             address=SYNCSWAP_STABLE_POOL_FACTORY_ADDRESS,
             abi=SYNCSWAP_STABLE_POOL_FACTORY_ABI,
+            functions=["getPool"],
         )
 
     async def _get_pool_address(self, token_in: Token, token_out: Token) -> Optional[HexBytes]:
+        cached_pool_address = pool_cache.get(dex=self.name, token_a=token_in, token_b=token_out)
+        if cached_pool_address is not None:
+            return cached_pool_address
+
         if token_in.is_stable and token_out.is_stable:
             pool_factory = self.stable_pool_factory
         else:
@@ -51,24 +68,55 @@ class Syncswap(Dex):
             ).call()
             if pool_address == ADDRESS_ZERO:
                 return None
+            pool_cache.set(dex=self.name, token_a=token_in, token_b=token_out, value=pool_address)
             return pool_address
         except Exception as e:
             logger.error(f"[Syncswap] Couldn't get pool address: {e}")
             return None
 
+    async def get_quote_calls(self, token_in: Token, token_out: Token, amount_in: int) -> List[QuoteCall]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+
+        pool_contract_address = await self._get_pool_address(token_in=token_in, token_out=token_out)
+        if pool_contract_address is None:
+            return []
+        pool_contract: AsyncContract = get_contract(
+            w3=self.client.w3, address=pool_contract_address, abi=SYNCSWAP_POOL_ABI, functions=["getAmountOut"]
+        )
+        return [
+            QuoteCall(
+                target=pool_contract_address,
+                call_data=encode_function_call(
+                    abi=pool_contract.abi,
+                    fn_name="getAmountOut", args=[token_in.contract_address, amount_in, self.client.address]
+                ),
+                output_types=["uint256"],
+                route_data=pool_contract_address,
+            )
+        ]
+
+    def parse_quote_output(self, quote_call: QuoteCall, output: Tuple) -> Optional[Quote]:
+        return Quote(dex=self.name, amount_out=output[0], route_data=quote_call.route_data)
+
+    @traced("quote.amount_out", dex=lambda dex: dex.name)
     async def _get_amount_out(
         self,
         pool_contract_address: HexBytes,
         token_in: Token,
         amount_in: int,
     ) -> Optional[int]:
-        pool_contract: AsyncContract = self.client.w3.eth.contract(address=pool_contract_address, abi=SYNCSWAP_POOL_ABI)
+        pool_contract: AsyncContract = get_contract(
+            w3=self.client.w3, address=pool_contract_address, abi=SYNCSWAP_POOL_ABI, functions=["getAmountOut"]
+        )
         try:
             amount_out = await pool_contract.functions.getAmountOut(
                 token_in.contract_address, amount_in, self.client.address
             ).call()
             return int(amount_out * (1 - SLIPPAGE / 100))
         except Exception as e:
+            if is_missing_pool_error(error=e):
+                raise PoolNotFoundError(reason=str(e)) from e
             logger.error(f"[Zebra] Error while getting amount out: {e}")
             return None
 
@@ -79,22 +127,32 @@ class Syncswap(Dex):
         amount_in: Union[int, float],
         slippage: int = SLIPPAGE,
         withdraw_mode: int = 1,
+        quote: Optional[Quote] = None,
     ) -> Optional[int]:
         if token_in == ETH:
             token_in = WETH
         elif token_out == ETH:
             token_out = WETH
 
-        pool_contract_address = await self._get_pool_address(token_in=token_in, token_out=token_out)
-        if pool_contract_address is None:
-            return None
-        min_amount_out = await self._get_amount_out(
-            pool_contract_address=pool_contract_address,
-            token_in=token_in,
-            amount_in=amount_in,
-        )
-        if min_amount_out is None:
-            return None
+        if quote is not None:
+            pool_contract_address = quote.route_data
+            min_amount_out = int(quote.amount_out * (1 - SLIPPAGE / 100))
+        else:
+            pool_contract_address = await self._get_pool_address(token_in=token_in, token_out=token_out)
+            if pool_contract_address is None:
+                return None
+            try:
+                min_amount_out = await self._get_amount_out(
+                    pool_contract_address=pool_contract_address,
+                    token_in=token_in,
+                    amount_in=amount_in,
+                )
+            except PoolNotFoundError as e:
+                logger.error(f"[Syncswap] {e}")
+                pool_cache.invalidate(dex=self.name, token_a=token_in, token_b=token_out)
+                return None
+            if min_amount_out is None:
+                return None
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
             token_out=token_out,
@@ -130,8 +188,10 @@ class Syncswap(Dex):
         return paths, min_amount_out, self.client.get_deadline()
 
     @gas_delay()
-    async def swap(self, token_in: Token, token_out: Token, amount: int) -> bool:
+    @track_swap_latency()
+    async def swap(self, token_in: Token, token_out: Token, amount: int, quote: Optional[Quote] = None) -> bool:
         logger.info(f"[Syncswap] Swapping {amount} {token_in.symbol} to {token_out.symbol}")
+        self.client.prefetch_token_price(token_list=(token_in, token_out))
         amount = token_in.to_wei(value=amount)
         # if swapping from ETH set tx `value` to `amount`
         if token_in == ETH:
@@ -141,11 +201,13 @@ class Syncswap(Dex):
         if not await self.client.approve(spender=self.router.address, token=token_in, value=amount):
             return False
 
-        swap_data = await self._prepare_swap_data(token_in=token_in, token_out=token_out, amount_in=amount)
+        swap_data = await self._prepare_swap_data(
+            token_in=token_in, token_out=token_out, amount_in=amount, quote=quote
+        )
         if swap_data is None:
             return False
         paths, amount_out, deadline = swap_data
-        data = self.router.encodeABI(fn_name="swap", args=(paths, amount_out, deadline))
+        data = encode_function_call(abi=self.router.abi, fn_name="swap", args=(paths, amount_out, deadline))
         try:
             tx_hash = await self.client.send_transaction(to=self.router.address, data=data, value=value)
             return await self.client.verify_tx(tx_hash=tx_hash)
@@ -5,21 +5,83 @@ from web3.contract.async_contract import AsyncContract
 
 from config import SLIPPAGE
 from core import Client
-from core.constants import ZEBRA_ROUTER_CONTRACT_ABI, ZEBRA_ROUTER_CONTRACT_ADDRESS
+from core.constants import ZEBRA_ROUTER_CONTRACT_ABI, ZEBRA_ROUTER_CONTRACT_ADDRESS, ZEBRA_SWAP_FEE_BPS
+from core.contracts import encode_function_call, get_contract
 from core.token import ETH, WETH, Token
 from logger import logger
 
 from ..decorators import gas_delay
-from . import Dex
+from ..swap_latency import track_swap_latency
+from ..tracing import traced
+from .interfaces import Dex, Quote, QuoteCall
+from .reserves import get_v2_amount_out, get_v2_reserves_call, reserves_cache
 
 
 class Zebra(Dex):
+    name = "zebra"
+
     def __init__(self, client: Client) -> None:
         self.client: Client = client
-        self.router: AsyncContract = self.client.w3.eth.contract(
-            address=ZEBRA_ROUTER_CONTRACT_ADDRESS, abi=ZEBRA_ROUTER_CONTRACT_ABI
+        self.router: AsyncContract = get_contract(
+            w3=self.client.w3,
+            address=ZEBRA_ROUTER_CONTRACT_ADDRESS,
+            abi=ZEBRA_ROUTER_CONTRACT_ABI,
+            functions=[
+                "getAmountsOut",
+                "swapExactETHForTokens",
+                "swapExactTokensForETH",
+                "swapExactTokensForTokens",
+            ],
         )
 
+    async def get_quote_calls(self, token_in: Token, token_out: Token, amount_in: int) -> List[QuoteCall]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+        return [
+            QuoteCall(
+                target=self.router.address,
+                call_data=encode_function_call(
+                    abi=self.router.abi,
+                    fn_name="getAmountsOut", args=[amount_in, [token_in.contract_address, token_out.contract_address]]
+                ),
+                output_types=["uint256[]"],
+            )
+        ]
+
+    def parse_quote_output(self, quote_call: QuoteCall, output: Tuple) -> Optional[Quote]:
+        (amounts,) = output
+        return Quote(dex=self.name, amount_out=amounts[-1])
+
+    async def get_reserves_call(self, token0: Token, token1: Token) -> Optional[QuoteCall]:
+        return await get_v2_reserves_call(
+            client=self.client,
+            dex=self.name,
+            router_address=self.router.address,
+            router_abi=ZEBRA_ROUTER_CONTRACT_ABI,
+            token0=token0,
+            token1=token1,
+        )
+
+    async def get_local_quote(self, token_in: Token, token_out: Token, amount_in: int) -> Optional[Quote]:
+        token_in = WETH if token_in == ETH else token_in
+        token_out = WETH if token_out == ETH else token_out
+        reserves = await reserves_cache.get_reserves(
+            client=self.client, dex=self, token_in=token_in, token_out=token_out, amount_in=amount_in
+        )
+        if reserves is None:
+            return None
+        reserve_in, reserve_out = reserves
+        return self.get_reserves_quote(amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out)
+
+    def get_reserves_quote(self, amount_in: int, reserve_in: int, reserve_out: int) -> Optional[Quote]:
+        amount_out = get_v2_amount_out(
+            amount_in=amount_in, reserve_in=reserve_in, reserve_out=reserve_out, fee_bps=ZEBRA_SWAP_FEE_BPS
+        )
+        if amount_out == 0:
+            return None
+        return Quote(dex=self.name, amount_out=amount_out)
+
+    @traced("quote.amount_out", dex=lambda dex: dex.name)
     async def _get_amount_out(
         self,
         amount_in: int,
@@ -38,6 +100,9 @@ class Zebra(Dex):
         Returns:
             Optional[int]: The calculated amount out, or None if an error occurs.
         """
+        quote = await self.get_local_quote(token_in=token_in, token_out=token_out, amount_in=amount_in)
+        if quote is not None:
+            return int(quote.amount_out * (1 - SLIPPAGE / 100))
         try:
             path = [token_in.contract_address, token_out.contract_address]
             data = await self.router.functions.getAmountsOut(amount_in, path).call()
@@ -50,16 +115,22 @@ class Zebra(Dex):
             return None
 
     async def _swap_exact_tokens_for_tokens(
-        self, token_in: Token, token_out: Token, value: int, slippage: Union[int, float]
+        self,
+        token_in: Token,
+        token_out: Token,
+        value: int,
+        slippage: Union[int, float],
+        quote: Optional[Quote] = None,
     ) -> Optional[HexBytes]:
         swap_data = await self._prepare_swap_data(
-            token_in=token_in, token_out=token_out, amount_in=value, slippage=slippage
+            token_in=token_in, token_out=token_out, amount_in=value, slippage=slippage, quote=quote
         )
         if swap_data is None:
             return None
         min_amount_out, deadline = swap_data
         path = [token_in.contract_address, token_out.contract_address]
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactTokensForTokens",
             args=(value, min_amount_out, path, self.client.address, deadline),
         )
@@ -70,17 +141,18 @@ class Zebra(Dex):
             return None
 
     async def _swap_exact_tokens_for_eth(
-        self, token_in: Token, value: int, slippage: Union[int, float]
+        self, token_in: Token, value: int, slippage: Union[int, float], quote: Optional[Quote] = None
     ) -> Optional[HexBytes]:
         token_out = WETH
         swap_data = await self._prepare_swap_data(
-            token_in=token_in, token_out=token_out, amount_in=value, slippage=slippage
+            token_in=token_in, token_out=token_out, amount_in=value, slippage=slippage, quote=quote
         )
         if swap_data is None:
             return None
         min_amount_out, deadline = swap_data
         path = [token_in.contract_address, token_out.contract_address]
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactTokensForETH",
             args=(value, min_amount_out, path, self.client.address, deadline),
         )
@@ -91,7 +163,7 @@ class Zebra(Dex):
             return None
 
     async def _swap_exact_eth_for_tokens(
-        self, token_out: Token, value: int, slippage: Union[int, float]
+        self, token_out: Token, value: int, slippage: Union[int, float], quote: Optional[Quote] = None
     ) -> Optional[HexBytes]:
         """
         Swap a specific amount of Ethereum for tokens with a specified slippage using the Uniswap V2 Router.
@@ -100,19 +172,21 @@ class Zebra(Dex):
             token_out (Token): The output token to receive from the swap.
             value (int): The amount of Ethereum to be swapped.
             slippage (Union[int, float]): The allowed slippage percentage for the swap.
+            quote (Optional[Quote]): A pre-fetched quote; if omitted the router is queried.
 
         Returns:
             Optional[HexBytes]: The transaction hash if the swap is successful, None otherwise.
         """
         token_in = WETH
         swap_data = await self._prepare_swap_data(
-            token_in=token_in, token_out=token_out, amount_in=value, slippage=slippage
+            token_in=token_in, token_out=token_out, amount_in=value, slippage=slippage, quote=quote
         )
         if swap_data is None:
             return None
         min_amount_out, deadline = swap_data
         path = [token_in.contract_address, token_out.contract_address]
-        data = self.router.encodeABI(
+        data = encode_function_call(
+            abi=self.router.abi,
             fn_name="swapExactETHForTokens",
             args=(min_amount_out, path, self.client.address, deadline),
         )
@@ -128,6 +202,7 @@ class Zebra(Dex):
         token_out: Token,
         amount_in: int,
         slippage: Union[int, float],
+        quote: Optional[Quote] = None,
     ) -> Optional[Tuple[int, int]]:
         """
         Prepare data for a token swap, including the minimum amount of output tokens
@@ -138,19 +213,23 @@ class Zebra(Dex):
             token_out (Token): The output token to receive from the swap.
             amount_in (int): The amount of input tokens to be swapped.
             slippage (Union[int, float]): The allowed slippage percentage for the swap.
+            quote (Optional[Quote]): A pre-fetched quote; if omitted the router is queried.
 
         Returns:
             Optional[Tuple[int, int]]: A tuple containing the minimum amount of output tokens
             and the deadline for the transaction in seconds since the Unix epoch. Returns
             None if there's an error in calculating the minimum amount.
         """
-        min_amount_out = await self._get_amount_out(
-            amount_in=amount_in,
-            token_in=token_in,
-            token_out=token_out,
-        )
-        if min_amount_out is None:
-            return None
+        if quote is not None:
+            min_amount_out = int(quote.amount_out * (1 - SLIPPAGE / 100))
+        else:
+            min_amount_out = await self._get_amount_out(
+                amount_in=amount_in,
+                token_in=token_in,
+                token_out=token_out,
+            )
+            if min_amount_out is None:
+                return None
         if not await self.client.is_amount_out_suitable(
             token_in=token_in,
             token_out=token_out,
@@ -162,19 +241,27 @@ class Zebra(Dex):
         return min_amount_out, self.client.get_deadline()
 
     @gas_delay()
-    async def swap(self, token_in: Token, token_out: Token, amount: int, slippage: int = SLIPPAGE) -> bool:
+    @track_swap_latency()
+    async def swap(
+        self, token_in: Token, token_out: Token, amount: int, quote: Optional[Quote] = None, slippage: int = SLIPPAGE
+    ) -> bool:
         logger.info(f"[Zebra] Swapping {amount} {token_in.symbol} to {token_out.symbol}")
 
+        self.client.prefetch_token_price(token_list=(token_in, token_out))
         amount = token_in.to_wei(value=amount)
         if not await self.client.approve(spender=self.router.address, token=token_in, value=amount):
             return False
 
         if token_in == ETH:
-            tx_hash = await self._swap_exact_eth_for_tokens(token_out=token_out, value=amount, slippage=slippage)
+            tx_hash = await self._swap_exact_eth_for_tokens(
+                token_out=token_out, value=amount, slippage=slippage, quote=quote
+            )
         elif token_out == ETH:
-            tx_hash = await self._swap_exact_tokens_for_eth(token_in=token_in, value=amount, slippage=slippage)
+            tx_hash = await self._swap_exact_tokens_for_eth(
+                token_in=token_in, value=amount, slippage=slippage, quote=quote
+            )
         else:
             tx_hash = await self._swap_exact_tokens_for_tokens(
-                token_in=token_in, token_out=token_out, value=amount, slippage=slippage
+                token_in=token_in, token_out=token_out, value=amount, slippage=slippage, quote=quote
             )
         return await self.client.verify_tx(tx_hash=tx_hash)
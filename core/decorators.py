@@ -1,15 +1,29 @@
 import asyncio
 import random
+from enum import Enum
 from functools import wraps
 from typing import List
 
+from aiohttp import ClientError, ClientResponseError, InvalidURL
 from tqdm import tqdm
 from web3 import AsyncWeb3
+from web3.exceptions import ContractLogicError
 
 from config import GAS_DELAY_RANGE, GAS_THRESHOLD
-from core.constants import RETRIES, RETRY_DELAY_RANGE
+from core.constants import (
+    RATE_LIMIT_BACKOFF_MULTIPLIER,
+    RETRIES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+)
+from core.dry_run import is_dry_run
+from core.exceptions import CassetteMissError
+from core.tracing import span
 from logger import logger
-from utils import get_chain_gas_price, sleep
+from utils import get_chain_gas_price, sleep, sleep_seconds
+
+RATE_LIMIT_ERROR_MESSAGES = ("rate limit", "too many requests")
+PERMANENT_ERROR_MESSAGES = ("execution reverted", "insufficient funds", "intrinsic gas too low", "invalid sender")
 
 
 def wait(delay_range: List):
@@ -25,16 +39,66 @@ def wait(delay_range: List):
     return decorator
 
 
-def retry_on_fail(tries: int = RETRIES, retry_delay: List[int] = RETRY_DELAY_RANGE):
+class ErrorKind(Enum):
+    TRANSPORT = "transport"
+    RATE_LIMIT = "rate limit"
+    PERMANENT = "permanent"
+
+
+def classify_error(error: Exception) -> ErrorKind:
+    if isinstance(error, (ContractLogicError, InvalidURL, CassetteMissError)):
+        return ErrorKind.PERMANENT
+    if isinstance(error, ClientResponseError):
+        if error.status == 429:
+            return ErrorKind.RATE_LIMIT
+        return ErrorKind.TRANSPORT if error.status >= 500 else ErrorKind.PERMANENT
+    if isinstance(error, (ClientError, asyncio.TimeoutError, ConnectionError)):
+        return ErrorKind.TRANSPORT
+
+    # web3 raises JSON-RPC errors as ValueError({"code": ..., "message": ...})
+    message = str(error).lower()
+    if any(text in message for text in RATE_LIMIT_ERROR_MESSAGES) or "429" in message:
+        return ErrorKind.RATE_LIMIT
+    if any(text in message for text in PERMANENT_ERROR_MESSAGES):
+        return ErrorKind.PERMANENT
+    return ErrorKind.TRANSPORT
+
+
+def get_backoff_delay(attempt: int, error_kind: ErrorKind) -> float:
+    """
+    Exponential backoff with full jitter, rate limits back off longer.
+    """
+    delay = RETRY_BACKOFF_BASE * 2**attempt
+    if error_kind is ErrorKind.RATE_LIMIT:
+        delay *= RATE_LIMIT_BACKOFF_MULTIPLIER
+    return random.uniform(0, min(delay, RETRY_BACKOFF_MAX))
+
+
+def retry_on_fail(tries: int = RETRIES):
+    """
+    Retries the coroutine while it raises or returns None/False, returns False when the attempts run out.
+    Raised errors are classified: permanent ones (reverts, client errors) aren't retried at all.
+    """
+
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            for _ in range(tries):
-                result = await func(*args, **kwargs)
-                if result is None or result is False:
-                    await sleep(delay_range=retry_delay, send_message=False)
+            for attempt in range(tries):
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    error_kind = classify_error(error=e)
+                    if error_kind is ErrorKind.PERMANENT:
+                        logger.debug(f"{func.__qualname__} failed with a permanent error, not retrying: {e}")
+                        return False
                 else:
-                    return result
+                    if result is not None and result is not False:
+                        return result
+                    error_kind = ErrorKind.TRANSPORT
+                if attempt < tries - 1:
+                    delay = get_backoff_delay(attempt=attempt, error_kind=error_kind)
+                    logger.debug(f"{func.__qualname__} failed ({error_kind.value}), retrying in {delay:.1f} seconds")
+                    await sleep_seconds(delay=delay)
             return False
 
         return wrapper
@@ -46,24 +110,28 @@ def gas_delay(gas_threshold: int = GAS_THRESHOLD, delay_range: List = GAS_DELAY_
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            while True:
-                current_eth_gas_price = await get_chain_gas_price()
-                threshold = AsyncWeb3.to_wei(gas_threshold, "gwei")
-                if current_eth_gas_price > threshold:
-                    random_delay = random.randint(*delay_range)
-
-                    logger.warning(
-                        f"Current gas fee {round(AsyncWeb3.from_wei(current_eth_gas_price, 'gwei'), 2)} GWEI > "
-                        f"Gas threshold {AsyncWeb3.from_wei(threshold, 'gwei')} GWEI. "
-                        f"Waiting for {random_delay} seconds...",
-                    )
-
-                    with tqdm(total=random_delay, desc="Waiting", unit="s", dynamic_ncols=True, colour="blue") as pbar:
-                        for _ in range(random_delay):
-                            await asyncio.sleep(1)
-                            pbar.update(1)
-                else:
-                    break
+            with span("gas_delay"):
+                # a dry run plans the action whatever the gas price is
+                while not is_dry_run():
+                    current_eth_gas_price = await get_chain_gas_price()
+                    threshold = AsyncWeb3.to_wei(gas_threshold, "gwei")
+                    if current_eth_gas_price > threshold:
+                        random_delay = random.randint(*delay_range)
+
+                        logger.warning(
+                            f"Current gas fee {round(AsyncWeb3.from_wei(current_eth_gas_price, 'gwei'), 2)} GWEI > "
+                            f"Gas threshold {AsyncWeb3.from_wei(threshold, 'gwei')} GWEI. "
+                            f"Waiting for {random_delay} seconds...",
+                        )
+
+                        with tqdm(
+                            total=random_delay, desc="Waiting", unit="s", dynamic_ncols=True, colour="blue"
+                        ) as pbar:
+                            for _ in range(random_delay):
+                                await asyncio.sleep(1)
+                                pbar.update(1)
+                    else:
+                        break
 
             return await func(*args, **kwargs)
 
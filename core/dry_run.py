@@ -0,0 +1,77 @@
+import json
+import statistics
+from collections import Counter
+from typing import Dict, Optional, Set
+
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from logger import logger
+from utils import disable_pacing_delays
+
+from .chain import Chain
+from .fee_estimator import get_max_fee_per_gas
+from .rpc_stats import get_current_action, get_wallet_action_times
+
+_DRY_RUN = False
+# hashes returned for the transactions that were planned instead of sent
+_PLANNED_TX_HASHES: Set[HexBytes] = set()
+# (module, dapp) -> planned transactions
+_PLANNED_TX_COUNTS: Counter = Counter()
+
+
+def enable_dry_run() -> None:
+    """
+    Modules go through the whole planning of every action but transactions are only built, estimated and signed.
+    Nothing is sent or withdrawn, waits for funds succeed right away, the delays between actions
+    and database saves are skipped.
+    """
+    global _DRY_RUN
+    _DRY_RUN = True
+    disable_pacing_delays()
+
+
+def is_dry_run() -> bool:
+    return _DRY_RUN
+
+
+def record_planned_transaction(chain: Chain, tx_params: Dict, tx_hash: Optional[HexBytes] = None) -> HexBytes:
+    """
+    Logs the transaction that would have been sent and returns a hash `verify_tx` accepts.
+    Without a gas limit the estimate failed, e.g. because it depends on an approval that was only planned.
+    """
+    module, dapp = get_current_action()
+    _PLANNED_TX_COUNTS[(module, dapp)] += 1
+    if tx_hash is None:
+        tx_hash = HexBytes(keccak(text=json.dumps(tx_params, sort_keys=True, default=str)))
+    _PLANNED_TX_HASHES.add(tx_hash)
+
+    data = tx_params.get("data") or "0x"
+    logger.info(
+        f"[DryRun] {module}/{dapp} would send to {tx_params['to']} on {chain.name}: "
+        f"value {tx_params.get('value', 0)}, call {data[:10]} ({(len(data) - 2) // 2} bytes), "
+        f"gas {tx_params.get('gas', 'not estimated')}, max fee per gas {get_max_fee_per_gas(tx_params=tx_params)}"
+    )
+    return tx_hash
+
+
+def is_planned_transaction(tx_hash: HexBytes) -> bool:
+    return HexBytes(tx_hash) in _PLANNED_TX_HASHES
+
+
+def log_dry_run_summary() -> None:
+    if not _DRY_RUN:
+        return
+    for (module, dapp), count in sorted(_PLANNED_TX_COUNTS.items()):
+        logger.info(f"[DryRun] {module}/{dapp}: {count} transactions planned")
+
+    planning_times = sorted(get_wallet_action_times().values())
+    if not planning_times:
+        return
+    logger.info(
+        f"[DryRun] Planning time per wallet over {len(planning_times)} wallets: "
+        f"mean {statistics.mean(planning_times) * 1000:.0f} ms, "
+        f"p50 {planning_times[len(planning_times) // 2] * 1000:.0f} ms, "
+        f"p99 {planning_times[min(len(planning_times) - 1, int(len(planning_times) * 0.99))] * 1000:.0f} ms, "
+        f"total {sum(planning_times):.1f} s"
+    )
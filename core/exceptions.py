@@ -12,4 +12,21 @@ class NoRPCEndpointSpecifiedError(Exception):
 class WithdrawalCancelledError(Exception):
     def __init__(self, message: str = "Withdrawal cancelled", *args: object) -> None:
         self.message = message
-        super().__init__(self.message, *args)
\ No newline at end of file
+        super().__init__(self.message, *args)
+
+class CassetteMissError(Exception):
+    def __init__(self, request: str, message: str = "No recorded response for {} in the cassette", *args: object) -> None:
+        self.message = message.format(request)
+        super().__init__(self.message, *args)
+
+
+class PoolNotFoundError(Exception):
+    def __init__(self, reason: str, message: str = "The pool doesn't exist or can't quote: {}", *args: object) -> None:
+        self.message = message.format(reason)
+        super().__init__(self.message, *args)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str, message: str = "{} is failing, requests to it are paused", *args: object) -> None:
+        self.message = message.format(name)
+        super().__init__(self.message, *args)
@@ -0,0 +1,88 @@
+import asyncio
+import statistics
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+from .chain import Chain
+from .constants import (
+    CHAIN_BLOCK_TIMES,
+    FEE_HISTORY_BLOCKS,
+    FEE_HISTORY_REWARD_PERCENTILE,
+    GAS_PRICE_MULTIPLIER,
+    MAX_FEE_BASE_FEE_MULTIPLIER,
+)
+
+if TYPE_CHECKING:
+    from .client import Client
+
+
+class FeeEstimator:
+    """
+    Fees of one chain, shared by all wallets. The chain's fee data is fetched at most once per block,
+    the fee fields of every transaction are then taken from the cache without an RPC call.
+
+    EIP-1559 chains keep an `eth_feeHistory` window: the priority fee is the median reward of the non-empty
+    blocks in it and the max fee leaves room for the base fee of the next block to double.
+    Legacy chains cache `eth_gasPrice` with `GAS_PRICE_MULTIPLIER` on top.
+    """
+
+    def __init__(self, chain: Chain) -> None:
+        self.chain = chain
+        self.refresh_interval = CHAIN_BLOCK_TIMES.get(chain.chain_id, 1)
+        self._fee_params: Optional[Dict[str, int]] = None
+        self._refreshed_at = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    async def _fetch_eip1559_fee_params(self, client: "Client") -> Dict[str, int]:
+        fee_history = await client.w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [FEE_HISTORY_REWARD_PERCENTILE])
+        # the window holds one more base fee than blocks, the one of the block being built
+        next_base_fee = fee_history["baseFeePerGas"][-1]
+        rewards = [
+            reward[0]
+            for reward, gas_used_ratio in zip(fee_history["reward"], fee_history["gasUsedRatio"])
+            if gas_used_ratio > 0
+        ]
+        priority_fee = int(statistics.median(rewards)) if rewards else 0
+        return {
+            "maxFeePerGas": next_base_fee * MAX_FEE_BASE_FEE_MULTIPLIER + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
+
+    async def _fetch_legacy_fee_params(self, client: "Client") -> Dict[str, int]:
+        gas_price = await client.w3.eth.gas_price
+        return {"gasPrice": int(gas_price * GAS_PRICE_MULTIPLIER)}
+
+    async def _refresh(self, client: "Client") -> None:
+        if self.chain.eip1559:
+            self._fee_params = await self._fetch_eip1559_fee_params(client=client)
+        else:
+            self._fee_params = await self._fetch_legacy_fee_params(client=client)
+        self._refreshed_at = time.monotonic()
+
+    async def get_fee_params(self, client: "Client") -> Dict[str, int]:
+        """
+        Returns the fee fields of a transaction, either `gasPrice` or `maxFeePerGas` and `maxPriorityFeePerGas`.
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if time.monotonic() - self._refreshed_at > self.refresh_interval:
+            async with self._refresh_lock:
+                if time.monotonic() - self._refreshed_at > self.refresh_interval:
+                    await self._refresh(client=client)
+        return dict(self._fee_params)
+
+
+_FEE_ESTIMATORS: Dict[str, FeeEstimator] = {}
+
+
+def get_fee_estimator(chain: Chain) -> FeeEstimator:
+    if chain.name not in _FEE_ESTIMATORS:
+        _FEE_ESTIMATORS[chain.name] = FeeEstimator(chain=chain)
+    return _FEE_ESTIMATORS[chain.name]
+
+
+def get_max_fee_per_gas(tx_params: Dict[str, Union[str, int]]) -> int:
+    """
+    The most a transaction can pay per gas, what the node checks the balance against.
+    """
+    return tx_params.get("maxFeePerGas", tx_params.get("gasPrice"))
@@ -0,0 +1,66 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Tuple, Union
+
+from hexbytes import HexBytes
+
+from logger import logger
+
+from .constants import (
+    GAS_MODEL_CHAIN_IDS,
+    GAS_MODEL_LIMIT_MULTIPLIER,
+    GAS_MODEL_MIN_SAMPLES,
+    GAS_MODEL_STORAGE_HEADROOM,
+    GAS_MODEL_WINDOW,
+)
+
+# gas used by a plain value transfer to an account without code
+INTRINSIC_TRANSFER_GAS = 21000
+
+# (chain id, lowercased `to` address, function selector or "0x" for plain transfers)
+GasModelKey = Tuple[int, str, str]
+
+
+class GasModel:
+    """
+    Gas used by identically shaped calls, learned from the receipts of all wallets. Once a call
+    shape has enough receipts, its gas limit is derived from them instead of `estimate_gas`.
+    """
+
+    def __init__(self) -> None:
+        self._gas_used: Dict[GasModelKey, Deque[int]] = defaultdict(lambda: deque(maxlen=GAS_MODEL_WINDOW))
+        # hash of a sent transaction -> (key of its call shape, whether its gas limit came from the model)
+        self._pending: Dict[bytes, Tuple[GasModelKey, bool]] = {}
+
+    @staticmethod
+    def get_key(tx_params: Dict[str, Union[str, int]]) -> Optional[GasModelKey]:
+        if tx_params["chainId"] not in GAS_MODEL_CHAIN_IDS:
+            return None
+        data = tx_params.get("data") or "0x"
+        return tx_params["chainId"], tx_params["to"].lower(), data[:10]
+
+    def get_gas_limit(self, key: Optional[GasModelKey]) -> Optional[int]:
+        gas_used = self._gas_used.get(key)
+        if gas_used is None or len(gas_used) < GAS_MODEL_MIN_SAMPLES:
+            return None
+        return int(max(gas_used) * GAS_MODEL_LIMIT_MULTIPLIER) + GAS_MODEL_STORAGE_HEADROOM
+
+    def track(self, tx_hash: HexBytes, key: Optional[GasModelKey], gas_limit_from_model: bool) -> None:
+        if key is not None:
+            self._pending[bytes(tx_hash)] = (key, gas_limit_from_model)
+
+    def record_receipt(self, tx_hash: HexBytes, receipt: Optional[Dict]) -> None:
+        pending = self._pending.pop(bytes(tx_hash), None)
+        if pending is None or receipt is None:
+            return
+        key, gas_limit_from_model = pending
+        if receipt.get("status") != 1:
+            # the learned limit may be what made it fail, the call shape goes back to estimates
+            if gas_limit_from_model and self._gas_used.pop(key, None) is not None:
+                logger.warning(f"[GasModel] Forgot gas limit of {key[2]} calls to {key[1]} after a failed transaction")
+            return
+        self._gas_used[key].append(receipt["gasUsed"])
+        if len(self._gas_used[key]) == GAS_MODEL_MIN_SAMPLES:
+            logger.debug(f"[GasModel] Learned gas limit {self.get_gas_limit(key=key)} for {key[2]} calls to {key[1]}")
+
+
+gas_model = GasModel()
@@ -14,7 +14,9 @@ from core.exceptions import WithdrawalCancelledError
 from logger import logger
 from core import Client, Chain
 from core.chain import ARBITRUM
+from core.dry_run import is_dry_run
 from core.token import Token, ETH
+from core.tracing import traced
 from utils import sleep
 
 
@@ -47,6 +49,9 @@ class Okx:
         logger.info(
             f"[OKX] Trying to withdraw {amount} {token.symbol} to {self.client} ({self.client.chain.name})"
         )
+        if is_dry_run():
+            logger.info(f"[DryRun] Withdrawal of {amount} {token.symbol} skipped")
+            return True
         async with self.exchange as exchange:
             try:
                 initial_balance = await self.client.get_token_balance(ETH)
@@ -123,6 +128,7 @@ class Okx:
         )
         return withdrawal_finalized and withdrawal_recieved
 
+    @traced("okx.wait_for_withdrawal_status")
     async def _wait_for_withdrawal_final_status(self, withdrawal_id: str) -> bool:
         attempt_count = 1
         logger.info(f"[OKX] Waiting for withdrawal final status")
@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from types import FrameType
+from typing import List, Optional
+
+from logger import logger
+
+from .constants import (
+    PROFILE_OUTPUT_DIR,
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_SNAPSHOT_INTERVAL,
+    PROFILE_TOP_ALLOCATIONS,
+)
+
+
+@lru_cache(maxsize=None)
+def _get_short_path(file_path: str) -> str:
+    try:
+        return os.path.relpath(file_path)
+    except ValueError:
+        # a file on another drive on Windows
+        return file_path
+
+
+def _format_frame(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({_get_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """
+    Sampling profiler of the main thread plus periodic tracemalloc snapshots.
+
+    A background thread records the stack of the main thread every `sample_interval` seconds.
+    Since the whole bot runs on one event loop, time spent waiting for I/O shows up under
+    the selector of the loop, everything else is CPU time of the coroutines.
+    The samples are written as collapsed stacks, the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        output_dir: str = PROFILE_OUTPUT_DIR,
+        sample_interval: float = PROFILE_SAMPLE_INTERVAL,
+        snapshot_interval: float = PROFILE_SNAPSHOT_INTERVAL,
+    ) -> None:
+        self.name = name
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.snapshot_interval = snapshot_interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.main_thread().ident
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._first_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self._thread_id)
+        stack: List[str] = []
+        while frame is not None:
+            stack.append(_format_frame(frame))
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        # allocations of the profiler itself are left out
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    def _log_snapshot(self) -> None:
+        snapshot = self._take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        top_growth = snapshot.compare_to(self._first_snapshot, "lineno")[:3]
+        logger.debug(
+            f"[Profile] {current / 2**20:.1f} MB traced, peak {peak / 2**20:.1f} MB, largest growth: "
+            + ", ".join(f"{stat.traceback} {stat.size_diff / 1024:+.0f} KB" for stat in top_growth)
+        )
+
+    def _run(self) -> None:
+        last_snapshot_at = time.monotonic()
+        while not self._stopped.wait(self.sample_interval):
+            self._sample()
+            if time.monotonic() - last_snapshot_at > self.snapshot_interval:
+                self._log_snapshot()
+                last_snapshot_at = time.monotonic()
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._first_snapshot = self._take_snapshot()
+        self._sampler = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._sampler.start()
+        logger.info(f"[Profile] Profiling {self.name}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+        snapshot = self._take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        file_prefix = os.path.join(self.output_dir, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        with open(file=f"{file_prefix}.collapsed", mode="w") as stacks_file:
+            for stack, count in self.stacks.most_common():
+                stacks_file.write(f"{stack} {count}\n")
+        with open(file=f"{file_prefix}-allocations.txt", mode="w") as allocations_file:
+            allocations_file.write(f"Peak traced memory: {peak / 2**20:.1f} MB\n\nTop allocation sites:\n")
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]:
+                allocations_file.write(f"{stat}\n")
+            allocations_file.write("\nLargest growth since the start of the run:\n")
+            for stat in snapshot.compare_to(self._first_snapshot, "lineno")[:PROFILE_TOP_ALLOCATIONS]:
+                allocations_file.write(f"{stat}\n")
+
+        logger.info(
+            f"[Profile] {sum(self.stacks.values())} samples written to {file_prefix}.collapsed, "
+            f"allocations to {file_prefix}-allocations.txt"
+        )
+
+
+@contextmanager
+def profiled(name: str, enabled: bool = True):
+    """
+    Profiles the wrapped block if `enabled`, the reports are written when it exits.
+    """
+    if not enabled:
+        yield
+        return
+    profiler = Profiler(name=name)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
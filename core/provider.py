@@ -0,0 +1,420 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from aiohttp import ClientConnectorError, ClientResponseError
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+from web3._utils.request import async_make_post_request
+from web3.types import RPCEndpoint, RPCResponse
+
+from config import (
+    BROADCAST_TX_TO_ALL_RPCS,
+    RPC_HEALTH_CHECK_INTERVAL,
+    RPC_MAX_CONCURRENT_REQUESTS,
+    RPC_REQUESTS_PER_SECOND,
+)
+from logger import logger
+
+from .cassette import cassette
+from .circuit_breaker import get_circuit_breaker, get_proxy_circuit_breaker, is_proxy_error
+from .exceptions import CircuitOpenError
+from .rpc_stats import record_rpc_call
+
+# AIMD tuning of the per-endpoint limiters
+MIN_REQUESTS_PER_SECOND = 1
+RATE_INCREASE_STEP = 0.2
+MIN_CONCURRENT_REQUESTS = 1
+BACKOFF_RATIO = 0.5
+BACKOFF_COOLDOWN = 1
+SLOW_RESPONSE_THRESHOLD = 3
+
+# endpoint health tracking
+LATENCY_SMOOTHING = 0.3
+MAX_BLOCK_LAG = 5
+PROBE_TIMEOUT = 5
+
+THROTTLING_STATUS_CODES = {429, 500, 502, 503, 504}
+THROTTLING_ERROR_MESSAGES = ("rate limit", "too many requests")
+KNOWN_TRANSACTION_ERROR_MESSAGES = ("already known", "known transaction")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def drain(self) -> None:
+        self._refill()
+        self.tokens = 0
+
+
+class AIMDConcurrencyLimiter:
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def increase(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def decrease(self) -> None:
+        self.limit = max(self.min_limit, self.limit * BACKOFF_RATIO)
+
+
+class EndpointLimiter:
+    """
+    Token bucket plus AIMD concurrency control for a single RPC endpoint.
+
+    Every successful and fast response additively raises both the request rate and
+    the allowed concurrency; a throttling (429/5xx) or slow response halves them,
+    at most once per `BACKOFF_COOLDOWN` seconds.
+    """
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        requests_per_second: float = RPC_REQUESTS_PER_SECOND,
+        max_concurrent_requests: int = RPC_MAX_CONCURRENT_REQUESTS,
+    ) -> None:
+        self.endpoint_uri = endpoint_uri
+        self.max_requests_per_second = requests_per_second
+        self.bucket = TokenBucket(rate=requests_per_second, capacity=requests_per_second)
+        self.concurrency = AIMDConcurrencyLimiter(
+            initial_limit=max_concurrent_requests,
+            min_limit=MIN_CONCURRENT_REQUESTS,
+            max_limit=max_concurrent_requests,
+        )
+        self._last_backoff_at = 0.0
+
+    async def acquire(self) -> float:
+        await self.bucket.acquire()
+        await self.concurrency.acquire()
+        return time.monotonic()
+
+    async def release(self, started_at: float, throttled: bool) -> float:
+        latency = time.monotonic() - started_at
+        if throttled or latency > SLOW_RESPONSE_THRESHOLD:
+            self._back_off(reason="throttled" if throttled else f"slow response ({latency:.2f}s)")
+        else:
+            self.bucket.rate = min(self.max_requests_per_second, self.bucket.rate + RATE_INCREASE_STEP)
+            self.concurrency.increase()
+        await self.concurrency.release()
+        return latency
+
+    def _back_off(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_backoff_at < BACKOFF_COOLDOWN:
+            return
+        self._last_backoff_at = now
+        self.bucket.rate = max(MIN_REQUESTS_PER_SECOND, self.bucket.rate * BACKOFF_RATIO)
+        self.bucket.drain()
+        self.concurrency.decrease()
+        logger.debug(
+            f"[RPC] {self.endpoint_uri} {reason}, limits lowered to {self.bucket.rate:.1f} rps / "
+            f"{int(self.concurrency.limit)} concurrent requests"
+        )
+
+
+_ENDPOINT_LIMITERS: Dict[str, EndpointLimiter] = {}
+
+
+def get_endpoint_limiter(endpoint_uri: str) -> EndpointLimiter:
+    if endpoint_uri not in _ENDPOINT_LIMITERS:
+        _ENDPOINT_LIMITERS[endpoint_uri] = EndpointLimiter(endpoint_uri=endpoint_uri)
+    return _ENDPOINT_LIMITERS[endpoint_uri]
+
+
+def is_throttling_error(error: Exception) -> bool:
+    if isinstance(error, ClientResponseError):
+        return error.status in THROTTLING_STATUS_CODES
+    return isinstance(error, asyncio.TimeoutError)
+
+
+def is_undelivered_error(error: Exception) -> bool:
+    # the request never reached a node, so a raw transaction may safely be sent elsewhere
+    if isinstance(error, ClientResponseError):
+        return error.status == 429
+    return isinstance(error, (ClientConnectorError, CircuitOpenError))
+
+
+def is_known_transaction_response(response: RPCResponse) -> bool:
+    error = response.get("error")
+    if not isinstance(error, dict):
+        return False
+    message = str(error.get("message", "")).lower()
+    return any(text in message for text in KNOWN_TRANSACTION_ERROR_MESSAGES)
+
+
+def is_throttling_response(response: RPCResponse) -> bool:
+    error = response.get("error")
+    if not isinstance(error, dict):
+        return False
+    message = str(error.get("message", "")).lower()
+    return error.get("code") in (429, -32005) or any(text in message for text in THROTTLING_ERROR_MESSAGES)
+
+
+class Endpoint:
+    def __init__(self, uri: str) -> None:
+        self.uri = uri
+        self.limiter = get_endpoint_limiter(endpoint_uri=uri)
+        self.circuit_breaker = get_circuit_breaker(name=f"RPC {uri}")
+        self.latency: Optional[float] = None
+        self.block_number: Optional[int] = None
+        self.healthy = True
+
+    def __str__(self) -> str:
+        return self.uri
+
+    def record_success(self, latency: float) -> None:
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+        self.healthy = True
+
+    def record_failure(self) -> None:
+        if self.healthy:
+            logger.warning(f"[RPC] {self.uri} marked as unhealthy")
+        self.healthy = False
+
+
+class EndpointPool:
+    """
+    Set of RPC endpoints of a single chain.
+
+    Endpoints are ordered by their smoothed latency; unhealthy ones are kept at the end of
+    the routing order and are only used when every healthy endpoint has failed. A probe
+    (`eth_blockNumber` on every endpoint) runs at most once per `RPC_HEALTH_CHECK_INTERVAL`
+    seconds and also marks endpoints lagging more than `MAX_BLOCK_LAG` blocks as unhealthy.
+    """
+
+    def __init__(self, uris: Sequence[str]) -> None:
+        self.endpoints = [Endpoint(uri=uri) for uri in uris]
+        self._last_probe_at = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def get_routing_order(self) -> List[Endpoint]:
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+        unhealthy = [endpoint for endpoint in self.endpoints if not endpoint.healthy]
+        healthy.sort(key=lambda endpoint: endpoint.latency if endpoint.latency is not None else 0)
+        return healthy + unhealthy
+
+    def schedule_probe(self, request_kwargs: Dict[str, Any]) -> None:
+        if len(self.endpoints) < 2 or time.monotonic() - self._last_probe_at < RPC_HEALTH_CHECK_INTERVAL:
+            return
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        self._last_probe_at = time.monotonic()
+        self._probe_task = asyncio.ensure_future(self.probe(request_kwargs=request_kwargs))
+
+    async def probe(self, request_kwargs: Dict[str, Any]) -> None:
+        await asyncio.gather(
+            *[self._probe_endpoint(endpoint=endpoint, request_kwargs=request_kwargs) for endpoint in self.endpoints]
+        )
+
+        probed_endpoints = [
+            endpoint for endpoint in self.endpoints if endpoint.healthy and endpoint.block_number is not None
+        ]
+        if not probed_endpoints:
+            return
+        latest_block = max(endpoint.block_number for endpoint in probed_endpoints)
+        for endpoint in probed_endpoints:
+            if latest_block - endpoint.block_number > MAX_BLOCK_LAG:
+                logger.warning(f"[RPC] {endpoint} is {latest_block - endpoint.block_number} blocks behind")
+                endpoint.record_failure()
+
+    async def _probe_endpoint(self, endpoint: Endpoint, request_kwargs: Dict[str, Any]) -> None:
+        started_at = time.monotonic()
+        try:
+            # same proxy and headers as the requests themselves, only with a shorter timeout
+            raw_response = await async_make_post_request(
+                endpoint.uri,
+                b'{"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 0}',
+                **{**request_kwargs, "timeout": PROBE_TIMEOUT},
+            )
+            endpoint.block_number = int(json.loads(raw_response)["result"], 16)
+            endpoint.record_success(latency=time.monotonic() - started_at)
+        except Exception as e:
+            logger.debug(f"[RPC] Health check of {endpoint} failed: {e}")
+            endpoint.record_failure()
+
+
+_ENDPOINT_POOLS: Dict[Sequence[str], EndpointPool] = {}
+
+
+def get_endpoint_pool(uris: Sequence[str]) -> EndpointPool:
+    key = tuple(uris)
+    if key not in _ENDPOINT_POOLS:
+        _ENDPOINT_POOLS[key] = EndpointPool(uris=key)
+    return _ENDPOINT_POOLS[key]
+
+
+class PooledHTTPProvider(AsyncWeb3.AsyncHTTPProvider):
+    """
+    HTTP provider on top of a shared `EndpointPool`.
+
+    Requests go to the fastest healthy endpoint through its shared rate limiter and fail
+    over to the next one on transport errors or throttling. Raw transactions can optionally
+    be broadcast to every healthy endpoint at once (`BROADCAST_TX_TO_ALL_RPCS`); otherwise they
+    only fail over when the request surely didn't reach a node, and an "already known" answer
+    is returned as the locally computed transaction hash.
+    """
+
+    def __init__(
+        self,
+        endpoint_uris: Sequence[str],
+        request_kwargs: Optional[Dict[str, Any]] = None,
+        broadcast_transactions: bool = BROADCAST_TX_TO_ALL_RPCS,
+    ) -> None:
+        super().__init__(endpoint_uri=endpoint_uris[0], request_kwargs=request_kwargs)
+        self.pool = get_endpoint_pool(uris=endpoint_uris)
+        self.broadcast_transactions = broadcast_transactions
+        proxy = self.get_request_kwargs().get("proxy")
+        self.proxy_circuit_breaker = get_proxy_circuit_breaker(proxy=proxy) if proxy else None
+
+    def __str__(self) -> str:
+        return f"RPC pool {[str(endpoint) for endpoint in self.pool.endpoints]}"
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        if cassette.replaying:
+            # the first configured endpoint tells the chains apart, whichever endpoint answered
+            response = cassette.replay_rpc(endpoint=self.endpoint_uri, method=method, request_data=request_data)
+            record_rpc_call(method=method, request_bytes=len(request_data), response_bytes=0, latency=0, failed=False)
+            return response
+
+        self.pool.schedule_probe(request_kwargs=self.get_request_kwargs())
+        response = await self._route_request(method=method, request_data=request_data)
+        if cassette.recording:
+            cassette.record_rpc(endpoint=self.endpoint_uri, method=method, request_data=request_data, response=response)
+        return response
+
+    async def _route_request(self, method: RPCEndpoint, request_data: bytes) -> RPCResponse:
+        if method == "eth_sendRawTransaction" and self.broadcast_transactions:
+            healthy_endpoints = [endpoint for endpoint in self.pool.get_routing_order() if endpoint.healthy]
+            if len(healthy_endpoints) > 1:
+                return await self._broadcast(endpoints=healthy_endpoints, method=method, request_data=request_data)
+
+        if self.proxy_circuit_breaker is not None and not self.proxy_circuit_breaker.allow_request():
+            raise CircuitOpenError(name=self.proxy_circuit_breaker.name)
+
+        last_error: Optional[Exception] = None
+        response: Optional[RPCResponse] = None
+        for endpoint in self.pool.get_routing_order():
+            if not endpoint.circuit_breaker.allow_request():
+                continue
+            try:
+                response = await self._request_endpoint(endpoint=endpoint, method=method, request_data=request_data)
+            except Exception as e:
+                logger.debug(f"[RPC] {method} failed on {endpoint}: {e}")
+                if method == "eth_sendRawTransaction" and not is_undelivered_error(e):
+                    # the node may have accepted the transaction, it is checked by its hash instead
+                    raise
+                last_error = e
+                continue
+            if not is_throttling_response(response):
+                return response
+        if response is not None:
+            return response
+        if last_error is None:
+            # every endpoint of the chain is failing, the request isn't even tried
+            raise CircuitOpenError(name=str(self))
+        raise last_error
+
+    async def _request_endpoint(self, endpoint: Endpoint, method: RPCEndpoint, request_data: bytes) -> RPCResponse:
+        started_at = await endpoint.limiter.acquire()
+        throttled = False
+        try:
+            raw_response = await async_make_post_request(endpoint.uri, request_data, **self.get_request_kwargs())
+            response = self.decode_rpc_response(raw_response)
+            throttled = is_throttling_response(response)
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            latency = await endpoint.limiter.release(started_at=started_at, throttled=throttled)
+            record_rpc_call(
+                method=method, request_bytes=len(request_data), response_bytes=0, latency=latency, failed=True
+            )
+            if is_proxy_error(e) and self.proxy_circuit_breaker is not None:
+                # the endpoint itself may be fine
+                self.proxy_circuit_breaker.record_failure()
+            else:
+                endpoint.record_failure()
+                endpoint.circuit_breaker.record_failure()
+            raise
+        latency = await endpoint.limiter.release(started_at=started_at, throttled=throttled)
+        record_rpc_call(
+            method=method,
+            request_bytes=len(request_data),
+            response_bytes=len(raw_response),
+            latency=latency,
+            failed="error" in response,
+        )
+        endpoint.record_success(latency=latency)
+        endpoint.circuit_breaker.record_success()
+        if self.proxy_circuit_breaker is not None:
+            self.proxy_circuit_breaker.record_success()
+        if method == "eth_sendRawTransaction" and is_known_transaction_response(response):
+            return self._get_known_transaction_response(request_data=request_data, response=response)
+        return response
+
+    @staticmethod
+    def _get_known_transaction_response(request_data: bytes, response: RPCResponse) -> RPCResponse:
+        # the node already has the transaction, e.g. from an earlier attempt or another endpoint
+        raw_transaction = HexBytes(json.loads(request_data)["params"][0])
+        return {"jsonrpc": "2.0", "id": response.get("id"), "result": "0x" + keccak(raw_transaction).hex()}
+
+    async def _broadcast(self, endpoints: List[Endpoint], method: RPCEndpoint, request_data: bytes) -> RPCResponse:
+        tasks = [
+            asyncio.ensure_future(
+                self._request_endpoint(endpoint=endpoint, method=method, request_data=request_data)
+            )
+            for endpoint in endpoints
+        ]
+        for task in tasks:
+            # the slower broadcasts keep running in the background, their errors are irrelevant
+            task.add_done_callback(lambda done_task: done_task.cancelled() or done_task.exception())
+
+        last_error: Optional[Exception] = None
+        response: Optional[RPCResponse] = None
+        for next_completed in asyncio.as_completed(tasks):
+            try:
+                response = await next_completed
+            except Exception as e:
+                last_error = e
+                continue
+            if "result" in response:
+                return response
+        if response is not None:
+            return response
+        raise last_error
@@ -0,0 +1,128 @@
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from logger import logger
+
+# (module, dapp) of every action running in the current task, outermost first
+_CURRENT_ACTIONS: ContextVar[Tuple[Tuple[str, str], ...]] = ContextVar("current_actions", default=())
+_CURRENT_WALLET: ContextVar[Optional[str]] = ContextVar("current_wallet", default=None)
+
+# calls made outside of any action, e.g. the pool cache warm-up
+NO_ACTION = ("-", "-")
+
+
+@dataclass
+class MethodStats:
+    calls: int = 0
+    errors: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latency: float = 0.0
+
+
+# (module, dapp) -> JSON-RPC method -> stats
+_METHOD_STATS: Dict[Tuple[str, str], Dict[str, MethodStats]] = defaultdict(lambda: defaultdict(MethodStats))
+_ACTION_COUNTS: Counter = Counter()
+# module -> outermost actions, e.g. volume cycles without the swaps inside them
+_MODULE_ACTIONS: Counter = Counter()
+# (module of the outermost action, JSON-RPC method) -> calls, a call is counted once however deep it's nested
+_MODULE_CALLS: Counter = Counter()
+_WALLET_CALLS: Counter = Counter()
+# wallet -> seconds spent in its outermost actions
+_WALLET_ACTION_TIMES: Dict[str, float] = defaultdict(float)
+
+
+@contextmanager
+def rpc_action(module: str, dapp: str, wallet: Optional[str] = None):
+    """
+    Attributes the RPC calls made inside the block to (module, dapp) and to the wallet. Actions can be
+    nested, e.g. a swap inside a volume cycle, and a call counts towards every enclosing action.
+    The records logged inside the block get the same fields.
+    """
+    _ACTION_COUNTS[(module, dapp)] += 1
+    outermost = not _CURRENT_ACTIONS.get()
+    if outermost:
+        _MODULE_ACTIONS[module] += 1
+    started_at = time.perf_counter()
+    actions_token = _CURRENT_ACTIONS.set(_CURRENT_ACTIONS.get() + ((module, dapp),))
+    wallet_token = _CURRENT_WALLET.set(wallet) if wallet is not None else None
+    log_fields = {"module": module, "dapp": dapp}
+    if wallet is not None:
+        log_fields["wallet"] = wallet
+    try:
+        with logger.contextualize(**log_fields):
+            yield
+    finally:
+        _CURRENT_ACTIONS.reset(actions_token)
+        if wallet_token is not None:
+            _CURRENT_WALLET.reset(wallet_token)
+        if outermost and wallet is not None:
+            _WALLET_ACTION_TIMES[wallet] += time.perf_counter() - started_at
+
+
+def record_rpc_call(method: str, request_bytes: int, response_bytes: int, latency: float, failed: bool) -> None:
+    actions = _CURRENT_ACTIONS.get() or (NO_ACTION,)
+    _MODULE_CALLS[(actions[0][0], method)] += 1
+    for action in actions:
+        stats = _METHOD_STATS[action][method]
+        stats.calls += 1
+        stats.errors += failed
+        stats.request_bytes += request_bytes
+        stats.response_bytes += response_bytes
+        stats.latency += latency
+
+    wallet = _CURRENT_WALLET.get()
+    if wallet is not None:
+        _WALLET_CALLS[wallet] += 1
+
+
+def get_current_action() -> Tuple[str, str]:
+    actions = _CURRENT_ACTIONS.get()
+    return actions[-1] if actions else NO_ACTION
+
+
+def get_wallet_action_times() -> Dict[str, float]:
+    return dict(_WALLET_ACTION_TIMES)
+
+
+def get_action_count(module: str) -> int:
+    return _MODULE_ACTIONS[module]
+
+
+def get_rpc_call_count(method: str, module: Optional[str] = None) -> int:
+    """
+    Calls of the method made inside actions of the module, or by the whole process if no module is given.
+    """
+    return sum(
+        count
+        for (call_module, call_method), count in _MODULE_CALLS.items()
+        if call_method == method and module in (None, call_module)
+    )
+
+
+def log_rpc_summary() -> None:
+    for (module, dapp), method_stats in sorted(_METHOD_STATS.items()):
+        actions = _ACTION_COUNTS[(module, dapp)] or 1
+        calls = sum(stats.calls for stats in method_stats.values())
+        errors = sum(stats.errors for stats in method_stats.values())
+        transferred = sum(stats.request_bytes + stats.response_bytes for stats in method_stats.values())
+        latency = sum(stats.latency for stats in method_stats.values())
+        methods = ", ".join(
+            f"{method} {stats.calls / actions:.1f}"
+            for method, stats in sorted(method_stats.items(), key=lambda item: -item[1].calls)
+        )
+        logger.info(
+            f"[RPC] {module}/{dapp}: {_ACTION_COUNTS[(module, dapp)]} actions, {calls / actions:.1f} calls, "
+            f"{transferred / actions / 1024:.1f} KB and {latency / actions * 1000:.0f} ms of RPC time per action, "
+            f"{errors} errors ({methods})"
+        )
+
+    if _WALLET_CALLS:
+        logger.info(
+            f"[RPC] {len(_WALLET_CALLS)} wallets, {sum(_WALLET_CALLS.values()) / len(_WALLET_CALLS):.1f} calls "
+            f"per wallet, max {max(_WALLET_CALLS.values())}"
+        )
@@ -0,0 +1,41 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict
+
+from eth_account import Account
+from eth_account.datastructures import SignedTransaction
+from eth_keys import keys
+from eth_keys.backends import get_backend_class
+from hexbytes import HexBytes
+
+from .constants import SIGNING_THREADS
+
+_SIGNING_EXECUTOR = ThreadPoolExecutor(max_workers=SIGNING_THREADS, thread_name_prefix="signer")
+
+
+@lru_cache(maxsize=None)
+def get_signing_key(private_key: str) -> keys.PrivateKey:
+    """
+    Parses the key once, `sign_transaction` derives the public key of a hex key on every call otherwise.
+    """
+    return keys.PrivateKey(HexBytes(private_key))
+
+
+def get_signing_backend_name() -> str:
+    # eth-keys uses libsecp256k1 through coincurve when it's installed, and pure Python math otherwise
+    return get_backend_class().__name__
+
+
+def sign_transaction_sync(tx_params: Dict, private_key: str) -> SignedTransaction:
+    return Account.sign_transaction(tx_params, get_signing_key(private_key=private_key))
+
+
+async def sign_transaction(tx_params: Dict, private_key: str) -> SignedTransaction:
+    """
+    Signs in a worker thread, so the RLP serialization, keccak and secp256k1 math of one transaction
+    don't stall the other coroutines. With coincurve the signature itself runs without the GIL.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _SIGNING_EXECUTOR, sign_transaction_sync, dict(tx_params), private_key
+    )
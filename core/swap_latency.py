@@ -0,0 +1,67 @@
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from logger import logger
+
+# (dex name, time the critical path started) of the swap running in the current task
+_CURRENT_SWAP: ContextVar[Optional[Tuple[str, float]]] = ContextVar("current_swap", default=None)
+_SWAP_LATENCIES: Dict[str, List[float]] = defaultdict(list)
+
+
+def track_swap_latency():
+    """
+    Measures the critical path of a `Dex.swap` call: the time from the start of the swap
+    until its transaction is sent, not counting approvals.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            token = _CURRENT_SWAP.set((self.name, time.perf_counter()))
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                _CURRENT_SWAP.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def pause_swap_latency():
+    """
+    Excludes the wrapped block from the critical path of the current swap, the clock restarts after it.
+    """
+    current_swap = _CURRENT_SWAP.get()
+    token = _CURRENT_SWAP.set(None)
+    try:
+        yield
+    finally:
+        _CURRENT_SWAP.reset(token)
+        if current_swap is not None:
+            _CURRENT_SWAP.set((current_swap[0], time.perf_counter()))
+
+
+def record_swap_sent() -> None:
+    current_swap = _CURRENT_SWAP.get()
+    if current_swap is None:
+        return
+    dex, started_at = current_swap
+    latency = time.perf_counter() - started_at
+    _SWAP_LATENCIES[dex].append(latency)
+    _CURRENT_SWAP.set(None)
+    logger.debug(f"[{dex.capitalize()}] Swap critical path: {latency * 1000:.0f} ms")
+
+
+def log_swap_latency_summary() -> None:
+    for dex, latencies in sorted(_SWAP_LATENCIES.items()):
+        logger.info(
+            f"[{dex.capitalize()}] {len(latencies)} swaps, critical path "
+            f"median {statistics.median(latencies) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms"
+        )
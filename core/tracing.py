@@ -0,0 +1,107 @@
+import bisect
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+from logger import logger
+
+from .constants import METRICS_EXPORT_INTERVAL, METRICS_FILE_PATH, SPAN_HISTOGRAM_BUCKETS
+
+METRIC_NAME = "scroll_machine_span_duration_seconds"
+
+
+class Histogram:
+    def __init__(self, buckets: List[float] = SPAN_HISTOGRAM_BUCKETS) -> None:
+        self.buckets = buckets
+        # the last counter is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# (span name, sorted label pairs) -> durations of the finished spans
+_HISTOGRAMS: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+_last_export_at = time.monotonic()
+
+
+@contextmanager
+def span(name: str, **labels: str):
+    """
+    Times the wrapped block and adds its duration to the histogram of (name, labels).
+    Failed blocks are recorded too, with an `error` label.
+    """
+    started_at = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        if failed:
+            labels["error"] = "true"
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        if key not in _HISTOGRAMS:
+            _HISTOGRAMS[key] = Histogram()
+        _HISTOGRAMS[key].observe(time.perf_counter() - started_at)
+        if time.monotonic() - _last_export_at > METRICS_EXPORT_INTERVAL:
+            export_metrics()
+
+
+def traced(name: str, **label_getters: Callable):
+    """
+    Runs the decorated coroutine in a span. Label values are computed from the bound instance,
+    e.g. `@traced("quote.amount_out", dex=lambda dex: dex.name)`.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            with span(name, **{label: getter(self) for label, getter in label_getters.items()}):
+                return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    return ",".join(f'{label}="{value}"' for label, value in labels)
+
+
+def export_metrics(file_path: str = METRICS_FILE_PATH) -> None:
+    """
+    Writes all span histograms in the Prometheus text format, e.g. for the node_exporter textfile collector.
+    """
+    global _last_export_at
+    _last_export_at = time.monotonic()
+
+    lines = [
+        f"# HELP {METRIC_NAME} Duration of the traced phases of transactions, quotes and bridge waits.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for (name, labels), histogram in sorted(_HISTOGRAMS.items()):
+        labels = (("span", name),) + labels
+        cumulative_count = 0
+        for upper_bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+            cumulative_count += count
+            bucket_labels = _format_labels(labels + (("le", str(upper_bound)),))
+            lines.append(f"{METRIC_NAME}_bucket{{{bucket_labels}}} {cumulative_count}")
+        lines.append(f"{METRIC_NAME}_sum{{{_format_labels(labels)}}} {histogram.sum:.6f}")
+        lines.append(f"{METRIC_NAME}_count{{{_format_labels(labels)}}} {histogram.count}")
+
+    try:
+        # written next to the target and renamed, so a scraper never reads a partial file
+        temp_file_path = f"{file_path}.tmp"
+        with open(file=temp_file_path, mode="w") as metrics_file:
+            metrics_file.write("\n".join(lines) + "\n")
+        os.replace(temp_file_path, file_path)
+    except Exception as e:
+        logger.warning(f"Failed to export metrics: {e}")
@@ -1,13 +1,39 @@
+import atexit
+import json
+import queue
+import threading
+import time
+import traceback
+from collections import Counter
 from enum import Enum
-from typing import Optional
+from typing import List, Optional, Sequence
 
 from loguru import logger as loguru_logger
 from telebot import TeleBot
 
-from config import LOG_TO_TELEGRAM, TELEGRAM_BOT_TOKEN, TELEGRAM_IDS
+from config import (
+    LOG_FILE_JSON,
+    LOG_FILE_RETENTION,
+    LOG_FILE_ROTATION,
+    LOG_TO_TELEGRAM,
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_IDS,
+)
 
 # logs file path
 LOGS_FILE_PATH = "data/logs/logs.log"
+JSON_LOGS_FILE_PATH = "data/logs/logs.jsonl"
+LOG_FILE_COMPRESSION = "zip"
+# fields set with `logger.contextualize` that are written to the JSON logs
+LOG_CONTEXT_FIELDS = ("module", "dapp", "wallet", "chain", "tx_hash")
+
+# telegram messages waiting to be sent, newer ones are dropped when it's full
+TELEGRAM_QUEUE_SIZE = 1000
+# seconds messages arriving after the first one of a burst are collected into the same batch
+TELEGRAM_BATCH_INTERVAL = 2
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+# seconds queued messages are still sent for when the program exits
+TELEGRAM_FLUSH_TIMEOUT = 10
 
 
 class LogType(Enum):
@@ -19,9 +45,112 @@ class LogType(Enum):
     WARNING = "🟠"
 
 
+class TelegramSender:
+    """
+    Delivers Telegram logs from a background thread, so logging never waits for the Telegram API.
+
+    Messages of a burst are batched into one message per chat, repeated ones are sent once with a counter.
+    The queue is bounded: when it's full new messages are dropped and their number is reported in the next batch.
+    """
+
+    def __init__(
+        self,
+        bot: TeleBot,
+        chat_ids: Sequence[int],
+        max_queue_size: int = TELEGRAM_QUEUE_SIZE,
+        batch_interval: float = TELEGRAM_BATCH_INTERVAL,
+    ) -> None:
+        self.bot = bot
+        self.chat_ids = chat_ids
+        self.batch_interval = batch_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, text: str) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-logs", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def close(self, timeout: float = TELEGRAM_FLUSH_TIMEOUT) -> None:
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            text = self._queue.get()
+            if text is None:
+                break
+            batch = [text]
+            deadline = time.monotonic() + self.batch_interval
+            while time.monotonic() < deadline:
+                try:
+                    text = self._queue.get(timeout=deadline - time.monotonic())
+                except queue.Empty:
+                    break
+                if text is None:
+                    stopped = True
+                    break
+                batch.append(text)
+            self._deliver(batch=batch)
+
+    @staticmethod
+    def _digest(batch: List[str]) -> List[str]:
+        return [text if count == 1 else f"{text} (x{count})" for text, count in Counter(batch).items()]
+
+    @staticmethod
+    def _split(lines: List[str]) -> List[str]:
+        messages = [""]
+        for line in lines:
+            line = line[:TELEGRAM_MESSAGE_MAX_LENGTH]
+            if len(messages[-1]) + len(line) + 1 > TELEGRAM_MESSAGE_MAX_LENGTH:
+                messages.append("")
+            messages[-1] = f"{messages[-1]}\n{line}" if messages[-1] else line
+        return messages
+
+    def _deliver(self, batch: List[str]) -> None:
+        lines = self._digest(batch=batch)
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            lines.append(f"{LogType.WARNING.value} {dropped} Telegram logs were dropped, see the log file")
+
+        for message in self._split(lines=lines):
+            for chat_id in self.chat_ids:
+                try:
+                    self.bot.send_message(chat_id=chat_id, text=message)
+                except Exception as e:
+                    loguru_logger.error(f"Telegram log failed with error: {e}")
+
+
+def _format_json_record(record) -> str:
+    fields = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        **{field: record["extra"][field] for field in LOG_CONTEXT_FIELDS if field in record["extra"]},
+    }
+    if record["exception"] is not None:
+        fields["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["json"] = json.dumps(fields, ensure_ascii=False)
+    return "{extra[json]}\n"
+
+
 class Logger:
     def __init__(self) -> None:
-        self.tg_logger = Logger._setup_telegram_bot()
+        self.tg_sender = Logger._setup_telegram_sender()
         self.loguru_logger = loguru_logger
         Logger._configure_file_logging()
 
@@ -60,20 +189,42 @@ class Logger:
     def warning(self, msg: str, log_to_telegram: bool = False) -> None:
         self._log(log_type=LogType.WARNING, msg=msg, log_to_telegram=log_to_telegram)
 
+    def contextualize(self, **fields: str):
+        """
+        Adds the fields to every record logged inside the `with` block, in the current task only.
+        """
+        return self.loguru_logger.contextualize(**fields)
+
     def log_to_telegram(self, log_type: LogType, msg: str) -> None:
-        try:
-            for id in TELEGRAM_IDS:
-                self.tg_logger.send_message(chat_id=id, text=f"{log_type.value} {msg}")
-        except Exception as e:
-            self.loguru_logger.error(f"Telegram log failed with error: {e}")
+        self.tg_sender.send(text=f"{log_type.value} {msg}")
 
     @staticmethod
-    def _setup_telegram_bot() -> Optional[TeleBot]:
-        return TeleBot(token=TELEGRAM_BOT_TOKEN, disable_web_page_preview=True) if LOG_TO_TELEGRAM else None
+    def _setup_telegram_sender() -> Optional[TelegramSender]:
+        if not LOG_TO_TELEGRAM:
+            return None
+        bot = TeleBot(token=TELEGRAM_BOT_TOKEN, disable_web_page_preview=True)
+        return TelegramSender(bot=bot, chat_ids=TELEGRAM_IDS)
 
     @staticmethod
     def _configure_file_logging():
-        loguru_logger.add(sink=LOGS_FILE_PATH)
+        # records are written by a background thread of loguru, logging doesn't wait for the disk
+        if LOG_FILE_JSON:
+            loguru_logger.add(
+                sink=JSON_LOGS_FILE_PATH,
+                format=_format_json_record,
+                enqueue=True,
+                rotation=LOG_FILE_ROTATION,
+                retention=LOG_FILE_RETENTION,
+                compression=LOG_FILE_COMPRESSION,
+            )
+        else:
+            loguru_logger.add(
+                sink=LOGS_FILE_PATH,
+                enqueue=True,
+                rotation=LOG_FILE_ROTATION,
+                retention=LOG_FILE_RETENTION,
+                compression=LOG_FILE_COMPRESSION,
+            )
 
 
 logger = Logger()
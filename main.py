@@ -1,15 +1,40 @@
+import argparse
 import asyncio
+from typing import List, Optional
 
+from config import DRY_RUN, PROFILE_MODULES
+from core.cassette import cassette
+from core.dry_run import enable_dry_run
+from core.profiling import profiled
 from logger import logger
 from modules.module_manager import menu
+from modules.runner import MODULES, run_modules
 
 
-async def main():
-    await menu()
+async def main(profile: bool, module_names: Optional[List[str]]):
+    if module_names is None:
+        await menu(profile=profile)
+        return
+    with profiled(name="+".join(module_names), enabled=profile):
+        await run_modules(module_names=module_names)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true", help="profile the selected module")
+    parser.add_argument("--dry-run", action="store_true", help="plan every action without sending transactions")
+    parser.add_argument(
+        "--modules",
+        help=f"run these modules concurrently without the menu, comma separated: {','.join(MODULES)}",
+    )
+    args = parser.parse_args()
+    module_names = args.modules.split(",") if args.modules else None
+    if module_names is not None and not set(module_names) <= set(MODULES):
+        parser.error(f"unknown module in `{args.modules}`, expected some of {', '.join(MODULES)}")
+    if args.dry_run or DRY_RUN:
+        enable_dry_run()
+    cassette.seed_random()
     try:
-        asyncio.run(main=main())
+        asyncio.run(main=main(profile=args.profile or PROFILE_MODULES, module_names=module_names))
     except KeyboardInterrupt:
         logger.info("User keyboard interrupt. Aborting...")
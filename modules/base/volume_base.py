@@ -16,12 +16,14 @@ from core.chain import SCROLL
 from core.constants import POST_BRIDGE_CHECK_WAIT_RANGE
 from core.dapps.orbiter import Orbiter
 from core.dapps.routernitro import RouterNitro
+from core.dry_run import is_dry_run
 from core.okx import Okx
 from core.token import ETH
+from core.tracing import span
 from logger import logger
 from models.wallet import Wallet
 from modules.database import Database
-from utils import sleep
+from utils import sleep, sleep_between_actions
 
 
 async def volume_bridge_and_wait_action(
@@ -152,19 +154,22 @@ async def _bridge_action(
         database.update_state(
             item_index=wallet_index, state_dict_name=state_dict_name, new_state=getattr(wallet, state_dict_name)
         )
-        await sleep(delay_range=TX_DELAY_RANGE, pr_bar=True, send_message=False)
+        await sleep_between_actions(delay_range=TX_DELAY_RANGE, pr_bar=True, send_message=False)
         return True
     return False
 
 
 async def _wait_for_bridge_received(wallet: Wallet, dst_chain: Chain, state_dict_name: str) -> bool:
+    if is_dry_run():
+        return True
     dst_chain_client = wallet.to_client(chain=dst_chain)
 
-    while True:
-        current_balance = await dst_chain_client.get_token_balance(ETH)
-        if current_balance > getattr(wallet, state_dict_name)["dst_chain_initial_balance"]:
-            logger.success(f"Bridged ETH has successfully reached {dst_chain.name}")
-            return True
+    with span("bridge.wait_received", chain=dst_chain.name):
+        while True:
+            current_balance = await dst_chain_client.get_token_balance(ETH)
+            if current_balance > getattr(wallet, state_dict_name)["dst_chain_initial_balance"]:
+                logger.success(f"Bridged ETH has successfully reached {dst_chain.name}")
+                return True
 
-        logger.warning("Bridged ETH is still inflight")
-        await sleep(delay_range=POST_BRIDGE_CHECK_WAIT_RANGE, pr_bar=False)
+            logger.warning("Bridged ETH is still inflight")
+            await sleep(delay_range=POST_BRIDGE_CHECK_WAIT_RANGE, pr_bar=False)
@@ -1,10 +1,14 @@
 import random
+from typing import Optional
 
 from core.constants import POST_BRIDGE_CHECK_WAIT_RANGE
 from core.dapps import ScrollBridge
 from core.dapps.orbiter import Orbiter
 from core.dapps.routernitro import RouterNitro
+from core.dry_run import is_dry_run, log_dry_run_summary
+from core.rpc_stats import log_rpc_summary, rpc_action
 from core.token import ETH
+from core.tracing import export_metrics
 from logger import logger
 from config import (
     OKX_API_KEY,
@@ -27,11 +31,12 @@ from core.chain import SCROLL, MAINNET, NAMES_TO_CHAINS
 from core.okx import Okx
 from models.wallet import Wallet
 from modules.database import Database
-from utils import sleep, change_ip
+from utils import change_ip, sleep, sleep_between_actions
 
 
-async def bridge_batch():
-    database = Database.read_from_json()
+async def bridge_batch(database: Optional[Database] = None):
+    if database is None:
+        database = Database.read_from_json()
 
     while True:
         if USE_MOBILE_PROXY:
@@ -43,16 +48,24 @@ async def bridge_batch():
             break
 
         wallet, wallet_index = wallet_data
+        if is_dry_run():
+            # every wallet is planned once in a dry run, its state isn't saved anyway
+            wallet.bridge_finished = True
         logger.info(f"Working with wallet {wallet.address}")
 
-        if USE_OKX_WITHDRAW:
-            if not await perform_okx_withdraw(wallet=wallet, wallet_index=wallet_index, database=database):
-                continue
+        async with database.get_wallet_lock(address=wallet.address):
+            if USE_OKX_WITHDRAW:
+                if not await perform_okx_withdraw(wallet=wallet, wallet_index=wallet_index, database=database):
+                    continue
 
-        if not await perform_bridge(wallet=wallet, wallet_index=wallet_index, database=database):
-            continue
+            with rpc_action(module="bridger", dapp=BRIDGE_TO_USE.lower(), wallet=wallet.address):
+                if not await perform_bridge(wallet=wallet, wallet_index=wallet_index, database=database):
+                    continue
 
-        await sleep(delay_range=POST_BRIDGE_DELAY_RANGE, send_message=False)
+        await sleep_between_actions(delay_range=POST_BRIDGE_DELAY_RANGE, send_message=False)
+    log_rpc_summary()
+    log_dry_run_summary()
+    export_metrics()
     logger.success("No more wallets left")
 
 
@@ -1,10 +1,14 @@
 import random
+from typing import Optional
 
 
 from core.chain import ARBITRUM, SCROLL, ZKSYNC, NAMES_TO_CHAINS
 from core.constants import COG_VOLUME_STATE_NAME
 from core.dapps import CogFinance
+from core.dry_run import is_dry_run, log_dry_run_summary
+from core.rpc_stats import log_rpc_summary, rpc_action
 from core.token import ETH, WETH
+from core.tracing import export_metrics, span
 from logger import logger
 from config import (
     USE_MOBILE_PROXY,
@@ -23,11 +27,12 @@ from modules.base.volume_base import (
     volume_transfer_eth_action,
 )
 from modules.database import Database
-from utils import change_ip, sleep
+from utils import change_ip, sleep_between_actions
 
 
-async def cog_volume():
-    database = Database.read_from_json()
+async def cog_volume(database: Optional[Database] = None):
+    if database is None:
+        database = Database.read_from_json()
 
     if not database.ensure_ready_for_volume_mode():
         logger.error("Deposit addresses must be provided for each wallet")
@@ -44,13 +49,21 @@ async def cog_volume():
                 break
 
             wallet, wallet_index = wallet_data
+            if is_dry_run():
+                # every wallet is planned once in a dry run, its state isn't saved anyway
+                wallet.cog_volume_state["deposited_to_okx"] = True
 
             logger.info(f"Working with wallet {wallet.address}")
 
-            await perform_volume_mode_cycle(database=database, wallet=wallet, wallet_index=wallet_index)
-            await sleep(delay_range=WALLET_DELAY_RANGE, send_message=False)
+            async with database.get_wallet_lock(address=wallet.address):
+                with rpc_action(module="cog_volume", dapp="cycle", wallet=wallet.address), span("cog_volume.cycle"):
+                    await perform_volume_mode_cycle(database=database, wallet=wallet, wallet_index=wallet_index)
+            await sleep_between_actions(delay_range=WALLET_DELAY_RANGE, send_message=False)
         except Exception as e:
             logger.exception(f"Error occurred: {e}")
+    log_rpc_summary()
+    log_dry_run_summary()
+    export_metrics()
     logger.success("No more wallets left")
 
 
@@ -104,22 +117,25 @@ async def perform_volume_mode_cycle(database: Database, wallet: Wallet, wallet_i
                 (await client.get_token_balance(token=WETH))
                 * (random.randint(*WRAPPED_ETH_USAGE_PERCENTAGE_RANGE) / 100)
             )
-            if not await cog.supply(value=tx_amount):
-                continue
-
             action = "supply"
+            action_succeeded = await cog.supply(value=tx_amount)
         else:
             tx_amount = 0
-            if not await cog.withdraw():
-                continue
-
             action = "withdraw"
+            action_succeeded = await cog.withdraw()
+
+        if not action_succeeded:
+            if is_dry_run():
+                # nothing is sent, so the balances the action failed on won't change on a retry
+                logger.warning(f"[DryRun] Cog {action} couldn't be planned, the rest of the volume is skipped")
+                return False
+            continue
 
         wallet.cog_volume_state["volume_reached"] += round(WETH.from_wei(tx_amount), 6)
         wallet.cog_volume_state["last_action"] = action
         database.update_item(item_index=wallet_index, cog_volume_state=wallet.cog_volume_state)
 
-        await sleep(delay_range=TX_DELAY_RANGE, send_message=False)
+        await sleep_between_actions(delay_range=TX_DELAY_RANGE, send_message=False)
 
     if not wallet.cog_volume_state["eth_unwrapped"]:
         weth_balance = await client.get_token_balance(token=WETH)
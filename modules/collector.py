@@ -1,33 +1,41 @@
 import random
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from config import (
     MINIMUM_USD_COLLECTED_VALUE,
     TOKENS_TO_COLLECT,
     TX_DELAY_RANGE,
+    USE_BEST_SWAP_ROUTE,
     USE_MOBILE_PROXY,
 )
 from core import Client
 from core.chain import SCROLL
-from core.constants import TOKEN_FULL_BALANCE_USAGE_MULTIPLIER
+from core.constants import ACTION_TO_DAPP, TOKEN_FULL_BALANCE_USAGE_MULTIPLIER
 from core.dapps import CogFinance, LayerBank
 from core.dapps.multicall import MulticallV3
+from core.dapps.pool_cache import warm_up_pool_cache
+from core.dry_run import is_dry_run, log_dry_run_summary
+from core.rpc_stats import log_rpc_summary, rpc_action
+from core.swap_latency import log_swap_latency_summary
 from core.token import COG_WETH, ETH, LETH, SYMBOLS_TO_TOKENS, USDC, USDT, WETH, Token
+from core.tracing import export_metrics
 from logger import logger
 from models.wallet import Wallet
 from modules.database import Database
-from modules.warmup import get_dex_instance_by_name
-from utils import change_ip, sleep
+from modules.warmup import get_swap_route
+from utils import change_ip, sleep_between_actions
 
 
-async def collect():
-    database = Database.read_from_json()
+async def collect(database: Optional[Database] = None):
+    if database is None:
+        database = Database.read_from_json()
 
     if len(database.data) == 0:
         logger.error("Database is empty")
         return None
 
     token_ids_to_prices = await get_token_ids_to_prices(wallet=database.data[0])
+    await warm_up_pool_cache(client=database.data[0].to_client(SCROLL))
 
     while True:
         if USE_MOBILE_PROXY:
@@ -37,17 +45,26 @@ async def collect():
 
         if wallet is None:
             break
+        if is_dry_run():
+            # every wallet is planned once in a dry run, its state isn't saved anyway
+            wallet.tokens_collected = list(TOKENS_TO_COLLECT)
 
         logger.info(f"Working with wallet {wallet.address}")
 
         tokens_to_collect = list(set(TOKENS_TO_COLLECT) - set(wallet.tokens_collected))
 
-        await perform_collector_action(
-            database=database,
-            wallet=wallet,
-            token_symbols_to_collect=tokens_to_collect,
-            token_prices=token_ids_to_prices,
-        )
+        async with database.get_wallet_lock(address=wallet.address):
+            with rpc_action(module="collector", dapp="collect", wallet=wallet.address):
+                await perform_collector_action(
+                    database=database,
+                    wallet=wallet,
+                    token_symbols_to_collect=tokens_to_collect,
+                    token_prices=token_ids_to_prices,
+                )
+    log_swap_latency_summary()
+    log_rpc_summary()
+    log_dry_run_summary()
+    export_metrics()
     logger.success("No more wallets left")
 
 
@@ -95,7 +112,7 @@ async def perform_collector_action(
             wallet.tokens_collected.remove("WETH")
 
         database.save_database()
-        await sleep(delay_range=TX_DELAY_RANGE)
+        await sleep_between_actions(delay_range=TX_DELAY_RANGE)
 
 
 async def get_token_ids_to_prices(wallet: Wallet) -> Dict[str, float]:
@@ -120,8 +137,10 @@ async def get_token_usd_balances(
 
 
 async def perform_swap_action(client: Client, token_in: Token, amount: float):
-    dex = random.choice(["izumi", "skydrome", "spacefi", "syncswap", "zebra"])
+    dexes = ACTION_TO_DAPP["swap"] if USE_BEST_SWAP_ROUTE else [random.choice(ACTION_TO_DAPP["swap"])]
 
-    dex_instance = get_dex_instance_by_name(client=client, dex=dex)
+    dex_instance, quote = await get_swap_route(
+        client=client, dexes=dexes, token_in=token_in, token_out=ETH, amount=amount
+    )
 
-    return await dex_instance.swap(token_in=token_in, token_out=ETH, amount=amount)
+    return await dex_instance.swap(token_in=token_in, token_out=ETH, amount=amount, quote=quote)
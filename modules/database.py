@@ -1,9 +1,10 @@
+import asyncio
 import binascii
 import itertools
 import json
 import random
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
 from config import (
@@ -29,6 +30,7 @@ from core.constants import (
     PRIVATE_KEYS_FILE_PATH,
     PROXIES_FILE_PATH,
 )
+from core.dry_run import is_dry_run
 from logger import logger
 from models.wallet import Wallet
 from utils import read_from_txt
@@ -37,10 +39,63 @@ from utils import read_from_txt
 @dataclass
 class Database:
     data: List[Wallet]
+    file_path: str = DATABASE_FILE_PATH
+    # wallet address -> lock held while a module is working with the wallet
+    _wallet_locks: Dict[str, asyncio.Lock] = field(default_factory=dict, init=False, repr=False)
 
     def _to_dict(self) -> List[Dict[str, Any]]:
         return [vars(wallet) for wallet in self.data]
 
+    def get_wallet_lock(self, address: str) -> asyncio.Lock:
+        """
+        Modules running in one process share the database and take this lock for every wallet action,
+        so two of them never send transactions from the same wallet at once.
+        """
+        if address not in self._wallet_locks:
+            self._wallet_locks[address] = asyncio.Lock()
+        return self._wallet_locks[address]
+
+    @staticmethod
+    def create_wallet(private_key: str, proxy: Optional[str], deposit_address: Optional[str]) -> Wallet:
+        layerbank_tx_count = random.randint(*LAYERBANK_TX_COUNT)
+        return Wallet(
+            client=Client(private_key=private_key, proxy=proxy),
+            deposit_address=deposit_address,
+            izumi_swaps_count=random.randint(*IZUMI_SWAPS_COUNT),
+            skydrome_swaps_count=random.randint(*SKYDROME_SWAPS_COUNT),
+            spacefi_swaps_count=random.randint(*SPACEFI_SWAPS_COUNT),
+            syncswap_swaps_count=random.randint(*SYNCSWAP_SWAPS_COUNT),
+            zebra_swaps_count=random.randint(*ZEBRA_SWAPS_COUNT),
+            layerbank_deposits=layerbank_tx_count,
+            layerbank_withdrawals=layerbank_tx_count,
+            dmail_tx_count=random.randint(*DMAIL_TX_COUNT),
+            rubyscore_tx_count=random.randint(*RUBYSCORE_TX_COUNT),
+            nfts_to_mint={addr: random.randint(*config["amount"]) for addr, config in SCROLL_NFTS_TO_MINT.items()},
+            cog_volume_state={
+                "volume_goal": round(random.uniform(*COG_VOLUME_ETH_GOAL_RANGE), 5),
+                "volume_reached": 0.0,
+                "okx_withdrawn": None,
+                "dst_chain_initial_balance": None,
+                "bridged_to_scroll": False,
+                "eth_wrapped": False,
+                "last_action": None,
+                "eth_unwrapped": False,
+                "bridged_from_scroll": False,
+                "deposited_to_okx": False,
+            },
+            volume_mode_state={
+                "okx_withdrawn": None,
+                "bridged_to_scroll": False,
+                "dst_chain_initial_balance": None,
+                "volume_goal": round(random.uniform(*VOLUME_MODE_USD_GOAL_RANGE), 5),
+                "volume_reached": 0.0,
+                "last_lending": None,
+                "eth_wrapped": False,
+                "bridged_from_scroll": False,
+                "deposited_to_okx": False,
+            },
+        )
+
     @staticmethod
     def _create_database() -> "Database":
         try:
@@ -60,45 +115,8 @@ class Database:
                 private_keys, proxies, deposit_addresses, fillvalue=None
             ):
                 try:
-                    layerbank_tx_count = random.randint(*LAYERBANK_TX_COUNT)
-                    wallet = Wallet(
-                        client=Client(private_key=private_key, proxy=proxy),
-                        deposit_address=deposit_address,
-                        izumi_swaps_count=random.randint(*IZUMI_SWAPS_COUNT),
-                        skydrome_swaps_count=random.randint(*SKYDROME_SWAPS_COUNT),
-                        spacefi_swaps_count=random.randint(*SPACEFI_SWAPS_COUNT),
-                        syncswap_swaps_count=random.randint(*SYNCSWAP_SWAPS_COUNT),
-                        zebra_swaps_count=random.randint(*ZEBRA_SWAPS_COUNT),
-                        layerbank_deposits=layerbank_tx_count,
-                        layerbank_withdrawals=layerbank_tx_count,
-                        dmail_tx_count=random.randint(*DMAIL_TX_COUNT),
-                        rubyscore_tx_count=random.randint(*RUBYSCORE_TX_COUNT),
-                        nfts_to_mint={
-                            addr: random.randint(*config["amount"]) for addr, config in SCROLL_NFTS_TO_MINT.items()
-                        },
-                        cog_volume_state={
-                            "volume_goal": round(random.uniform(*COG_VOLUME_ETH_GOAL_RANGE), 5),
-                            "volume_reached": 0.0,
-                            "okx_withdrawn": None,
-                            "dst_chain_initial_balance": None,
-                            "bridged_to_scroll": False,
-                            "eth_wrapped": False,
-                            "last_action": None,
-                            "eth_unwrapped": False,
-                            "bridged_from_scroll": False,
-                            "deposited_to_okx": False,
-                        },
-                        volume_mode_state={
-                            "okx_withdrawn": None,
-                            "bridged_to_scroll": False,
-                            "dst_chain_initial_balance": None,
-                            "volume_goal": round(random.uniform(*VOLUME_MODE_USD_GOAL_RANGE), 5),
-                            "volume_reached": 0.0,
-                            "last_lending": None,
-                            "eth_wrapped": False,
-                            "bridged_from_scroll": False,
-                            "deposited_to_okx": False,
-                        },
+                    wallet = Database.create_wallet(
+                        private_key=private_key, proxy=proxy, deposit_address=deposit_address
                     )
                 except binascii.Error:
                     logger.error(f"Provided private key is not valid: {private_key}")
@@ -113,9 +131,11 @@ class Database:
             logger.exception(f"Error while creating database: {e}")
             sys.exit(1)
 
-    def save_database(self, file_path: str = DATABASE_FILE_PATH) -> None:
+    def save_database(self, file_path: Optional[str] = None) -> None:
+        if is_dry_run():
+            return
         data_dict = self._to_dict()
-        with open(file=file_path, mode="w") as json_file:
+        with open(file=file_path or self.file_path, mode="w") as json_file:
             json.dump(data_dict, json_file, indent=4)
 
     @staticmethod
@@ -142,7 +162,7 @@ class Database:
             client = Client(**wallet_data)
             wallet = Wallet(client=client, **item)
             data.append(wallet)
-        return cls(data=data)
+        return cls(data=data, file_path=file_path)
 
     def update_item(self, item_index: int, **kwargs):
         if 0 <= item_index < len(self.data):
@@ -1,3 +1,5 @@
+from config import PROFILE_MODULES
+from core.profiling import profiled
 from logger import logger
 from modules.bridger import bridge_batch
 from modules.collector import collect
@@ -7,21 +9,25 @@ from modules.volume import volume
 from modules.warmup import warmup
 
 
-async def menu() -> None:
+MODULE_NAMES = {"1": "database", "2": "warmup", "3": "bridger", "4": "cog_volume", "5": "volume", "6": "collector"}
+
+
+async def menu(profile: bool = PROFILE_MODULES) -> None:
     await greeting()
     module_num = input("Enter a module number: ")
-    if module_num == "1":
-        Database.create_database()
-    if module_num == "2":
-        await warmup()
-    if module_num == "3":
-        await bridge_batch()
-    if module_num == "4":
-        await cog_volume()
-    if module_num == "5":
-        await volume()
-    if module_num == "6":
-        await collect()
+    with profiled(name=MODULE_NAMES.get(module_num, "unknown"), enabled=profile):
+        if module_num == "1":
+            Database.create_database()
+        if module_num == "2":
+            await warmup()
+        if module_num == "3":
+            await bridge_batch()
+        if module_num == "4":
+            await cog_volume()
+        if module_num == "5":
+            await volume()
+        if module_num == "6":
+            await collect()
 
 
 async def greeting() -> None:
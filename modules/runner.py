@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import Optional, Sequence
+
+from core.rpc_stats import get_action_count, get_rpc_call_count
+from logger import logger
+from modules.bridger import bridge_batch
+from modules.cog_volume import cog_volume
+from modules.collector import collect
+from modules.database import Database
+from modules.volume import volume
+from modules.warmup import warmup
+
+# module name -> coroutine running the module on a database
+MODULES = {
+    "warmup": warmup,
+    "bridger": bridge_batch,
+    "cog_volume": cog_volume,
+    "volume": volume,
+    "collector": collect,
+}
+
+
+async def _run_module(name: str, database: Database) -> float:
+    started_at = time.perf_counter()
+    try:
+        await MODULES[name](database=database)
+    except Exception as e:
+        logger.exception(f"[Runner] {name} stopped with an error: {e}")
+    return time.perf_counter() - started_at
+
+
+async def run_modules(module_names: Sequence[str], database: Optional[Database] = None) -> None:
+    """
+    Runs the modules concurrently in the current event loop, without the interactive menu.
+
+    All of them work on one database, so they share the wallet clients and with them the web3 instances,
+    RPC limiters, quote and pool caches and fee monitors. A wallet is only used by one module at a time.
+    """
+    module_names = list(dict.fromkeys(module_names))
+    unknown_modules = [name for name in module_names if name not in MODULES]
+    if unknown_modules:
+        raise ValueError(f"Unknown modules {', '.join(unknown_modules)}, expected some of {', '.join(MODULES)}")
+
+    if database is None:
+        database = Database.read_from_json()
+
+    logger.info(f"[Runner] Running {', '.join(module_names)}")
+    started_at = time.perf_counter()
+    durations = await asyncio.gather(*[_run_module(name=name, database=database) for name in module_names])
+    elapsed = time.perf_counter() - started_at
+
+    for name, duration in zip(module_names, durations):
+        logger.info(
+            f"[Runner] {name}: {get_action_count(module=name)} wallet actions, "
+            f"{get_rpc_call_count(method='eth_sendRawTransaction', module=name)} transactions in {duration:.0f} s"
+        )
+    actions = sum(get_action_count(module=name) for name in module_names)
+    transactions = get_rpc_call_count(method="eth_sendRawTransaction")
+    logger.success(
+        f"[Runner] All modules finished in {elapsed:.0f} s: {actions} wallet actions, {transactions} transactions, "
+        f"{transactions / elapsed * 60:.1f} transactions per minute"
+    )
@@ -5,7 +5,12 @@ from core import Client
 from core.chain import ARBITRUM, SCROLL, ZKSYNC, NAMES_TO_CHAINS
 from core.constants import TOKEN_FULL_BALANCE_USAGE_MULTIPLIER, VOLUME_MODE_STATE_NAME
 from core.dapps import CogFinance, LayerBank
+from core.dapps.pool_cache import warm_up_pool_cache
+from core.dry_run import is_dry_run, log_dry_run_summary
+from core.rpc_stats import log_rpc_summary, rpc_action
+from core.swap_latency import log_swap_latency_summary
 from core.token import ETH, WETH
+from core.tracing import export_metrics, span
 from logger import logger
 from config import (
     USE_MOBILE_PROXY,
@@ -16,8 +21,10 @@ from config import (
     LENDING_PERCENTAGE_RANGE,
     VOLUME_BRIDGE_TO_SCROLL_NAME,
     VOLUME_BRIDGE_FROM_SCROLL_NAME,
+    VOLUME_DAPPS_TO_USE,
     TOKENS_TO_COLLECT,
     TX_DELAY_RANGE,
+    USE_BEST_SWAP_ROUTE,
 )
 from models.wallet import Wallet
 from modules.base.volume_base import (
@@ -27,18 +34,20 @@ from modules.base.volume_base import (
 )
 from modules.collector import get_token_ids_to_prices, perform_collector_action
 from modules.database import Database
-from modules.warmup import get_dex_instance_by_name
-from utils import change_ip, sleep
+from modules.warmup import get_swap_route
+from utils import change_ip, sleep_between_actions
 
 
-async def volume():
-    database = Database.read_from_json()
+async def volume(database: Optional[Database] = None):
+    if database is None:
+        database = Database.read_from_json()
 
     if not database.ensure_ready_for_volume_mode():
         logger.error("Deposit addresses must be provided for each wallet")
         return
 
     token_ids_to_prices = await get_token_ids_to_prices(wallet=database.data[0])
+    await warm_up_pool_cache(client=database.data[0].to_client(SCROLL))
 
     while database.has_volume_actions_available():
         try:
@@ -51,14 +60,23 @@ async def volume():
                 break
 
             wallet, wallet_index = wallet_data
+            if is_dry_run():
+                # every wallet is planned once in a dry run, its state isn't saved anyway
+                wallet.volume_mode_state["deposited_to_okx"] = True
             logger.info(f"Working with wallet {wallet.address}")
 
-            await perform_volume_mode_cycle(
-                database=database, wallet=wallet, wallet_index=wallet_index, token_prices=token_ids_to_prices
-            )
-            await sleep(delay_range=WALLET_DELAY_RANGE, send_message=False)
+            async with database.get_wallet_lock(address=wallet.address):
+                with rpc_action(module="volume", dapp="cycle", wallet=wallet.address), span("volume.cycle"):
+                    await perform_volume_mode_cycle(
+                        database=database, wallet=wallet, wallet_index=wallet_index, token_prices=token_ids_to_prices
+                    )
+            await sleep_between_actions(delay_range=WALLET_DELAY_RANGE, send_message=False)
         except Exception as e:
             logger.exception(f"Error occurred: {e}")
+    log_swap_latency_summary()
+    log_rpc_summary()
+    log_dry_run_summary()
+    export_metrics()
     logger.success("No more wallets left")
 
 
@@ -94,20 +112,25 @@ async def perform_volume_mode_cycle(
             return None
         action, dapp = action_data
 
-        amount_used = await perform_volume_action(
-            action=action,
-            executor=dapp,
-            wallet=wallet,
-            wallet_index=wallet_index,
-            database=database,
-            token_prices=token_prices,
-        )
+        with rpc_action(module="volume", dapp=dapp):
+            amount_used = await perform_volume_action(
+                action=action,
+                executor=dapp,
+                wallet=wallet,
+                wallet_index=wallet_index,
+                database=database,
+                token_prices=token_prices,
+            )
 
         if amount_used is not None:
             wallet.volume_mode_state["volume_reached"] += amount_used
             database.update_item(item_index=wallet_index, volume_mode_state=wallet.volume_mode_state)
+        elif is_dry_run():
+            # nothing is sent, so the balances an action failed on won't change on a retry
+            logger.warning(f"[DryRun] {dapp} couldn't be planned, the rest of the volume is skipped")
+            return None
 
-        await sleep(delay_range=TX_DELAY_RANGE, send_message=False)
+        await sleep_between_actions(delay_range=TX_DELAY_RANGE, send_message=False)
 
     await volume_collector_action(database=database, wallet=wallet, token_prices=token_prices)
 
@@ -183,11 +206,14 @@ async def volume_swap_action(dex: str, client: Client) -> Optional[Tuple[float,
         )
         token_out = await client.get_random_token(excluded_token=token_in)
 
-    dex_instance = get_dex_instance_by_name(client=client, dex=dex)
+    dexes = VOLUME_DAPPS_TO_USE["swap"] if USE_BEST_SWAP_ROUTE else [dex]
+    dex_instance, quote = await get_swap_route(
+        client=client, dexes=dexes, token_in=token_in, token_out=token_out, amount=amount
+    )
     if dex_instance is None:
         return None
 
-    if await dex_instance.swap(token_in=token_in, token_out=token_out, amount=amount):
+    if await dex_instance.swap(token_in=token_in, token_out=token_out, amount=amount, quote=quote):
         return amount, token_in.api_id
     return None
 
@@ -210,7 +236,7 @@ async def volume_lending_action(
 
         wallet.volume_mode_state["last_lending"] = None
         database.update_item(item_index=wallet_index, volume_mode_state=wallet.volume_mode_state)
-        await sleep(delay_range=TX_DELAY_RANGE, send_message=False)
+        await sleep_between_actions(delay_range=TX_DELAY_RANGE, send_message=False)
 
         if lending == "cog":
             weth_balance = await client.get_token_balance(token=WETH)
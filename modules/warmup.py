@@ -1,6 +1,7 @@
 import random
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 
+from eth_abi import decode
 from web3.contract import AsyncContract
 
 from config import (
@@ -14,7 +15,8 @@ from config import (
 )
 from core.chain import SCROLL
 from core.client import Client
-from core.constants import SCROLL_NFT_ABI, TOKEN_FULL_BALANCE_USAGE_MULTIPLIER
+from core.constants import MULTICALL_CHUNK_SIZE, SCROLL_NFT_ABI, TOKEN_FULL_BALANCE_USAGE_MULTIPLIER
+from core.contracts import encode_function_call, get_contract
 from core.dapps import (
     Dex,
     Dmail,
@@ -26,17 +28,36 @@ from core.dapps import (
     Syncswap,
     Zebra,
 )
+from core.dapps.interfaces import Quote
+from core.dapps.multicall import MulticallV3
+from core.dapps.pool_cache import warm_up_pool_cache
+from core.dapps.quoter import QuoteAggregator
 from core.dapps.rubyscore import RubyScore
 from core.decorators import gas_delay
-from core.token import ETH
+from core.dry_run import is_dry_run, log_dry_run_summary
+from core.rpc_stats import log_rpc_summary, rpc_action
+from core.swap_latency import log_swap_latency_summary
+from core.token import ETH, Token
+from core.tracing import export_metrics
 from logger import logger
 from models.wallet import Wallet
 from modules.database import Database
-from utils import change_ip, sleep
+from utils import change_ip, sleep_between_actions
 
+# NFT contract address -> name, read once per run
+_NFT_NAMES: Dict[str, str] = {}
+# (wallet address, NFT contract address) whose mint counts were capped by the pre-scan
+_PRESCANNED_MINTS: Set[Tuple[str, str]] = set()
 
-async def warmup():
-    database = Database.read_from_json()
+
+async def warmup(database: Optional[Database] = None):
+    if database is None:
+        database = Database.read_from_json()
+
+    if len(database.data) > 0:
+        client = database.data[0].to_client(SCROLL)
+        await warm_up_pool_cache(client=client)
+        await prescan_nft_mints(database=database, client=client)
 
     while database.has_actions_available():
         if USE_MOBILE_PROXY:
@@ -44,20 +65,29 @@ async def warmup():
 
         wallet_data = database.get_random_item_by_criteria(warmup_finished=False)
         wallet, wallet_index = wallet_data
+        if is_dry_run():
+            # every wallet is planned once in a dry run, its state isn't saved anyway
+            wallet.warmup_finished = True
 
         dapp = wallet.get_random_dapp()
         action = wallet.get_action_from_dapp(dapp=dapp)
 
         logger.info(f"Working with wallet {wallet.address}")
 
-        await perform_warmup_action(
-            action=action,
-            wallet=wallet,
-            executor=dapp,
-            wallet_index=wallet_index,
-            database=database,
-        )
-        await sleep(delay_range=TX_DELAY_RANGE, send_message=False)
+        async with database.get_wallet_lock(address=wallet.address):
+            with rpc_action(module="warmup", dapp=dapp, wallet=wallet.address):
+                await perform_warmup_action(
+                    action=action,
+                    wallet=wallet,
+                    executor=dapp,
+                    wallet_index=wallet_index,
+                    database=database,
+                )
+        await sleep_between_actions(delay_range=TX_DELAY_RANGE, send_message=False)
+    log_swap_latency_summary()
+    log_rpc_summary()
+    log_dry_run_summary()
+    export_metrics()
     logger.success("No more wallets left")
 
 
@@ -127,11 +157,16 @@ async def swap_action(dex: str, wallet: Wallet, wallet_index: int, database: Dat
         token_out = await client.get_random_token(excluded_token=token_in)
         is_backswapped = False
 
-    dex_instance = get_dex_instance_by_name(client=client, dex=dex)
+    dex_instance, quote = await get_swap_route(
+        client=client, dexes=[dex], token_in=token_in, token_out=token_out, amount=amount
+    )
     if dex_instance is None:
         return False
 
-    if await dex_instance.swap(token_in=token_in, token_out=token_out, amount=amount) and not is_backswapped:
+    if (
+        await dex_instance.swap(token_in=token_in, token_out=token_out, amount=amount, quote=quote)
+        and not is_backswapped
+    ):
         database.decrease_swap_count(item_index=wallet_index, wallet=wallet, dex=dex)
         return wallet.has_actions_available()
     return True
@@ -186,26 +221,94 @@ async def register_domain_action(wallet: Wallet, wallet_index: int, database: Da
     return True
 
 
+async def prescan_nft_mints(database: Database, client: Client) -> None:
+    """
+    Reads the NFT balances of all unfinished wallets in chunked multicalls and caps their
+    `nfts_to_mint` counts at what `MAX_NFT_TOKEN_OWNED` still allows, so ineligible mints are never picked.
+    NFT names are read in the same pass and cached for the run.
+    """
+    # (wallet, NFT address) per balance call, None for the name calls
+    lookups: List[Tuple[Optional[Wallet], str]] = []
+    calls = []
+    for nft_address in SCROLL_NFTS_TO_MINT:
+        nft_contract = get_contract(
+            w3=client.w3, address=nft_address, abi=SCROLL_NFT_ABI, functions=["balanceOf", "mint", "name"]
+        )
+        if nft_address not in _NFT_NAMES:
+            lookups.append((None, nft_contract.address))
+            calls.append((nft_contract.address, True, encode_function_call(abi=nft_contract.abi, fn_name="name")))
+        for wallet in database.data:
+            if wallet.warmup_finished or wallet.nfts_to_mint.get(nft_address, 0) <= 0:
+                continue
+            lookups.append((wallet, nft_address))
+            calls.append(
+                (
+                    nft_contract.address,
+                    True,
+                    encode_function_call(abi=nft_contract.abi, fn_name="balanceOf", args=[wallet.address]),
+                )
+            )
+
+    multicall = MulticallV3(client=client)
+    pruned_mints = 0
+    for chunk_start in range(0, len(calls), MULTICALL_CHUNK_SIZE):
+        results = await multicall.aggregate3(calls=calls[chunk_start : chunk_start + MULTICALL_CHUNK_SIZE])
+        if results is None:
+            logger.warning("[NFT2Me] Failed to pre-scan NFT balances, the rest is checked before each mint")
+            break
+
+        for (wallet, nft_address), (success, return_data) in zip(lookups[chunk_start:], results):
+            if not success or not return_data:
+                continue
+            if wallet is None:
+                (_NFT_NAMES[nft_address],) = decode(["string"], return_data)
+                continue
+
+            (amount_owned,) = decode(["uint256"], return_data)
+            mints_left = max(MAX_NFT_TOKEN_OWNED - amount_owned, 0)
+            if wallet.nfts_to_mint[nft_address] > mints_left:
+                pruned_mints += wallet.nfts_to_mint[nft_address] - mints_left
+                wallet.nfts_to_mint[nft_address] = mints_left
+                if not wallet.has_actions_available():
+                    wallet.warmup_finished = True
+            _PRESCANNED_MINTS.add((wallet.address, nft_address))
+
+    if pruned_mints > 0:
+        database.save_database()
+    logger.info(f"[NFT2Me] Pre-scan removed {pruned_mints} mints over the owned limit")
+
+
+async def get_nft_name(nft_contract: AsyncContract) -> str:
+    if nft_contract.address not in _NFT_NAMES:
+        _NFT_NAMES[nft_contract.address] = await nft_contract.functions.name().call()
+    return _NFT_NAMES[nft_contract.address]
+
+
 @gas_delay()
 async def mint_action(wallet: Wallet, wallet_index: int, database: Database, client: Client, nft_address: str) -> bool:
-    nft_contract: AsyncContract = client.w3.eth.contract(
-        address=client.w3.to_checksum_address(nft_address), abi=SCROLL_NFT_ABI
+    nft_contract: AsyncContract = get_contract(
+        w3=client.w3, address=nft_address, abi=SCROLL_NFT_ABI, functions=["balanceOf", "mint", "name"]
     )
 
     try:
-        nft_name = await nft_contract.functions.name().call()
-        amount_owned = await nft_contract.functions.balanceOf(client.address).call()
-
-        if amount_owned >= MAX_NFT_TOKEN_OWNED:
-            logger.warning(f"Max amount of {nft_name} is already minted")
-            database.decrease_nft_count(
-                item_index=wallet_index, wallet=wallet, address=nft_address, amount=wallet.nfts_to_mint[nft_address]
-            )
-            return wallet.has_actions_available()
+        nft_name = await get_nft_name(nft_contract=nft_contract)
+        # pre-scanned counts never exceed what the wallet may still mint
+        if (wallet.address, nft_address) not in _PRESCANNED_MINTS:
+            amount_owned = await nft_contract.functions.balanceOf(client.address).call()
+
+            if amount_owned >= MAX_NFT_TOKEN_OWNED:
+                logger.warning(f"Max amount of {nft_name} is already minted")
+                database.decrease_nft_count(
+                    item_index=wallet_index,
+                    wallet=wallet,
+                    address=nft_address,
+                    amount=wallet.nfts_to_mint[nft_address],
+                )
+                return wallet.has_actions_available()
 
         logger.info(f"[NFT2Me] Minting {nft_name}")
 
-        data = nft_contract.encodeABI("mint", args=())
+        data = encode_function_call(abi=nft_contract.abi, fn_name="mint", args=())
         tx_hash = await client.send_transaction(
             to=nft_address, data=data, value=ETH.to_wei(SCROLL_NFTS_TO_MINT[nft_address]["mint_fee"])
         )
@@ -229,3 +332,25 @@ def get_dex_instance_by_name(client: Client, dex: str) -> Optional[Dex]:
     elif dex == "zebra":
         return Zebra(client=client)
     return None
+
+
+async def get_swap_route(
+    client: Client, dexes: List[str], token_in: Token, token_out: Token, amount: float
+) -> Tuple[Optional[Dex], Optional[Quote]]:
+    """
+    Quotes the swap on all given DEXes in one multicall and returns the DEX with the best quote.
+    If no quote could be fetched, falls back to a random DEX, which then quotes the swap by itself.
+    """
+    dex_instances = {dex: get_dex_instance_by_name(client=client, dex=dex) for dex in dexes}
+    dex_instances = {dex: instance for dex, instance in dex_instances.items() if instance is not None}
+    if not dex_instances:
+        return None, None
+
+    # the price check of the swap runs alongside the quotes
+    client.prefetch_token_price(token_list=(token_in, token_out))
+    quote = await QuoteAggregator(client=client).get_best_quote(
+        dexes=list(dex_instances.values()), token_in=token_in, token_out=token_out, amount_in=token_in.to_wei(amount)
+    )
+    if quote is None:
+        return random.choice(list(dex_instances.values())), None
+    return dex_instances[quote.dex], quote
@@ -2,7 +2,8 @@ import asyncio
 import json
 import random
 import sys
-from typing import List, Optional
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterator, List, Optional
 
 import aiohttp
 from tqdm import tqdm
@@ -10,11 +11,15 @@ from web3 import AsyncWeb3
 from web3.types import Wei
 
 from config import CHAIN_TO_CHECK_GAS_PRICE_IN, PROXY_CHANGE_IP_URL
+from core.cassette import cassette
 from core.chain import MAINNET, SCROLL, Chain
+from core.provider import PooledHTTPProvider
 from logger import logger
 
 
 async def change_ip() -> None:
+    if cassette.replaying:
+        return
     async with aiohttp.ClientSession() as session:
         async with session.get(url=PROXY_CHANGE_IP_URL) as response:
             if response.status == 200:
@@ -45,7 +50,61 @@ def read_from_json(file_path: str):
         sys.exit(1)
 
 
+class LazyJSONFile:
+    """
+    JSON file that is parsed on first access instead of at import time.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._data = None
+
+    @property
+    def data(self) -> Any:
+        if self._data is None:
+            self._data = read_from_json(file_path=self.file_path)
+        return self._data
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.data[key]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.data)
+
+
+class LazyABI(LazyJSONFile, Sequence):
+    pass
+
+
+class LazyJSONMapping(LazyJSONFile, Mapping):
+    pass
+
+
+# set by `disable_sleeps` for runs against a local chain, where the delays only hide throughput
+_SLEEPS_DISABLED = False
+
+
+# set by `disable_pacing_delays` for dry runs, polls and retries keep their delays
+_PACING_DELAYS_DISABLED = False
+
+
+def disable_sleeps() -> None:
+    global _SLEEPS_DISABLED
+    _SLEEPS_DISABLED = True
+
+
+def disable_pacing_delays() -> None:
+    global _PACING_DELAYS_DISABLED
+    _PACING_DELAYS_DISABLED = True
+
+
 async def sleep(delay_range: List[int], send_message: bool = True, pr_bar: bool = True) -> None:
+    if _SLEEPS_DISABLED:
+        return
+
     delay = random.randint(*delay_range)
 
     if send_message:
@@ -60,8 +119,22 @@ async def sleep(delay_range: List[int], send_message: bool = True, pr_bar: bool
         await asyncio.sleep(delay=delay)
 
 
+async def sleep_between_actions(delay_range: List[int], send_message: bool = True, pr_bar: bool = True) -> None:
+    """
+    Delay between the actions or the wallets of a module, the one a dry run skips.
+    """
+    if _PACING_DELAYS_DISABLED:
+        return
+    await sleep(delay_range=delay_range, send_message=send_message, pr_bar=pr_bar)
+
+
+async def sleep_seconds(delay: float) -> None:
+    if not _SLEEPS_DISABLED:
+        await asyncio.sleep(delay=delay)
+
+
 async def get_chain_gas_price(chain: Optional[Chain] = None) -> Wei:
     if chain is None:
         chain = SCROLL if CHAIN_TO_CHECK_GAS_PRICE_IN == "SCROLL" else MAINNET
-    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(chain.rpc))
+    w3 = AsyncWeb3(PooledHTTPProvider(endpoint_uris=chain.rpcs))
     return await w3.eth.gas_price